@@ -0,0 +1,233 @@
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optionnel (pip install brotli)
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optionnel (pip install zstandard)
+    zstandard = None
+
+
+# ---------------------------------------------------------------------------
+# Compression négociée (Accept-Encoding) : zstd, br, gzip
+#
+# - remplace GZipMiddleware ; à placer juste après MetricsMiddleware
+# - middleware hybride (sync et async) : pas de bascule de thread sous ASGI
+# - réponses classiques et StreamingHttpResponse (sync ou async), un flush
+#   par morceau pour ne pas retarder le flux
+# - ignore les petits corps (EO_COMPRESSION_MIN_SIZE), les types déjà
+#   compressés (images, archives, vidéos...) et les flux SSE
+# - BREACH : pas de compression du HTML qui porte un jeton CSRF (voir
+#   carries_csrf_token)
+# - niveaux par type de contenu (EO_COMPRESSION_LEVELS), plus bas en flux
+# - response.precompressed = {encodage: octets} (cache de feed) : servi tel
+#   quel, sans recompresser
+# brotli / zstandard sont optionnels : sans eux, seul gzip est proposé.
+# ---------------------------------------------------------------------------
+
+MIN_SIZE = getattr(settings, "EO_COMPRESSION_MIN_SIZE", 512)
+
+# Ordre de préférence du serveur (à q égal côté client)
+ENCODINGS = [
+    encoding
+    for encoding in getattr(settings, "EO_COMPRESSION_ENCODINGS", ("zstd", "br", "gzip"))
+    if encoding == "gzip"
+    or (encoding == "br" and brotli is not None)
+    or (encoding == "zstd" and zstandard is not None)
+]
+
+SKIP_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/zstd",
+    "application/pdf",
+    "application/octet-stream",
+    # SSE : chaque événement doit partir tel quel, sans tampon de compression
+    "text/event-stream",
+)
+
+DEFAULT_LEVELS = {
+    # JSON servi à chaque requête : compromis CPU / taille
+    "application/json": {"gzip": 6, "br": 5, "zstd": 6},
+    # Exports et HTML : peu fréquents, on compresse plus fort
+    "text/csv": {"gzip": 9, "br": 9, "zstd": 12},
+    "text/html": {"gzip": 6, "br": 6, "zstd": 6},
+    "default": {"gzip": 6, "br": 4, "zstd": 3},
+    # Flux : latence d'abord
+    "streaming": {"gzip": 5, "br": 4, "zstd": 3},
+}
+
+
+def _levels(content_type, streaming=False):
+    levels = getattr(settings, "EO_COMPRESSION_LEVELS", DEFAULT_LEVELS)
+    if streaming:
+        return levels.get("streaming", DEFAULT_LEVELS["streaming"])
+    base = content_type.split(";", 1)[0].strip().lower()
+    return levels.get(base) or levels.get("default", DEFAULT_LEVELS["default"])
+
+
+def negotiate(accept_encoding):
+    """
+    Meilleur encodage accepté (q > 0) parmi ENCODINGS, ou None.
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressible(content_type):
+    base = (content_type or "").split(";", 1)[0].strip().lower()
+    return not base.startswith(SKIP_CONTENT_TYPES)
+
+
+def carries_csrf_token(request, response):
+    """
+    Réponse HTML dont le corps contient (ou peut contenir) le jeton CSRF :
+    get_token() appelé pendant la requête, ou cookie CSRF posé. Compressée,
+    sa taille ferait fuiter le jeton octet par octet si la page reflète aussi
+    une saisie de l'attaquant (BREACH).
+    """
+    base = (response.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+    if base != "text/html":
+        return False
+    return bool(request.META.get("CSRF_COOKIE_NEEDS_UPDATE")) or settings.CSRF_COOKIE_NAME in response.cookies
+
+
+def compress(data, encoding, content_type="application/json"):
+    level = _levels(content_type)[encoding]
+    if encoding == "gzip":
+        # mtime=0 : sortie déterministe (ETag, cache)
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding):
+        level = _levels("", streaming=True)[encoding]
+        self.encoding = encoding
+        if encoding == "gzip":
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self.compressor = brotli.Compressor(quality=level)
+        else:
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data):
+        if self.encoding == "gzip":
+            return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def _compress_stream(iterator, encoding):
+    compressor = _StreamCompressor(encoding)
+    for data in iterator:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+async def _compress_async_stream(iterator, encoding):
+    compressor = _StreamCompressor(encoding)
+    async for data in iterator:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not compressible(response.get("Content-Type")):
+            return response
+        if carries_csrf_token(request, response):
+            return response
+
+        precompressed = getattr(response, "precompressed", None)
+        if not response.streaming and precompressed is None and len(response.content) < MIN_SIZE:
+            return response
+
+        # Varie selon Accept-Encoding même si ce client-ci n'en demande pas
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = _compress_stream(response.streaming_content, encoding)
+            del response.headers["Content-Length"]
+        else:
+            if precompressed and encoding in precompressed:
+                body = precompressed[encoding]
+            else:
+                if len(response.content) < MIN_SIZE:
+                    return response
+                body = compress(response.content, encoding, response.get("Content-Type", ""))
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response.headers["Content-Length"] = str(len(body))
+
+        # Le corps change : ETag faible (comme GZipMiddleware)
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
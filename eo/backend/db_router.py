@@ -0,0 +1,115 @@
+import contextvars
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Positionné par ReplicaRoutingMiddleware pour la durée de la requête
+# (contextvar : suit aussi les threads de sync_to_async et les vues async)
+_use_replica = contextvars.ContextVar("eo_db_use_replica", default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Lectures des requêtes GET/HEAD/OPTIONS -> réplica, tout le reste -> primaire.
+    Hors requête HTTP (commandes, workers), tout reste sur le primaire.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Même données des deux côtés
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _client_key(request):
+    """
+    Identité du client sans requête : en-tête Authorization (JWT) ou cookie
+    de session. Les clients anonymes ne sont pas épinglés.
+    """
+    credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credential:
+        return None
+    digest = hashlib.sha1(credential.encode()).hexdigest()
+    return f"eo:db_pin:{digest}"
+
+
+def _pin_seconds():
+    return getattr(settings, "EO_DB_PIN_PRIMARY_SECONDS", 5)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Active le réplica pour les requêtes sûres, sauf si le client a écrit il y a
+    moins de EO_DB_PIN_PRIMARY_SECONDS (il relit alors le primaire).
+    Sans réplica configuré : ne fait rien. Hybride (sync et async) : la
+    contextvar suit les threads de sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = replica_configured()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        key = _client_key(request)
+        safe = request.method in SAFE_METHODS
+        pinned = bool(key) and safe and cache.get(key) is not None
+
+        token = _use_replica.set(safe and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if key and not safe and response.status_code < 400:
+            cache.set(key, time.time(), _pin_seconds())
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        key = _client_key(request)
+        safe = request.method in SAFE_METHODS
+        pinned = bool(key) and safe and await cache.aget(key) is not None
+
+        token = _use_replica.set(safe and not pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if key and not safe and response.status_code < 400:
+            await cache.aset(key, time.time(), _pin_seconds())
+        return response
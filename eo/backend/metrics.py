@@ -0,0 +1,259 @@
+import hmac
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+# ---------------------------------------------------------------------------
+# Métriques par route (histogrammes Prometheus)
+#
+# MetricsMiddleware mesure pour chaque requête : latence, nombre de requêtes
+# SQL et temps SQL (connection.execute_wrapper, pas de DEBUG nécessaire),
+# temps de rendu de la réponse (sérialisation JSON) et taille.
+#
+# Multi-workers (gunicorn) : chaque processus écrit périodiquement son
+# instantané dans EO_METRICS_DIR/metrics-<pid>.json (écriture atomique) ;
+# /metrics additionne tous les fichiers. Sans EO_METRICS_DIR : processus
+# courant uniquement.
+# ---------------------------------------------------------------------------
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    "eo_http_request_duration_seconds": ("Latence des requêtes HTTP", TIME_BUCKETS),
+    "eo_http_db_queries": ("Nombre de requêtes SQL par requête HTTP", QUERY_BUCKETS),
+    "eo_http_db_duration_seconds": ("Temps SQL par requête HTTP", TIME_BUCKETS),
+    "eo_http_serialization_seconds": ("Temps de rendu de la réponse (sérialisation)", TIME_BUCKETS),
+    "eo_http_response_size_bytes": ("Taille du corps de la réponse", SIZE_BUCKETS),
+}
+
+
+class MetricsStore:
+    """
+    {(métrique, route, méthode): [compteurs par bucket..., somme, total]}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._data = {}
+        self._last_flush = 0.0
+
+    def observe(self, metric, route, method, value):
+        buckets = HISTOGRAMS[metric][1]
+        key = f"{metric}|{route}|{method}"
+        with self._lock:
+            if self._pid != os.getpid():
+                # Processus forké : on repart de zéro
+                self._pid = os.getpid()
+                self._data = {}
+            series = self._data.get(key)
+            if series is None:
+                series = self._data[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._data.items()}
+
+    def maybe_flush(self, force=False):
+        directory = getattr(settings, "EO_METRICS_DIR", None)
+        if not directory:
+            return
+        interval = getattr(settings, "EO_METRICS_FLUSH_INTERVAL", 5.0)
+        now = time.monotonic()
+        if not force and now - self._last_flush < interval:
+            return
+        self._last_flush = now
+
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, os.path.join(directory, f"metrics-{os.getpid()}.json"))
+
+
+store = MetricsStore()
+
+
+def collect():
+    """
+    Agrège les instantanés de tous les workers (ou le processus courant).
+    """
+    directory = getattr(settings, "EO_METRICS_DIR", None)
+    if not directory:
+        return store.snapshot()
+
+    store.maybe_flush(force=True)
+    merged = {}
+    for name in os.listdir(directory):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for key, series in data.items():
+            current = merged.get(key)
+            if current is None:
+                merged[key] = series
+            else:
+                merged[key] = [a + b for a, b in zip(current, series)]
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(data):
+    lines = []
+    by_metric = {}
+    for key, series in data.items():
+        metric, route, method = key.split("|", 2)
+        by_metric.setdefault(metric, []).append((route, method, series))
+
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for route, method, series in sorted(by_metric.get(metric, [])):
+            labels = f'route="{_escape(route)}",method="{_escape(method)}"'
+            for bound, count in zip(buckets, series):
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{metric}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{metric}_count{{{labels}}} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_allowed(request):
+    """
+    Staff connecté (session), jeton EO_METRICS_TOKEN ou adresse dans
+    EO_METRICS_ALLOWED_IPS (adresses ou réseaux CIDR). Refusé par défaut.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+
+    token = getattr(settings, "EO_METRICS_TOKEN", "")
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if token and hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, "EO_METRICS_ALLOWED_IPS", ())
+    )
+
+
+def metrics_view(request):
+    """
+    GET /metrics (format texte Prometheus), réservé au staff, au jeton
+    "Authorization: Bearer <EO_METRICS_TOKEN>" ou aux EO_METRICS_ALLOWED_IPS.
+    """
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_prometheus(collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    À placer en tête de MIDDLEWARE (mesure la requête complète). Hybride :
+    sous ASGI, les requêtes SQL s'exécutent dans les threads de
+    sync_to_async, hors de portée d'execute_wrapper : seules la durée et la
+    taille sont mesurées.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == "/metrics":
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+        self.observe(request, response, start, timer)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == "/metrics":
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    def observe(self, request, response, start, timer=None):
+        end = time.perf_counter()
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "unmatched"
+        method = request.method
+
+        render_start = getattr(request, "_metrics_render_start", None)
+        store.observe("eo_http_request_duration_seconds", route, method, end - start)
+        if timer is not None:
+            store.observe("eo_http_db_queries", route, method, timer.count)
+            store.observe("eo_http_db_duration_seconds", route, method, timer.duration)
+        if render_start is not None:
+            store.observe("eo_http_serialization_seconds", route, method, end - render_start)
+        if not response.streaming:
+            store.observe("eo_http_response_size_bytes", route, method, len(response.content))
+
+        store.maybe_flush()
+
+    def process_template_response(self, request, response):
+        # Appelé juste avant response.render() (Response DRF) : le rendu est
+        # ce qui se passe entre ce point et le retour dans __call__.
+        request._metrics_render_start = time.perf_counter()
+        return response
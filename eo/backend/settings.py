@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -83,13 +87,106 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Profil piloté par l'environnement :
+# - EO_DB_ENGINE=sqlite (défaut) : EO_DB_NAME (fichier), EO_DB_REPLICA_NAME (2e fichier)
+# - EO_DB_ENGINE=postgres : EO_DB_NAME/USER/PASSWORD/HOST/PORT,
+#   EO_DB_REPLICA_HOST/EO_DB_REPLICA_PORT pour un réplica en lecture
+# Connexions persistantes (EO_DB_CONN_MAX_AGE) + health checks ; pool natif
+# psycopg (EO_DB_POOL_MAX_SIZE) à partir de Django 5.1, sinon PgBouncer
+# (EO_DB_PGBOUNCER=1 désactive les curseurs serveur, incompatibles).
+
+import django
+
+EO_DB_ENGINE = os.environ.get("EO_DB_ENGINE", "sqlite")
+
+# SQLite : "tuned" = WAL, synchronous=NORMAL, mmap, BEGIN IMMEDIATE
+# (backend/sqlite_tuned) ; "default" = réglages SQLite d'origine
+EO_SQLITE_PROFILE = os.environ.get("EO_SQLITE_PROFILE", "tuned")
+SQLITE_ENGINES = {
+    "tuned": 'backend.sqlite_tuned',
+    "default": 'django.db.backends.sqlite3',
+}
+EO_SQLITE_MMAP_SIZE = int(os.environ.get("EO_SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+EO_SQLITE_CACHE_SIZE = int(os.environ.get("EO_SQLITE_CACHE_SIZE", -64000))  # négatif = Kio
+EO_SQLITE_BUSY_TIMEOUT = int(os.environ.get("EO_SQLITE_BUSY_TIMEOUT", 5000))  # ms
+EO_DB_CONN_MAX_AGE = int(os.environ.get("EO_DB_CONN_MAX_AGE", 60))
+
+
+def _database(host=None, port=None, name=None):
+    if EO_DB_ENGINE == "postgres":
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': name or os.environ.get("EO_DB_NAME", "eo"),
+            'USER': os.environ.get("EO_DB_USER", "eo"),
+            'PASSWORD': os.environ.get("EO_DB_PASSWORD", ""),
+            'HOST': host or os.environ.get("EO_DB_HOST", "localhost"),
+            'PORT': port or os.environ.get("EO_DB_PORT", "5432"),
+            'CONN_MAX_AGE': EO_DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+        pool_max_size = int(os.environ.get("EO_DB_POOL_MAX_SIZE", 0))
+        if pool_max_size and django.VERSION >= (5, 1):
+            # Le pool remplace les connexions persistantes
+            database['CONN_MAX_AGE'] = 0
+            database['OPTIONS']['pool'] = {
+                'min_size': int(os.environ.get("EO_DB_POOL_MIN_SIZE", 2)),
+                'max_size': pool_max_size,
+            }
+        if os.environ.get("EO_DB_PGBOUNCER") == "1":
+            database['DISABLE_SERVER_SIDE_CURSORS'] = True
+        return database
+
+    return {
+        'ENGINE': SQLITE_ENGINES[EO_SQLITE_PROFILE],
+        'NAME': name or os.environ.get("EO_DB_NAME", BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': EO_DB_CONN_MAX_AGE,
     }
+
+
+DATABASES = {
+    'default': _database(),
 }
 
+EO_DB_REPLICA_HOST = os.environ.get("EO_DB_REPLICA_HOST")
+EO_DB_REPLICA_NAME = os.environ.get("EO_DB_REPLICA_NAME")
+
+if EO_DB_REPLICA_HOST or EO_DB_REPLICA_NAME:
+    DATABASES['replica'] = _database(
+        host=EO_DB_REPLICA_HOST,
+        port=os.environ.get("EO_DB_REPLICA_PORT"),
+        name=EO_DB_REPLICA_NAME,
+    )
+    # Tests : le réplica pointe sur la base de test principale
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['backend.db_router.PrimaryReplicaRouter']
+
+# Après une écriture, un client reste sur le primaire pendant ce délai
+# (lecture de ses propres écritures malgré le retard de réplication)
+EO_DB_PIN_PRIMARY_SECONDS = int(os.environ.get("EO_DB_PIN_PRIMARY_SECONDS", 5))
+
+
+# Password hashing
+# Profil EO_PASSWORD_HASHER_PROFILE :
+# - "pbkdf2" (défaut) : itérations réglables via EO_PBKDF2_ITERATIONS
+# - "argon2" : nécessite argon2-cffi, coûts réglables EO_ARGON2_*
+# Un changement de paramètres/profil est appliqué au prochain login (rehash).
+
+EO_PASSWORD_HASHER_PROFILE = os.environ.get("EO_PASSWORD_HASHER_PROFILE", "pbkdf2")
+EO_PBKDF2_ITERATIONS = int(os.environ.get("EO_PBKDF2_ITERATIONS", 0)) or None
+EO_ARGON2_TIME_COST = int(os.environ.get("EO_ARGON2_TIME_COST", 2))
+EO_ARGON2_MEMORY_COST = int(os.environ.get("EO_ARGON2_MEMORY_COST", 102400))
+EO_ARGON2_PARALLELISM = int(os.environ.get("EO_ARGON2_PARALLELISM", 8))
+
+PASSWORD_HASHERS = [
+    'users.hashers.TunablePBKDF2PasswordHasher',
+    'users.hashers.TunableArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if EO_PASSWORD_HASHER_PROFILE == "argon2":
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -131,12 +228,28 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-import os
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = os.environ.get("EO_MEDIA_ROOT", BASE_DIR / 'media')
 AUTH_USER_MODEL = 'users.User'
 
+# Emails (notifications, core/notifications.py) : SMTP en production,
+# console ou fichiers (EMAIL_FILE_PATH) en local
+EMAIL_BACKENDS = {
+    "smtp": "django.core.mail.backends.smtp.EmailBackend",
+    "console": "django.core.mail.backends.console.EmailBackend",
+    "file": "django.core.mail.backends.filebased.EmailBackend",
+}
+EMAIL_BACKEND = EMAIL_BACKENDS[os.environ.get("EO_EMAIL_BACKEND", "console")]
+EMAIL_FILE_PATH = os.environ.get("EO_EMAIL_FILE_PATH", BASE_DIR / 'tmp' / 'emails')
+EMAIL_HOST = os.environ.get("EO_EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EO_EMAIL_PORT", 25))
+EMAIL_HOST_USER = os.environ.get("EO_EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EO_EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EO_EMAIL_USE_TLS", "0") == "1"
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get("EO_DEFAULT_FROM_EMAIL", "Éo <notifications@eo.local>")
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -145,13 +258,40 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Authentification JWT :
+# - "stateless" (défaut) : user + rôles reconstruits depuis les claims du token
+# - "db" : chargement du User à chaque requête (comportement historique)
+EO_JWT_AUTH_MODE = os.environ.get("EO_JWT_AUTH_MODE", "stateless")
+
+JWT_AUTHENTICATION_CLASS = {
+    "stateless": 'users.authentication.MembershipClaimsJWTAuthentication',
+    "db": 'rest_framework_simplejwt.authentication.JWTAuthentication',
+}[EO_JWT_AUTH_MODE]
+
+# Au-delà, le claim "orgs" est omis (token trop gros) : retour au mode DB
+EO_JWT_MAX_ORG_CLAIMS = 200
+# Version des memberships en cache : avec un cache local (LocMem), un autre
+# worker peut accepter un token obsolète pendant au plus ce délai.
+EO_MEMBERSHIP_VERSION_CACHE_TTL = 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        JWT_AUTHENTICATION_CLASS,
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON via orjson (core/renderers.py), même sortie que le renderer DRF
+    # (repli sur celui-ci dans les cas qu'orjson écrit autrement)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
@@ -159,9 +299,84 @@ REST_FRAMEWORK = {
     # ✅ Pagination pro
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+
+    # Login : fenêtres glissantes par IP / par email (users/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get("EO_LOGIN_RATE_IP", "30/min"),
+        'login_email': os.environ.get("EO_LOGIN_RATE_EMAIL", "10/min"),
+    },
 }
+# Listes (publications, memberships, abonnements) sérialisées depuis
+# .values() (FastReadMixin) ; False = serializers DRF classiques
+EO_FAST_SERIALIZERS = os.environ.get("EO_FAST_SERIALIZERS", "1") == "1"
+
+# Cache du feed publications (core/feed_cache.py), 0 = désactivé
+EO_FEED_CACHE_TTL = int(os.environ.get("EO_FEED_CACHE_TTL", 30))
+
+# Compression des réponses (backend/compression.py) : br / zstd seulement
+# si brotli / zstandard sont installés
+EO_COMPRESSION_MIN_SIZE = int(os.environ.get("EO_COMPRESSION_MIN_SIZE", 512))
+
 # Upload limits (10 MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 
-
+# Facturation : secret de signature des webhooks (Stripe ou stand-in local).
+# Vide par défaut : tous les webhooks sont refusés tant qu'il n'est pas défini.
+EO_BILLING_WEBHOOK_SECRET = os.environ.get("EO_BILLING_WEBHOOK_SECRET", "")
+
+# Invitations en masse : nombre max d'entrées par requête
+EO_BULK_INVITE_MAX = 500
+
+# Lecture groupée (/batch/?ids=...) : nombre max d'ids par requête
+EO_BATCH_MAX_IDS = 100
+
+# Synchronisation différentielle (/api/sync/, core/sync.py)
+EO_SYNC_PAGE_SIZE = 200
+EO_SYNC_SETTLE_SECONDS = 2
+EO_SYNC_TOMBSTONE_RETENTION_DAYS = 90
+
+# Timeline d'accueil (core/timeline.py) : lecture du feed depuis la
+# timeline (worker process_timeline requis), fan-out jusqu'à N membres
+EO_TIMELINE_FEED = os.environ.get("EO_TIMELINE_FEED", "0") == "1"
+EO_TIMELINE_FANOUT_MAX_MEMBERS = 5000
+
+# File de tâches différées (core/tasks.py, commande run_tasks) : essais,
+# délai de base du backoff exponentiel, bail d'un worker, taille du pool
+EO_TASK_MAX_ATTEMPTS = 5
+EO_TASK_BACKOFF_SECONDS = 10
+EO_TASK_BACKOFF_MAX_SECONDS = 3600
+EO_TASK_LEASE_SECONDS = 300
+EO_TASK_CONCURRENCY = int(os.environ.get("EO_TASK_CONCURRENCY", 4))
+
+# Notifications de publication (core/notifications.py) : memberships par
+# tâche d'envoi (une connexion SMTP par tâche)
+EO_NOTIFY_CHUNK_SIZE = 500
+
+# Flux SSE des publications (core/events.py, core/sse.py) : diffusion
+# local (un worker) | socket (plusieurs workers, une machine) | postgres
+# (NOTIFY / LISTEN), événements rejouables par Last-Event-ID
+EO_EVENTS_BACKEND = os.environ.get("EO_EVENTS_BACKEND", "local")
+EO_EVENTS_SOCKET_DIR = os.environ.get("EO_EVENTS_SOCKET_DIR", BASE_DIR / 'tmp' / 'events')
+EO_EVENTS_HEARTBEAT_SECONDS = 15
+EO_EVENTS_BACKLOG = 500
+EO_EVENTS_RETENTION_HOURS = 24
+
+# Actions d'admin en masse (core/admin_jobs.py) : publications par lot
+EO_ADMIN_JOB_CHUNK_SIZE = 200
+
+# Archivage froid (core/archive.py) : publications archivées inchangées
+# depuis N jours
+EO_ARCHIVE_AFTER_DAYS = 180
+
+# Métriques (/metrics) : répertoire partagé entre workers gunicorn
+# (un fichier par processus), vide = processus courant seulement
+EO_METRICS_DIR = os.environ.get("EO_METRICS_DIR", "")
+EO_METRICS_FLUSH_INTERVAL = float(os.environ.get("EO_METRICS_FLUSH_INTERVAL", 5))
+# Accès à /metrics : staff connecté, jeton Bearer ou adresses autorisées
+# (liste séparée par des virgules, réseaux CIDR acceptés). Rien de défini :
+# staff seulement.
+EO_METRICS_TOKEN = os.environ.get("EO_METRICS_TOKEN", "")
+EO_METRICS_ALLOWED_IPS = [
+    item.strip() for item in os.environ.get("EO_METRICS_ALLOWED_IPS", "").split(",") if item.strip()
+]
@@ -0,0 +1 @@
+from .base import atomic_immediate  # noqa: F401
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+
+
+# ---------------------------------------------------------------------------
+# Profil SQLite pour les déploiements mono-serveur (EO_SQLITE_PROFILE=tuned)
+#
+# - WAL : les lecteurs ne bloquent plus sur l'écrivain (et inversement)
+# - synchronous=NORMAL : sûr en WAL, fsync seulement aux checkpoints
+# - mmap / cache_size / temp_store : lectures en mémoire
+# - busy_timeout : attente du verrou au lieu d'un "database is locked" immédiat
+# - BEGIN IMMEDIATE sur demande (atomic_immediate) : la transaction prend le
+#   verrou d'écriture dès le début, sans "database is locked" à la montée en
+#   verrou (lecture -> écriture) entre workers ou requêtes concurrentes
+#   (busy_timeout n'y peut rien). À utiliser pour toute transaction dont la
+#   première requête est une lecture suivie d'écritures (réservation de lots,
+#   invitations en masse, restauration d'archives...). Pour les autres, un
+#   BEGIN différé suffit : une transaction qui commence par écrire prend le
+#   verrou d'emblée, et un atomic() en lecture seule ne bloque personne.
+# Checkpoint/optimize périodiques : commande sqlite_maintenance.
+# ---------------------------------------------------------------------------
+
+def tuned_pragmas():
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={getattr(settings, 'EO_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        f"PRAGMA cache_size={getattr(settings, 'EO_SQLITE_CACHE_SIZE', -64000)}",
+        f"PRAGMA busy_timeout={getattr(settings, 'EO_SQLITE_BUSY_TIMEOUT', 5000)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def apply_tuned_pragmas(sender, connection, **kwargs):
+    if not isinstance(connection, DatabaseWrapper):
+        return
+    with connection.cursor() as cursor:
+        for pragma in tuned_pragmas():
+            cursor.execute(pragma)
+
+
+connection_created.connect(apply_tuned_pragmas, dispatch_uid="eo_sqlite_tuned_pragmas")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Positionné par atomic_immediate() pour le BEGIN du bloc le plus externe
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
+
+
+@contextmanager
+def atomic_immediate(using=None):
+    """
+    transaction.atomic() dont le BEGIN prend tout de suite le verrou
+    d'écriture SQLite. Sans effet sur les autres moteurs, ni dans un bloc
+    atomic déjà ouvert (savepoint).
+    """
+    connection = transaction.get_connection(using)
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
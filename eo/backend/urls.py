@@ -9,7 +9,11 @@ from core.views import (
     PublicationViewSet,
     PublicationAttachmentViewSet,
     MembershipViewSet,
+    BillingWebhookView,
+    SyncView,
 )
+from core import async_views
+from backend.metrics import metrics_view
 
 router = DefaultRouter()
 router.register(r"organisations", OrganisationViewSet, basename="organisation")
@@ -19,8 +23,17 @@ router.register(r"memberships", MembershipViewSet, basename="membership")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/users/", include("users.urls")),
+    path("api/billing/webhook/", BillingWebhookView.as_view(), name="billing-webhook"),
+    path("api/sync/", SyncView.as_view(), name="sync"),
     path("api/", include(router.urls)),
+
+    # Lecture async (ASGI)
+    path("api/async/publications/", async_views.publication_feed, name="async-publication-feed"),
+    path("api/async/publications/upcoming/", async_views.publication_upcoming, name="async-publication-upcoming"),
+    path("api/async/publications/<int:pk>/attachments/", async_views.publication_attachments, name="async-publication-attachments"),
+    path("api/async/organisations/<slug:slug>/", async_views.organisation_detail, name="async-organisation-detail"),
 ]
 
 if settings.DEBUG:
@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.urls import reverse
 from django.utils.html import format_html
 
-from .models import Organisation, Publication, Membership, PublicationAttachment
+from .admin_jobs import create_job, resume
+from .models import AdminBulkJob, Organisation, Publication, Membership, PublicationAttachment, Task
+from .tasks import retry_failed
 
 
 # ---------------------------------------------------------------------------
@@ -111,15 +114,43 @@ class PublicationAdmin(admin.ModelAdmin):
 
     preview_contenu.short_description = "Aperçu"
 
+    # Actions en masse : appliquées par lots en tâche de fond (core/admin_jobs.py)
+    def bulk_job(self, request, queryset, action):
+        job = create_job(action, queryset, request.user)
+        url = reverse("admin:core_adminbulkjob_change", args=[job.pk])
+        self.message_user(
+            request,
+            format_html(
+                '{} publication(s) : <a href="{}">tâche #{}</a> planifiée (process_admin_jobs).',
+                job.total,
+                url,
+                job.pk,
+            ),
+        )
+
     @admin.action(description="Publier la sélection")
     def publier(self, request, queryset):
-        queryset.update(is_published=True)
+        self.bulk_job(request, queryset, AdminBulkJob.ACTION_PUBLISH)
 
     @admin.action(description="Dépublier la sélection")
     def depublier(self, request, queryset):
-        queryset.update(is_published=False)
+        self.bulk_job(request, queryset, AdminBulkJob.ACTION_UNPUBLISH)
+
+    @admin.action(description="Archiver la sélection")
+    def archiver(self, request, queryset):
+        self.bulk_job(request, queryset, AdminBulkJob.ACTION_ARCHIVE)
+
+    @admin.action(description="Supprimer la sélection (et les fichiers joints)", permissions=["delete"])
+    def supprimer(self, request, queryset):
+        self.bulk_job(request, queryset, AdminBulkJob.ACTION_DELETE)
 
-    actions = ["publier", "depublier"]
+    actions = ["publier", "depublier", "archiver", "supprimer"]
+
+    def get_actions(self, request):
+        # delete_selected : une seule transaction, fichiers laissés sur le stockage
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
 
 
 # ---------------------------------------------------------------------------
@@ -131,4 +162,111 @@ class MembershipAdmin(admin.ModelAdmin):
     list_display = ("user", "organisation", "role", "created_at")
     list_filter = ("role", "organisation")
     search_fields = ("user__email", "organisation__nom")
-    ordering = ("organisation", "user")
\ No newline at end of file
+    ordering = ("organisation", "user")
+
+
+# ---------------------------------------------------------------------------
+# ADMIN : Tâches d'actions en masse (progression)
+# ---------------------------------------------------------------------------
+
+@admin.register(AdminBulkJob)
+class AdminBulkJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "action", "badge_status", "progression", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "action")
+    ordering = ("-id",)
+    readonly_fields = (
+        "action",
+        "status",
+        "progression",
+        "cursor",
+        "error",
+        "created_by",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    )
+    exclude = ("object_ids", "total", "processed")
+
+    STATUS_COLORS = {
+        AdminBulkJob.STATUS_PENDING: "gray",
+        AdminBulkJob.STATUS_RUNNING: "#0a7cff",
+        AdminBulkJob.STATUS_DONE: "#28a745",
+        AdminBulkJob.STATUS_FAILED: "#dc3545",
+    }
+
+    def badge_status(self, obj):
+        return badge(obj.get_status_display(), self.STATUS_COLORS[obj.status])
+
+    badge_status.short_description = "Statut"
+
+    def progression(self, obj):
+        percent = 100 if not obj.total else obj.processed * 100 // obj.total
+        return format_html(
+            '<progress max="100" value="{}"></progress> {} / {}',
+            percent,
+            obj.processed,
+            obj.total,
+        )
+
+    progression.short_description = "Progression"
+
+    @admin.action(description="Reprendre les tâches en échec")
+    def reprendre(self, request, queryset):
+        self.message_user(request, f"{resume(queryset)} tâche(s) relancée(s).")
+
+    actions = ["reprendre"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+
+# ---------------------------------------------------------------------------
+# ADMIN : File de tâches différées (core/tasks.py)
+# ---------------------------------------------------------------------------
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "badge_status", "attempts", "run_at", "dedup_key", "created_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "dedup_key")
+    ordering = ("-id",)
+    readonly_fields = (
+        "name",
+        "args",
+        "kwargs",
+        "dedup_key",
+        "status",
+        "attempts",
+        "max_attempts",
+        "run_at",
+        "locked_until",
+        "last_error",
+        "created_at",
+    )
+
+    STATUS_COLORS = {
+        Task.STATUS_PENDING: "gray",
+        Task.STATUS_RUNNING: "#0a7cff",
+        Task.STATUS_FAILED: "#dc3545",
+    }
+
+    def badge_status(self, obj):
+        return badge(obj.get_status_display(), self.STATUS_COLORS[obj.status])
+
+    badge_status.short_description = "Statut"
+
+    @admin.action(description="Relancer les tâches en échec")
+    def relancer(self, request, queryset):
+        self.message_user(request, f"{retry_failed(queryset)} tâche(s) relancée(s).")
+
+    actions = ["relancer"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
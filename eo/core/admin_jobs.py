@@ -0,0 +1,119 @@
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from backend.sqlite_tuned import atomic_immediate
+
+from .models import AdminBulkJob, Publication
+
+
+# ---------------------------------------------------------------------------
+# Actions d'admin en masse (publier / dépublier / archiver / supprimer)
+#
+# L'action d'admin n'enregistre que la sélection (AdminBulkJob, ids triés).
+# La commande process_admin_jobs l'applique par lots de
+# EO_ADMIN_JOB_CHUNK_SIZE publications, dans l'ordre des ids, une courte
+# transaction par lot : verrous brefs, save() / delete() et leurs signaux
+# (cache du feed, timeline, sync) comme pour une modification unitaire.
+#
+# - Le curseur (dernier id traité) avance dans la transaction du lot : un
+#   worker tué reprend exactement après le dernier lot commité.
+# - Une erreur annule le lot et passe la tâche en échec (message dans
+#   l'admin) ; "Reprendre" la relance depuis le curseur.
+# - Suppression : fichiers des pièces jointes retirés du stockage par la
+#   file de tâches (signal post_delete, core/tasks.py).
+# ---------------------------------------------------------------------------
+
+CHUNK_SIZE = getattr(settings, "EO_ADMIN_JOB_CHUNK_SIZE", 200)
+
+_TARGET_STATUS = {
+    AdminBulkJob.ACTION_PUBLISH: Publication.STATUS_PUBLISHED,
+    AdminBulkJob.ACTION_UNPUBLISH: Publication.STATUS_DRAFT,
+    AdminBulkJob.ACTION_ARCHIVE: Publication.STATUS_ARCHIVED,
+}
+
+
+def create_job(action, queryset, user=None):
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    return AdminBulkJob.objects.create(
+        action=action,
+        object_ids=ids,
+        total=len(ids),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def _apply(action, ids):
+    publications = Publication.objects.select_for_update().filter(pk__in=ids).order_by("pk")
+
+    if action == AdminBulkJob.ACTION_DELETE:
+        for publication in publications:
+            publication.delete()
+        return
+
+    status = _TARGET_STATUS[action]
+    for publication in publications.exclude(status=status):
+        publication.status = status
+        publication.save(update_fields=["status", "is_published", "updated_at"])
+
+
+def process_chunk(chunk_size=CHUNK_SIZE):
+    """
+    Applique le lot suivant de la plus ancienne tâche en cours.
+    Retourne la tâche traitée, None s'il n'y a rien à faire.
+    """
+    with atomic_immediate():
+        job = (
+            AdminBulkJob.objects.select_for_update(skip_locked=True)
+            .filter(status__in=[AdminBulkJob.STATUS_PENDING, AdminBulkJob.STATUS_RUNNING])
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        start = bisect_right(job.object_ids, job.cursor)
+        chunk = job.object_ids[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                _apply(job.action, chunk)
+        except Exception as exc:
+            job.status = AdminBulkJob.STATUS_FAILED
+            job.error = f"{type(exc).__name__}: {exc}"
+            job.save(update_fields=["status", "error", "updated_at"])
+            return job
+
+        if chunk:
+            job.cursor = chunk[-1]
+            job.processed = start + len(chunk)
+        job.status = AdminBulkJob.STATUS_RUNNING
+        if start + len(chunk) >= job.total:
+            job.status = AdminBulkJob.STATUS_DONE
+            job.finished_at = timezone.now()
+        job.error = ""
+        # Pas de réécriture de object_ids (potentiellement des milliers d'ids)
+        job.save(update_fields=["cursor", "processed", "status", "finished_at", "error", "updated_at"])
+    return job
+
+
+def process_pending_jobs(chunk_size=CHUNK_SIZE, max_chunks=None):
+    """
+    Traite les tâches en attente. Retourne le nombre de lots appliqués.
+    """
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        if process_chunk(chunk_size=chunk_size) is None:
+            break
+        chunks += 1
+    return chunks
+
+
+def resume(queryset):
+    """
+    Relance des tâches en échec depuis leur curseur.
+    """
+    return queryset.filter(status=AdminBulkJob.STATUS_FAILED).update(
+        status=AdminBulkJob.STATUS_PENDING, error="", updated_at=timezone.now()
+    )
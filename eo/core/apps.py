@@ -4,3 +4,5 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from backend.sqlite_tuned import atomic_immediate
+
+from .feed_cache import bump_feed_versions
+from .models import (
+    ArchivedPublication,
+    ArchivedPublicationAttachment,
+    NotificationDigestItem,
+    Publication,
+    PublicationAttachment,
+    TimelineEntry,
+)
+
+
+# ---------------------------------------------------------------------------
+# Archivage froid des publications
+#
+# Les publications au statut "archived" non modifiées depuis
+# EO_ARCHIVE_AFTER_DAYS jours quittent la table chaude (et ses index) pour
+# ArchivedPublication, pièces jointes comprises, par lots transactionnels
+# (commande archive_publications). Mêmes ids, mêmes fichiers : la lecture
+# d'une publication archivée retombe sur la table froide
+# (PublicationViewSet.retrieve), restore_publications() la ramène.
+#
+# Un déplacement n'est pas une suppression : suppression brute sans
+# signaux (pas de tombstones de synchronisation), seules les versions du
+# cache du feed sont invalidées. Le schéma est le même sur SQLite et
+# PostgreSQL (pas de partitionnement natif).
+# ---------------------------------------------------------------------------
+
+ARCHIVE_AFTER_DAYS = getattr(settings, "EO_ARCHIVE_AFTER_DAYS", 180)
+
+_PUBLICATION_FIELDS = [f.attname for f in ArchivedPublication._meta.concrete_fields if f.name != "archived_at"]
+_ATTACHMENT_FIELDS = [f.attname for f in ArchivedPublicationAttachment._meta.concrete_fields]
+
+
+def _move(ids, source, target, source_attachments, target_attachments):
+    """
+    Copie publications + pièces jointes de source vers target, puis
+    supprime les originaux. Retourne (organisations touchées, pièces jointes).
+    """
+    publications = list(source.objects.filter(pk__in=ids).values(*_PUBLICATION_FIELDS))
+    attachments = list(source_attachments.objects.filter(publication_id__in=ids).values(*_ATTACHMENT_FIELDS))
+
+    target.objects.bulk_create([target(**row) for row in publications])
+    target_attachments.objects.bulk_create([target_attachments(**row) for row in attachments])
+
+    # Suppression brute : ni signaux ni collecte en cascade, les lignes qui
+    # référencent la publication partent d'abord (une publication archivée
+    # n'a plus d'entrée de timeline, sauf statut changé par update() ; un
+    # résumé en attente n'envoie que les publiées)
+    if source is Publication:
+        TimelineEntry.objects.filter(publication_id__in=ids).delete()
+        NotificationDigestItem.objects.filter(publication_id__in=ids).delete()
+    attachment_qs = source_attachments.objects.filter(publication_id__in=ids)
+    attachment_qs._raw_delete(attachment_qs.db)
+    publication_qs = source.objects.filter(pk__in=ids)
+    publication_qs._raw_delete(publication_qs.db)
+
+    return {row["organisation_id"] for row in publications}, attachments
+
+
+def archive_batch(days=ARCHIVE_AFTER_DAYS, chunk_size=500):
+    """
+    Déplace un lot de publications archivées vers la table froide.
+    Retourne le nombre de publications déplacées (0 : plus rien à faire).
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    with atomic_immediate():
+        ids = list(
+            Publication.objects.select_for_update()
+            .filter(status=Publication.STATUS_ARCHIVED, updated_at__lt=cutoff)
+            .order_by("updated_at")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0
+        organisation_ids, _ = _move(
+            ids, Publication, ArchivedPublication, PublicationAttachment, ArchivedPublicationAttachment
+        )
+        transaction.on_commit(lambda: bump_feed_versions(organisation_ids))
+    return len(ids)
+
+
+def restore_publications(ids):
+    """
+    Ramène des publications (et leurs pièces jointes) dans la table chaude.
+    Le statut reste "archived" ; updated_at est remis à maintenant
+    (synchronisation, et pas de réarchivage immédiat).
+    """
+    with atomic_immediate():
+        ids = list(ArchivedPublication.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        if not ids:
+            return 0
+        organisation_ids, attachments = _move(
+            ids, ArchivedPublication, Publication, ArchivedPublicationAttachment, PublicationAttachment
+        )
+        if attachments:
+            # created_at (auto_now_add) écrasé par bulk_create : valeurs d'origine
+            PublicationAttachment.objects.filter(pk__in=[row["id"] for row in attachments]).update(
+                created_at=Case(*[When(pk=row["id"], then=Value(row["created_at"])) for row in attachments])
+            )
+        transaction.on_commit(lambda: bump_feed_versions(organisation_ids))
+    return len(ids)
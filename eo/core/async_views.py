@@ -0,0 +1,223 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .models import Organisation, Publication, PublicationAttachment, Subscription
+from .permissions import get_organisation_ids
+from .serializers import (
+    OrganisationSerializer,
+    PublicationAttachmentSerializer,
+    PublicationListSerializer,
+)
+
+
+# ---------------------------------------------------------------------------
+# Lecture asynchrone (servie par backend/asgi.py)
+#
+# Versions async des endpoints de lecture les plus sollicités. Mêmes payloads
+# que les viewsets DRF ; les requêtes indépendantes d'une page (pièces
+# jointes, abonnements, count) partent en parallèle via asyncio.gather.
+#
+# L'ORM async de Django 4.2 exécute tout dans un seul thread partagé : pour
+# un vrai parallélisme, chaque requête passe par _query() (thread dédié,
+# donc sa propre connexion).
+# ---------------------------------------------------------------------------
+
+def _query(fn):
+    def run():
+        try:
+            return fn()
+        finally:
+            # Respecte CONN_MAX_AGE pour les connexions des threads d'exécution
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+def _authenticator():
+    return api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+
+
+async def _authenticate(request):
+    """
+    Authentification JWT (même classe que l'API DRF). Retourne None si absente
+    ou invalide. En mode stateless, un hit cache ne touche pas la base.
+    """
+    try:
+        result = await sync_to_async(_authenticator().authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        # Token invalide / expiré / droits changés : 401. Une panne (base,
+        # cache) remonte en 500 au lieu de passer pour un client non authentifié.
+        return None
+    return result[0] if result else None
+
+
+def _unauthorized():
+    return JsonResponse(
+        {"detail": "Informations d'authentification non fournies."}, status=401
+    )
+
+
+def _not_found():
+    return JsonResponse({"detail": "Pas trouvé."}, status=404)
+
+
+def _visible_publications(user):
+    qs = Publication.objects.filter(
+        organisation_id__in=get_organisation_ids(user)
+    ).select_related("organisation")
+    if not user.is_staff and not user.is_superuser:
+        qs = qs.filter(status=Publication.STATUS_PUBLISHED)
+    return qs
+
+
+def _set_subscription(organisation, subscription):
+    Organisation.subscription.related.set_cached_value(organisation, subscription)
+
+
+async def _paginated_publications(request, qs):
+    page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE", 20)
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    offset = (page - 1) * page_size
+
+    # count et page en parallèle
+    count, publications = await asyncio.gather(
+        _query(qs.count),
+        _query(lambda: list(qs[offset:offset + page_size])),
+    )
+    if page > 1 and not publications:
+        return None
+
+    ids = [p.id for p in publications]
+    org_ids = {p.organisation_id for p in publications}
+
+    # pièces jointes (nombre) et abonnements de la page en parallèle
+    counts, subscriptions = await asyncio.gather(
+        _query(lambda: dict(
+            PublicationAttachment.objects.filter(publication_id__in=ids)
+            .values("publication_id")
+            .annotate(n=Count("id"))
+            .values_list("publication_id", "n")
+        )),
+        _query(lambda: {
+            s.organisation_id: s
+            for s in Subscription.objects.filter(organisation_id__in=org_ids)
+        }),
+    )
+    for publication in publications:
+        publication.attachments_count = counts.get(publication.id, 0)
+        _set_subscription(publication.organisation, subscriptions.get(publication.organisation_id))
+
+    results = PublicationListSerializer(
+        publications, many=True, context={"request": request}
+    ).data
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, "page", page + 1) if offset + page_size < count else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, "page")
+    else:
+        previous_url = replace_query_param(url, "page", page - 1)
+
+    return {"count": count, "next": next_url, "previous": previous_url, "results": results}
+
+
+# -------------------------------------------------------
+# GET /api/async/publications/
+# -------------------------------------------------------
+async def publication_feed(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    qs = _visible_publications(user)
+    for param in ("organisation__slug", "type", "status"):
+        value = request.GET.get(param)
+        if value:
+            qs = qs.filter(**{param: value})
+
+    data = await _paginated_publications(request, qs.order_by("-date_publication"))
+    if data is None:
+        return _not_found()
+    return JsonResponse(data)
+
+
+# -------------------------------------------------------
+# GET /api/async/publications/upcoming/
+# -------------------------------------------------------
+async def publication_upcoming(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    qs = _visible_publications(user).filter(
+        status=Publication.STATUS_PUBLISHED,
+        type=Publication.TYPE_EVENEMENT,
+        event_start__gte=timezone.now(),
+    ).order_by("event_start")
+
+    data = await _paginated_publications(request, qs)
+    if data is None:
+        return _not_found()
+    return JsonResponse(data)
+
+
+# -------------------------------------------------------
+# GET /api/async/publications/<pk>/attachments/
+# -------------------------------------------------------
+async def publication_attachments(request, pk):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    # droit d'accès à la publication et liste des PJ en parallèle
+    visible, attachments = await asyncio.gather(
+        _query(_visible_publications(user).filter(pk=pk).exists),
+        _query(lambda: list(
+            PublicationAttachment.objects.filter(publication_id=pk).order_by("-created_at")
+        )),
+    )
+    if not visible:
+        return _not_found()
+
+    data = PublicationAttachmentSerializer(
+        attachments, many=True, context={"request": request}
+    ).data
+    return JsonResponse(data, safe=False)
+
+
+# -------------------------------------------------------
+# GET /api/async/organisations/<slug>/
+# -------------------------------------------------------
+async def organisation_detail(request, slug):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    organisation, subscription = await asyncio.gather(
+        _query(
+            Organisation.objects.filter(
+                id__in=get_organisation_ids(user), slug=slug
+            ).first
+        ),
+        _query(Subscription.objects.filter(organisation__slug=slug).first),
+    )
+    if organisation is None:
+        return _not_found()
+
+    _set_subscription(organisation, subscription)
+    data = OrganisationSerializer(organisation, context={"request": request}).data
+    return JsonResponse(data)
@@ -0,0 +1,293 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.sqlite_tuned import atomic_immediate
+
+from .entitlements import invalidate_entitlement
+from .feed_cache import bump_feed_versions
+from .models import BillingEvent, Subscription
+
+
+# ---------------------------------------------------------------------------
+# Webhooks de facturation
+#
+# 1) le webhook vérifie la signature et insère l'événement brut (dédup event_id)
+# 2) process_pending_events() applique les événements aux Subscription,
+#    dans l'ordre du prestataire, par lots (commande process_billing_events)
+# 3) un événement antérieur au dernier appliqué à l'abonnement
+#    (Subscription.billing_event_at) est marqué traité sans être appliqué :
+#    un webhook rejoué ou livré en retard n'écrase pas un état plus récent
+#
+# Format de signature compatible Stripe :
+#   Stripe-Signature: t=<timestamp>,v1=<hmac_sha256(secret, "<t>.<body>")>
+# ---------------------------------------------------------------------------
+
+SIGNATURE_HEADER = "HTTP_STRIPE_SIGNATURE"
+SIGNATURE_TOLERANCE = getattr(settings, "EO_BILLING_SIGNATURE_TOLERANCE", 300)
+
+# Statuts du prestataire -> Subscription.Status (les autres sont ignorés)
+PROVIDER_STATUS_MAP = {
+    "trialing": Subscription.Status.TRIALING,
+    "active": Subscription.Status.ACTIVE,
+    "past_due": Subscription.Status.ACTIVE,
+    "canceled": Subscription.Status.CANCELED,
+    "unpaid": Subscription.Status.CANCELED,
+    "incomplete_expired": Subscription.Status.CANCELED,
+}
+
+SUBSCRIPTION_EVENT_TYPES = (
+    "customer.subscription.created",
+    "customer.subscription.updated",
+    "customer.subscription.deleted",
+)
+
+
+class InvalidSignature(Exception):
+    pass
+
+
+def _webhook_secret():
+    return getattr(settings, "EO_BILLING_WEBHOOK_SECRET", "")
+
+
+def compute_signature(secret, timestamp, body):
+    signed = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, header, secret=None, now=None):
+    secret = secret if secret is not None else _webhook_secret()
+    if not secret:
+        raise InvalidSignature("Secret de webhook non configuré.")
+
+    parts = {}
+    for item in (header or "").split(","):
+        key, _, value = item.strip().partition("=")
+        parts.setdefault(key, []).append(value)
+
+    try:
+        timestamp = int(parts["t"][0])
+    except (KeyError, ValueError):
+        raise InvalidSignature("Timestamp manquant.")
+
+    now = now if now is not None else time.time()
+    if abs(now - timestamp) > SIGNATURE_TOLERANCE:
+        raise InvalidSignature("Timestamp hors tolérance.")
+
+    expected = compute_signature(secret, timestamp, body)
+    if not any(hmac.compare_digest(expected, sig) for sig in parts.get("v1", [])):
+        raise InvalidSignature("Signature invalide.")
+
+
+def record_event(body):
+    """
+    Insère l'événement brut. Retourne True si nouveau, False si doublon.
+    Aucune logique métier ici : le webhook doit répondre vite.
+    """
+    event = json.loads(body)
+    created = datetime.fromtimestamp(int(event["created"]), tz=dt_timezone.utc)
+
+    try:
+        with transaction.atomic():
+            BillingEvent.objects.create(
+                event_id=event["id"],
+                type=event["type"],
+                payload=event,
+                provider_created=created,
+            )
+    except IntegrityError:
+        # Déjà reçu (le prestataire rejoue les webhooks) : idempotent
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Traitement par lots
+# ---------------------------------------------------------------------------
+
+def _to_datetime(value):
+    if value in (None, ""):
+        return None
+    return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+
+
+def _find_subscription(obj, by_sub_id, by_customer, by_org):
+    metadata = obj.get("metadata") or {}
+    return (
+        by_sub_id.get(obj.get("id"))
+        or by_customer.get(obj.get("customer"))
+        or by_org.get(str(metadata.get("organisation_id", "")))
+    )
+
+
+def _apply_event(event, subscription):
+    obj = event.payload["data"]["object"]
+
+    subscription.stripe_subscription_id = obj.get("id") or subscription.stripe_subscription_id
+    subscription.stripe_customer_id = obj.get("customer") or subscription.stripe_customer_id
+
+    if event.type == "customer.subscription.deleted":
+        subscription.status = Subscription.Status.CANCELED
+    else:
+        status = PROVIDER_STATUS_MAP.get(obj.get("status"))
+        if status:
+            subscription.status = status
+
+    if "current_period_end" in obj:
+        subscription.current_period_end = _to_datetime(obj["current_period_end"])
+    if "trial_end" in obj:
+        subscription.trial_end = _to_datetime(obj["trial_end"])
+
+
+def process_batch(batch_size=500):
+    """
+    Applique un lot d'événements en attente (ordre provider_created, id).
+    Retourne le nombre d'événements traités (0 = plus rien à faire).
+    """
+    with atomic_immediate():
+        events = list(
+            BillingEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by("provider_created", "id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        objects = [
+            e.payload.get("data", {}).get("object", {})
+            for e in events
+            if e.type in SUBSCRIPTION_EVENT_TYPES
+        ]
+        sub_ids = {o.get("id") for o in objects if o.get("id")}
+        customers = {o.get("customer") for o in objects if o.get("customer")}
+        org_ids = {
+            str((o.get("metadata") or {}).get("organisation_id"))
+            for o in objects
+            if (o.get("metadata") or {}).get("organisation_id")
+        }
+
+        # Une seule requête pour toutes les Subscription concernées par le lot
+        subscriptions = list(
+            Subscription.objects.filter(
+                Q(stripe_subscription_id__in=sub_ids)
+                | Q(stripe_customer_id__in=customers)
+                | Q(organisation_id__in=[i for i in org_ids if i.isdigit()])
+            )
+        )
+        by_sub_id = {s.stripe_subscription_id: s for s in subscriptions if s.stripe_subscription_id}
+        by_customer = {s.stripe_customer_id: s for s in subscriptions if s.stripe_customer_id}
+        by_org = {str(s.organisation_id): s for s in subscriptions}
+
+        now = timezone.now()
+        touched = {}
+        for event in events:
+            event.processed_at = now
+            if event.type not in SUBSCRIPTION_EVENT_TYPES:
+                continue
+
+            obj = event.payload.get("data", {}).get("object", {})
+            subscription = _find_subscription(obj, by_sub_id, by_customer, by_org)
+            if subscription is None:
+                event.error = "Abonnement introuvable."
+                continue
+            if subscription.billing_event_at and event.provider_created < subscription.billing_event_at:
+                event.error = "Événement périmé (état plus récent déjà appliqué)."
+                continue
+
+            _apply_event(event, subscription)
+            subscription.billing_event_at = event.provider_created
+            by_sub_id[subscription.stripe_subscription_id] = subscription
+            by_customer[subscription.stripe_customer_id] = subscription
+            touched[subscription.pk] = subscription
+
+        if touched:
+            for subscription in touched.values():
+                subscription.updated_at = now
+            Subscription.objects.bulk_update(
+                touched.values(),
+                [
+                    "status",
+                    "trial_end",
+                    "current_period_end",
+                    "stripe_customer_id",
+                    "stripe_subscription_id",
+                    "billing_event_at",
+                    "updated_at",
+                ],
+            )
+        BillingEvent.objects.bulk_update(events, ["processed_at", "error"])
+
+        # bulk_update ne déclenche pas post_save : invalidation explicite
+        organisation_ids = [s.organisation_id for s in touched.values()]
+
+        def invalidate():
+            for org_id in organisation_ids:
+                invalidate_entitlement(org_id)
+            bump_feed_versions(organisation_ids)
+
+        transaction.on_commit(invalidate)
+
+    return len(events)
+
+
+def process_pending_events(batch_size=500, max_batches=None):
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = process_batch(batch_size=batch_size)
+        if not count:
+            break
+        total += count
+        batches += 1
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Stand-in local du prestataire (tests de charge hors-ligne)
+# ---------------------------------------------------------------------------
+
+class FakePaymentProvider:
+    """
+    Génère des événements customer.subscription.* signés comme le ferait
+    Stripe, pour rejouer tout le flux webhook -> traitement sans réseau.
+    """
+
+    def __init__(self, secret=None):
+        self.secret = secret if secret is not None else _webhook_secret()
+        self._clock = int(time.time())
+
+    def subscription_event(self, organisation_id, status="active", event_type=None,
+                           period_days=30, customer=None, subscription_id=None):
+        self._clock += 1
+        obj = {
+            "id": subscription_id or f"sub_{organisation_id}",
+            "object": "subscription",
+            "customer": customer or f"cus_{organisation_id}",
+            "status": status,
+            "current_period_end": self._clock + period_days * 86400,
+            "trial_end": None,
+            "metadata": {"organisation_id": str(organisation_id)},
+        }
+        return {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "object": "event",
+            "type": event_type or "customer.subscription.updated",
+            "created": self._clock,
+            "data": {"object": obj},
+        }
+
+    def sign(self, event, timestamp=None):
+        body = json.dumps(event, separators=(",", ":")).encode()
+        timestamp = timestamp or int(time.time())
+        signature = compute_signature(self.secret, timestamp, body)
+        return body, f"t={timestamp},v1={signature}"
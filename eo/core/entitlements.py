@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+
+from .models import Subscription
+
+
+# ---------------------------------------------------------------------------
+# Droits liés à l'abonnement (entitlements)
+#
+# Organisation -> statut d'abonnement + limites, résolus depuis le cache.
+# Un hit de cache ne coûte aucune requête SQL ; l'entrée est invalidée par
+# signal à chaque save/delete de Subscription (cf. core/signals.py) et expire
+# de toute façon après EO_ENTITLEMENT_CACHE_TTL secondes (les autres workers
+# ne reçoivent pas le signal, et queryset.update() ne le déclenche pas).
+# ---------------------------------------------------------------------------
+
+ENTITLEMENT_CACHE_TTL = getattr(settings, "EO_ENTITLEMENT_CACHE_TTL", 300)
+
+DEFAULT_SUBSCRIPTION_LIMITS = {
+    Subscription.Status.TRIALING: {"max_attachment_size": 10 * 1024 * 1024},
+    Subscription.Status.ACTIVE: {"max_attachment_size": 10 * 1024 * 1024},
+    Subscription.Status.CANCELED: {"max_attachment_size": 0},
+}
+
+
+def _cache_key(organisation_id):
+    return f"eo:entitlement:{organisation_id}"
+
+
+def _limits_for(status):
+    limits = getattr(settings, "EO_SUBSCRIPTION_LIMITS", DEFAULT_SUBSCRIPTION_LIMITS)
+    return dict(limits.get(status, {}))
+
+
+def get_entitlement(organisation_id):
+    """
+    Retourne {"status", "trial_end", "current_period_end", "limits"} pour
+    l'organisation (status=None si aucun abonnement). Mis en cache, y compris
+    l'absence d'abonnement.
+    """
+    key = _cache_key(organisation_id)
+    entitlement = cache.get(key)
+    if entitlement is not None:
+        return entitlement
+
+    row = (
+        Subscription.objects
+        .filter(organisation_id=organisation_id)
+        .values("status", "trial_end", "current_period_end")
+        .first()
+    )
+    if row is None:
+        row = {"status": None, "trial_end": None, "current_period_end": None}
+
+    entitlement = {**row, "limits": _limits_for(row["status"])}
+    cache.set(key, entitlement, ENTITLEMENT_CACHE_TTL)
+    return entitlement
+
+
+def invalidate_entitlement(organisation_id):
+    cache.delete(_cache_key(organisation_id))
+
+
+def is_entitled(entitlement, now=None):
+    """
+    Actif ou en période d'essai (et non expiré).
+    """
+    now = now or timezone.now()
+    status = entitlement["status"]
+
+    if status == Subscription.Status.ACTIVE:
+        end = entitlement["current_period_end"]
+        return end is None or end > now
+
+    if status == Subscription.Status.TRIALING:
+        end = entitlement["trial_end"]
+        return end is None or end > now
+
+    return False
+
+
+def check_entitlement(request, organisation_id):
+    """
+    Lève PermissionDenied si l'organisation n'a pas d'abonnement actif/essai.
+    Staff/superuser : toujours autorisé. Retourne l'entitlement (ou None).
+    """
+    user = request.user
+    if user.is_staff or user.is_superuser:
+        return None
+
+    entitlement = get_entitlement(organisation_id)
+    if not is_entitled(entitlement):
+        raise PermissionDenied(
+            "L'abonnement de cette organisation n'est pas actif."
+        )
+    return entitlement
+
+
+class HasActiveSubscription(BasePermission):
+    """
+    Écriture autorisée seulement si l'organisation de l'objet a un abonnement
+    actif ou en essai. Les créations (pas encore d'objet) passent par
+    check_entitlement() dans perform_create.
+    """
+
+    message = "L'abonnement de cette organisation n'est pas actif."
+
+    def has_permission(self, request, view):
+        return True
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+
+        organisation_id = getattr(obj, "organisation_id", None)
+        if organisation_id is None and hasattr(obj, "publication"):
+            organisation_id = obj.publication.organisation_id
+        if organisation_id is None:
+            return False
+
+        check_entitlement(request, organisation_id)
+        return True
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+try:
+    import psycopg
+except ImportError:  # optionnel : backend "postgres"
+    psycopg = None
+
+from .models import PublicationEvent
+
+
+# ---------------------------------------------------------------------------
+# Événements de publication (flux SSE, core/sse.py)
+#
+# Chaque changement visible par les membres (publiée, modifiée, retirée)
+# est journalisé (PublicationEvent, dans la transaction) puis diffusé au
+# commit par le broker du processus, qui le remet aux abonnements SSE des
+# organisations concernées.
+#
+# EO_EVENTS_BACKEND :
+# - "local" : diffusion dans le processus (un seul worker ASGI) ;
+# - "socket" : un socket Unix datagramme par processus abonné dans
+#   EO_EVENTS_SOCKET_DIR, l'émetteur écrit dans chacun (plusieurs workers
+#   sur une machine, sans Postgres) ;
+# - "postgres" : NOTIFY / LISTEN (psycopg), plusieurs workers et machines.
+#
+# Un abonnement = une asyncio.Queue bornée, sans thread ni connexion base :
+# un worker tient des milliers de connexions inactives. Une file pleine
+# (client trop lent) ou un datagramme perdu se rattrape par Last-Event-ID.
+# ---------------------------------------------------------------------------
+
+EVENTS_BACKEND = getattr(settings, "EO_EVENTS_BACKEND", "local")
+EVENTS_SOCKET_DIR = Path(getattr(settings, "EO_EVENTS_SOCKET_DIR", "/tmp/eo-events"))
+EVENTS_BACKLOG = getattr(settings, "EO_EVENTS_BACKLOG", 500)
+EVENTS_RETENTION_HOURS = getattr(settings, "EO_EVENTS_RETENTION_HOURS", 24)
+QUEUE_SIZE = 100
+PG_CHANNEL = "eo_publication_events"
+
+
+class Subscription:
+    """
+    File d'un client SSE, liée à la boucle asyncio de sa requête.
+    """
+
+    def __init__(self, organisation_ids):
+        self.organisation_ids = frozenset(organisation_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflow = False
+
+    def _offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflow = True
+
+    def deliver(self, event):
+        # Appelé depuis n'importe quel thread
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            pass  # boucle fermée
+
+
+class LocalBroker:
+    """
+    Diffusion dans le processus courant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, organisation_ids):
+        self.start()
+        subscription = Subscription(organisation_ids)
+        with self._lock:
+            for organisation_id in subscription.organisation_ids:
+                self._subscribers.setdefault(organisation_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for organisation_id in subscription.organisation_ids:
+                subscribers = self._subscribers.get(organisation_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[organisation_id]
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["organisation"], ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def publish(self, event):
+        self.dispatch(event)
+
+    def start(self):
+        pass
+
+
+class SocketBroker(LocalBroker):
+    """
+    Sockets Unix datagramme : un par processus abonné, écrit par chaque émetteur.
+    """
+
+    def __init__(self, directory=EVENTS_SOCKET_DIR):
+        super().__init__()
+        self.directory = Path(directory)
+        self._socket = None
+
+    def start(self):
+        with self._lock:
+            if self._socket is not None:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{os.getpid()}-{id(self)}.sock"
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(str(path))
+            self._socket = sock
+        threading.Thread(target=self._listen, args=(sock,), name="eo-events-socket", daemon=True).start()
+
+    def _listen(self, sock):
+        while True:
+            data = sock.recv(65536)
+            try:
+                self.dispatch(json.loads(data))
+            except (ValueError, KeyError):
+                pass
+
+    def publish(self, event):
+        data = json.dumps(event).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for path in self.directory.glob("*.sock"):
+                try:
+                    sender.sendto(data, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Processus disparu
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    pass  # tampon plein : rattrapé par Last-Event-ID
+
+
+class PostgresBroker(LocalBroker):
+    """
+    NOTIFY à l'émission, un thread LISTEN par processus abonné.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            if psycopg is None:
+                raise ImproperlyConfigured("EO_EVENTS_BACKEND=postgres requiert psycopg (requirements.txt).")
+            self._started = True
+        params = connection.get_connection_params()
+        threading.Thread(target=self._listen, args=(params,), name="eo-events-listen", daemon=True).start()
+
+    def _listen(self, params):
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {PG_CHANNEL}")
+                    for notify in conn.notifies():
+                        self.dispatch(json.loads(notify.payload))
+            except psycopg.Error:
+                # Connexion perdue : les clients rattrapent par Last-Event-ID
+                time.sleep(1)
+
+    def publish(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [PG_CHANNEL, json.dumps(event)])
+
+
+BACKENDS = {
+    "local": LocalBroker,
+    "socket": SocketBroker,
+    "postgres": PostgresBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            if EVENTS_BACKEND not in BACKENDS:
+                raise ImproperlyConfigured(f"EO_EVENTS_BACKEND inconnu : {EVENTS_BACKEND}")
+            _broker = BACKENDS[EVENTS_BACKEND]()
+    return _broker
+
+
+# -------------------------------------------------------
+# Journal
+# -------------------------------------------------------
+def record(event_type, publication):
+    """
+    Journalise un événement et le diffuse au commit (core/signals.py).
+    """
+    event = PublicationEvent.objects.create(
+        type=event_type,
+        organisation_id=publication.organisation_id,
+        publication_id=publication.pk,
+    ).as_event()
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def events_since(last_id, organisation_ids):
+    """
+    Événements après `last_id` -> (événements, reset). reset : id du
+    dernier événement si l'historique est incomplet (purgé, ou plus de
+    EVENTS_BACKLOG événements) : le client recharge le feed et reprend
+    depuis cet id. None sinon.
+    """
+    oldest = PublicationEvent.objects.order_by("pk").values_list("pk", flat=True).first()
+    rows = []
+    if oldest is None or last_id >= oldest - 1:
+        rows = list(
+            PublicationEvent.objects.filter(pk__gt=last_id, organisation_id__in=organisation_ids)
+            .order_by("pk")[:EVENTS_BACKLOG + 1]
+        )
+        if len(rows) <= EVENTS_BACKLOG:
+            return [row.as_event() for row in rows], None
+    return [], PublicationEvent.objects.order_by("-pk").values_list("pk", flat=True).first()
+
+
+def prune_events(hours=EVENTS_RETENTION_HOURS):
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = PublicationEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,74 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from backend.compression import ENCODINGS, compress
+
+
+# ---------------------------------------------------------------------------
+# Cache du feed (GET /api/publications/, /upcoming/)
+#
+# Clé = hôte + URL complète + staff + {organisation: version} des
+# organisations du lecteur : deux membres des mêmes organisations partagent
+# l'entrée. La version d'une organisation est régénérée à chaque
+# save/delete de Publication, pièce jointe, Subscription ou Organisation
+# (cf. core/signals.py) ; queryset.update() et les autres workers (cache
+# local) ne la voient pas, EO_FEED_CACHE_TTL borne ce retard.
+#
+# L'entrée contient le JSON et ses variantes compressées (gzip, br, zstd
+# si disponibles), calculées une fois au stockage : un hit ne fait ni
+# requête ni compression (response.precompressed, cf. backend/compression.py).
+# ---------------------------------------------------------------------------
+
+FEED_CACHE_TTL = getattr(settings, "EO_FEED_CACHE_TTL", 30)
+
+
+def _version_key(organisation_id):
+    return f"eo:feed_version:{organisation_id}"
+
+
+def bump_feed_versions(organisation_ids):
+    cache.delete_many([_version_key(org_id) for org_id in organisation_ids])
+
+
+def feed_cache_key(request, organisation_ids):
+    keys = {_version_key(org_id): org_id for org_id in sorted(set(organisation_ids))}
+    versions = cache.get_many(list(keys))
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        # Survit aux entrées : une version expirée ne fait qu'un miss de plus
+        cache.set_many(missing, FEED_CACHE_TTL * 10)
+        versions.update(missing)
+
+    user = request.user
+    raw = "|".join([
+        request.get_host(),
+        request.get_full_path(),
+        "staff" if user.is_staff or user.is_superuser else "member",
+        ",".join(f"{org_id}:{versions[key]}" for key, org_id in keys.items()),
+    ])
+    return "eo:feed:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_cached_response(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    response = HttpResponse(entry["identity"], content_type=entry["content_type"])
+    response.precompressed = entry
+    return response
+
+
+def store_response(key, response):
+    """
+    Stocke une réponse rendue (200) avec ses variantes compressées.
+    """
+    content_type = response["Content-Type"]
+    entry = {"identity": response.content, "content_type": content_type}
+    for encoding in ENCODINGS:
+        entry[encoding] = compress(response.content, encoding, content_type)
+    cache.set(key, entry, FEED_CACHE_TTL)
+    response.precompressed = entry
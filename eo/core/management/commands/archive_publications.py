@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.archive import ARCHIVE_AFTER_DAYS, archive_batch, restore_publications
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les publications archivées depuis longtemps vers la table froide "
+        "(par lots), ou les restaure (--restore)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archivées et inchangées depuis N jours")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Publications par transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Pause (s) entre deux lots")
+        parser.add_argument("--restore", type=int, nargs="+", metavar="ID", help="Ids à ramener dans la table chaude")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            count = restore_publications(options["restore"])
+            self.stdout.write(self.style.SUCCESS(f"✔ {count} publication(s) restaurée(s)"))
+            return
+
+        total = 0
+        while True:
+            count = archive_batch(days=options["days"], chunk_size=options["chunk_size"])
+            if not count:
+                break
+            total += count
+            self.stdout.write(f"  {total} publication(s) déplacée(s)")
+            time.sleep(options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"✔ {total} publication(s) archivée(s) en table froide"))
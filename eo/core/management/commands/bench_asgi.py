@@ -0,0 +1,162 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Membership
+from core.utils import percentile
+from users.claims import add_membership_claims
+
+
+def _split(url):
+    path, _, query = url.partition("?")
+    return path, query
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare req/s et latences (p50/p99) d'un endpoint de lecture sous "
+        "WSGI (pool de threads) et sous ASGI (sync via pont, puis vue async), "
+        "en process, à forte concurrence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--email", help="Utilisateur authentifié (défaut : premier membre)")
+        parser.add_argument("--sync-url", default="/api/publications/")
+        parser.add_argument("--async-url", default="/api/async/publications/")
+
+    def handle(self, *args, **options):
+        membership = Membership.objects.select_related("user")
+        if options["email"]:
+            membership = membership.filter(user__email=options["email"].lower())
+        membership = membership.first()
+        if membership is None:
+            raise CommandError("Aucun membre : lancer seed d'abord.")
+
+        user = membership.user
+        self.token = str(add_membership_claims(RefreshToken.for_user(user).access_token, user))
+        connections.close_all()
+
+        total = options["requests"]
+        concurrency = options["concurrency"]
+        scenarios = [
+            ("WSGI  sync ", self._bench_wsgi, options["sync_url"]),
+            ("ASGI  sync ", self._bench_asgi, options["sync_url"]),
+            ("ASGI  async", self._bench_asgi, options["async_url"]),
+        ]
+
+        self.stdout.write(f"{total} requêtes, concurrence {concurrency}, user {user.email}")
+        for label, runner, url in scenarios:
+            # échauffement (imports, caches)
+            runner(url, min(concurrency, 20), concurrency)
+            elapsed, latencies, errors = runner(url, total, concurrency)
+            self.stdout.write(
+                f"{label} {url:<32} {total / elapsed:8.1f} req/s   "
+                f"p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+                f"p99 {percentile(latencies, 99) * 1000:7.1f} ms   "
+                f"moy {statistics.mean(latencies) * 1000:7.1f} ms   "
+                f"erreurs {errors}"
+            )
+
+    # -----------------------------------------------------------------
+    # WSGI : un thread par requête concurrente (gunicorn --threads)
+    # -----------------------------------------------------------------
+    def _bench_wsgi(self, url, total, concurrency):
+        handler = WSGIHandler()
+        path, query = _split(url)
+
+        def one(_):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": f"Bearer {self.token}",
+                "wsgi.input": io.BytesIO(b""),
+                "wsgi.errors": sys.stderr,
+                "wsgi.url_scheme": "http",
+                "wsgi.multithread": True,
+                "wsgi.multiprocess": False,
+                "wsgi.run_once": False,
+                "wsgi.version": (1, 0),
+            }
+            status = []
+            start = time.perf_counter()
+            response = handler(environ, lambda s, h, exc_info=None: status.append(s))
+            b"".join(response)
+            response.close()
+            return time.perf_counter() - start, not status[0].startswith("200")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - start
+        return elapsed, [r[0] for r in results], sum(r[1] for r in results)
+
+    # -----------------------------------------------------------------
+    # ASGI : une boucle, N tâches concurrentes
+    # -----------------------------------------------------------------
+    def _bench_asgi(self, url, total, concurrency):
+        handler = ASGIHandler()
+        path, query = _split(url)
+        token = self.token
+
+        async def one(semaphore):
+            async with semaphore:
+                scope = {
+                    "type": "http",
+                    "asgi": {"version": "3.0"},
+                    "http_version": "1.1",
+                    "method": "GET",
+                    "scheme": "http",
+                    "path": path,
+                    "raw_path": path.encode(),
+                    "query_string": query.encode(),
+                    "headers": [
+                        (b"host", b"localhost"),
+                        (b"authorization", f"Bearer {token}".encode()),
+                    ],
+                    "server": ("localhost", 80),
+                    "client": ("127.0.0.1", 50000),
+                }
+                sent = {"request": False}
+                disconnected = asyncio.Event()
+                status = []
+
+                async def receive():
+                    if not sent["request"]:
+                        sent["request"] = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    await disconnected.wait()
+                    return {"type": "http.disconnect"}
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        status.append(message["status"])
+
+                start = time.perf_counter()
+                await handler(scope, receive, send)
+                disconnected.set()
+                return time.perf_counter() - start, status[0] != 200
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one(semaphore) for _ in range(total)))
+            return time.perf_counter() - start, results
+
+        elapsed, results = asyncio.run(run())
+        return elapsed, [r[0] for r in results], sum(r[1] for r in results)
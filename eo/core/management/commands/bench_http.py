@@ -0,0 +1,449 @@
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils import percentile
+
+from .seed import WORDS
+
+
+# ---------------------------------------------------------------------------
+# Benchmark HTTP de bout en bout
+#
+# 1) génère un jeu de données (migrate + seed --scale) dans une base dédiée
+# 2) démarre l'API dans un processus séparé (runserver, sans reload)
+# 3) des utilisateurs virtuels (un thread et une connexion keep-alive
+#    chacun, connectés comme owner de leur organisation) jouent chaque
+#    scénario pendant --duration secondes
+# 4) débit + p50/p95/p99 ; --save écrit une baseline JSON, --compare la
+#    compare et échoue au-delà de --threshold
+# ---------------------------------------------------------------------------
+
+PREFIX = "bench"
+PASSWORD = "seed-password"
+MANAGE = Path(settings.BASE_DIR) / "manage.py"
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class VirtualUser:
+    """
+    Un client HTTP keep-alive, authentifié comme owner de l'organisation
+    `index` du jeu de données.
+    """
+
+    def __init__(self, port, index, scale, seed):
+        self.port = port
+        self.index = index
+        self.scale = scale
+        self.rng = random.Random(f"{seed}:{index}")
+        self.connection = None
+        self.token = None
+        self.refresh = None
+        self.email = f"{PREFIX}-{index}-0@example.com"
+
+    def request(self, method, path, body=None, content_type="application/json", auth=True):
+        status, content = self._send(method, path, body, content_type, auth)
+        if status == 401 and auth and self.refresh:
+            # Token invalidé (invitation par un autre utilisateur virtuel :
+            # claims de membership changés) : refresh comme un vrai client
+            refreshed, data = self._send(
+                "POST", "/api/users/refresh/", {"refresh": self.refresh}, "application/json", False
+            )
+            if refreshed == 200:
+                data = json.loads(data)
+                self.token = data["access"]
+                self.refresh = data.get("refresh", self.refresh)
+                status, content = self._send(method, path, body, content_type, auth)
+        return status, content
+
+    def _send(self, method, path, body, content_type, auth):
+        headers = {"Host": "localhost"}
+        if auth and self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            headers["Content-Type"] = content_type
+
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # Connexion keep-alive fermée par le serveur : une reconnexion
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+    def setup(self):
+        status, body = self.request(
+            "POST", "/api/users/login/", {"email": self.email, "password": PASSWORD}, auth=False
+        )
+        if status != 200:
+            return False
+        tokens = json.loads(body)
+        self.token, self.refresh = tokens["access"], tokens["refresh"]
+
+        status, body = self.request("GET", f"/api/organisations/{PREFIX}-{self.index}/")
+        organisation = json.loads(body)
+        if (organisation.get("subscription") or {}).get("status") == "canceled":
+            return False
+
+        status, body = self.request("GET", f"/api/publications/?organisation__slug={PREFIX}-{self.index}")
+        self.publications = [p["id"] for p in json.loads(body)["results"]]
+        if not self.publications:
+            return False
+        self.organisation_id = organisation["id"]
+        self.feed_next = None
+
+        # Pièce jointe servie par le scénario download
+        status, body = self._upload()
+        if status != 201:
+            return False
+        self.download_path = "/" + json.loads(body)["file"].split("/", 3)[-1]
+        return True
+
+    def _upload(self):
+        body, content_type = _multipart(
+            {"display_name": "bench"},
+            {"file": ("bench.txt", self.rng.randbytes(self.rng.randint(1024, 16384)))},
+        )
+        publication = self.rng.choice(self.publications)
+        return self.request("POST", f"/api/publications/{publication}/attachments/", body, content_type)
+
+
+# -------------------------------------------------------
+# Scénarios : une requête par itération, retourne le statut
+# -------------------------------------------------------
+
+@scenario("feed")
+def feed(user):
+    # Défilement : suit "next" jusqu'au bout puis recommence
+    path = user.feed_next or "/api/publications/"
+    status, body = user.request("GET", path)
+    next_url = json.loads(body).get("next") if status == 200 else None
+    user.feed_next = "/" + next_url.split("/", 3)[-1] if next_url else None
+    return status
+
+
+@scenario("search")
+def search(user):
+    word = user.rng.choice(WORDS)
+    if user.rng.random() < 0.5:
+        return user.request("GET", f"/api/publications/?search={quote(word)}")[0]
+    return user.request("GET", f"/api/users/?q={PREFIX}-{user.rng.randrange(user.scale)}")[0]
+
+
+@scenario("upcoming")
+def upcoming(user):
+    return user.request("GET", "/api/publications/upcoming/")[0]
+
+
+@scenario("upload")
+def upload(user):
+    return user._upload()[0]
+
+
+@scenario("download")
+def download(user):
+    return user.request("GET", user.download_path, auth=False)[0]
+
+
+@scenario("login")
+def login(user):
+    return user.request(
+        "POST", "/api/users/login/", {"email": user.email, "password": PASSWORD}, auth=False
+    )[0]
+
+
+@scenario("invite")
+def invite(user):
+    # 10 membres (hors owners, donc hors utilisateurs virtuels) d'autres
+    # organisations : créés ou mis à jour, inconnus si l'organisation est petite
+    others = [(user.index + k) % user.scale for k in range(1, 6)]
+    return user.request("POST", "/api/memberships/bulk/", {
+        "organisation": user.organisation_id,
+        "invitations": [
+            {"email": f"{PREFIX}-{i}-{j}@example.com", "role": user.rng.choice(["member", "admin"])}
+            for i in others if i != user.index
+            for j in (1, 2)
+        ],
+    })[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark HTTP reproductible : jeu de données généré, API dans un "
+        "processus local, scénarios scriptés, baselines JSON et détection de régressions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Défaut : tous")
+        parser.add_argument("--scale", type=int, default=50, help="Organisations du jeu de données")
+        parser.add_argument("--db", help="Base du benchmark (défaut : fichier temporaire SQLite)")
+        parser.add_argument("--reuse-db", action="store_true", help="Ne pas régénérer le jeu de données")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10, help="Secondes mesurées par scénario")
+        parser.add_argument("--warmup", type=float, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--save", help="Écrit les résultats (baseline JSON)")
+        parser.add_argument("--compare", help="Baseline JSON de référence")
+        parser.add_argument("--threshold", type=float, default=0.10, help="Régression tolérée (0.10 = 10 %%)")
+
+    def handle(self, *args, **options):
+        names = options["scenario"] or list(SCENARIOS)
+        if options["concurrency"] > options["scale"]:
+            raise CommandError("--concurrency ne peut pas dépasser --scale (un owner par utilisateur virtuel).")
+
+        database = options["db"] or os.path.join(tempfile.gettempdir(), f"eo-bench-{options['scale']}.sqlite3")
+        media = tempfile.mkdtemp(prefix="eo-bench-media-")
+        env = {
+            **os.environ,
+            "EO_DB_NAME": database,
+            "EO_MEDIA_ROOT": media,
+            "EO_LOGIN_RATE_IP": "1000000/min",
+            "EO_LOGIN_RATE_EMAIL": "1000000/min",
+        }
+
+        try:
+            if not options["reuse_db"] or not os.path.exists(database):
+                self._generate(database, options, env)
+            with self._server(env) as port:
+                results = self._run(port, names, options)
+        finally:
+            shutil.rmtree(media, ignore_errors=True)
+
+        report = {"meta": self._meta(options), "scenarios": results}
+        if options["save"]:
+            Path(options["save"]).parent.mkdir(parents=True, exist_ok=True)
+            with open(options["save"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Baseline écrite : {options['save']}")
+        if options["compare"]:
+            self._compare(report, options["compare"], options["threshold"])
+
+    # -----------------------------------------------------------------
+    # Jeu de données et serveur
+    # -----------------------------------------------------------------
+    def _generate(self, database, options, env):
+        self.stdout.write(f"Jeu de données : {options['scale']} organisations -> {database}")
+        if env.get("EO_DB_ENGINE", "sqlite") == "sqlite":
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+            subprocess.run([sys.executable, MANAGE, "migrate", "-v0"], env=env, check=True)
+        else:
+            subprocess.run([sys.executable, MANAGE, "migrate", "-v0"], env=env, check=True)
+            subprocess.run([sys.executable, MANAGE, "flush", "--noinput", "-v0"], env=env, check=True)
+        subprocess.run(
+            [sys.executable, MANAGE, "seed", "--scale", str(options["scale"]),
+             "--prefix", PREFIX, "--seed", str(options["seed"])],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def _server(self, env):
+        command = self
+
+        class Server:
+            def __enter__(self):
+                with socket.socket() as s:
+                    s.bind(("127.0.0.1", 0))
+                    self.port = s.getsockname()[1]
+                self.process = subprocess.Popen(
+                    [sys.executable, MANAGE, "runserver", f"127.0.0.1:{self.port}", "--noreload"],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+                deadline = time.monotonic() + 60
+                while time.monotonic() < deadline:
+                    if self.process.poll() is not None:
+                        raise CommandError("Le serveur s'est arrêté au démarrage.")
+                    try:
+                        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+                        connection.request("GET", "/metrics", headers={"Host": "localhost"})
+                        connection.getresponse().read()
+                        connection.close()
+                        return self.port
+                    except OSError:
+                        time.sleep(0.2)
+                self.__exit__()
+                raise CommandError("Le serveur ne répond pas.")
+
+            def __exit__(self, *exc):
+                self.process.terminate()
+                try:
+                    self.process.wait(10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                command.stdout.write("Serveur arrêté")
+
+        return Server()
+
+    # -----------------------------------------------------------------
+    # Exécution
+    # -----------------------------------------------------------------
+    def _run(self, port, names, options):
+        # Un utilisateur virtuel par organisation utilisable (abonnement
+        # actif, publications), dans l'ordre des index : reproductible
+        users = []
+        for index in range(options["scale"]):
+            user = VirtualUser(port, index, options["scale"], options["seed"])
+            if user.setup():
+                users.append(user)
+            if len(users) == options["concurrency"]:
+                break
+        if len(users) < options["concurrency"]:
+            raise CommandError(f"{len(users)} utilisateurs virtuels seulement : augmenter --scale.")
+
+        self.stdout.write(
+            f"{len(users)} utilisateurs virtuels, {options['duration']:.0f}s par scénario\n"
+            f"{'scénario':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erreurs':>8}"
+        )
+        results = {}
+        for name in names:
+            self._drive(users, SCENARIOS[name], options["warmup"])
+            elapsed, latencies, errors = self._drive(users, SCENARIOS[name], options["duration"])
+            results[name] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+            r = results[name]
+            self.stdout.write(
+                f"{name:<10} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                f"{r['p99_ms']:>9.1f} {r['errors']:>8}"
+            )
+        for user in users:
+            if user.connection:
+                user.connection.close()
+        return results
+
+    def _drive(self, users, fn, duration):
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def loop(user):
+            local, failed = [], 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = fn(user)
+                except (http.client.HTTPException, OSError, ValueError):
+                    status = 0
+                local.append(time.perf_counter() - start)
+                failed += not 200 <= status < 300
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=loop, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, latencies, errors[0]
+
+    # -----------------------------------------------------------------
+    # Baselines
+    # -----------------------------------------------------------------
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "date": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit,
+            "scale": options["scale"],
+            "concurrency": options["concurrency"],
+            "duration": options["duration"],
+            "seed": options["seed"],
+            "db_engine": os.environ.get("EO_DB_ENGINE", "sqlite"),
+            "sqlite_profile": settings.EO_SQLITE_PROFILE,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "machine": f"{platform.machine()} {os.cpu_count()} CPU",
+        }
+
+    def _compare(self, report, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        for key in ("scale", "concurrency", "db_engine"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                self.stdout.write(self.style.WARNING(
+                    f"{key} différent de la baseline ({baseline['meta'].get(key)} vs {report['meta'][key]})"
+                ))
+
+        self.stdout.write(f"\nComparaison avec {path} (seuil {threshold:.0%})")
+        regressions = []
+        for name, current in report["scenarios"].items():
+            reference = baseline["scenarios"].get(name)
+            if not reference:
+                continue
+            rps = (current["rps"] - reference["rps"]) / reference["rps"] if reference["rps"] else 0
+            p95 = (current["p95_ms"] - reference["p95_ms"]) / reference["p95_ms"] if reference["p95_ms"] else 0
+            regressed = rps < -threshold or p95 > threshold
+            line = f"{name:<10} req/s {rps:+7.1%}   p95 {p95:+7.1%}"
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line + "   RÉGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"Régression sur : {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("Aucune régression"))
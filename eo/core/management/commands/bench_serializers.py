@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Membership, Publication, Subscription
+from core.renderers import ORJSONRenderer
+from core.serializers import MembershipSerializer, PublicationListSerializer, SubscriptionSerializer
+
+
+def _best(fn, repeat):
+    # Meilleur temps sur `repeat` passes (moins de bruit que la moyenne)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la sérialisation des listes : ModelSerializer + JSONRenderer "
+        "vs lecture rapide (.values()) + orjson, par taille de page"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, action="append", help="Défaut : 20, 100, 500")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_sizes = options["page_size"] or [20, 100, 500]
+        querysets = {
+            "publications": (
+                PublicationListSerializer,
+                Publication.objects.select_related("organisation", "organisation__subscription")
+                .annotate(attachments_count=Count("attachments"))
+                .order_by("-date_publication"),
+            ),
+            "memberships": (
+                MembershipSerializer,
+                Membership.objects.select_related("user", "organisation").order_by("-created_at"),
+            ),
+            "subscriptions": (SubscriptionSerializer, Subscription.objects.order_by("id")),
+        }
+        if Publication.objects.count() < max(page_sizes):
+            raise CommandError("Pas assez de publications : lancer seed --scale d'abord.")
+
+        self.stdout.write(
+            f"{'liste':<14} {'page':>5} {'DRF ms':>9} {'rapide ms':>10} {'x':>6}"
+            f" {'+requête DRF':>13} {'+requête rapide':>16} {'x':>6}  JSON"
+        )
+        for name, (serializer_class, queryset) in querysets.items():
+            for size in page_sizes:
+                instances = list(queryset[:size])
+                rows = list(serializer_class.fast_values(queryset)[:size])
+
+                # Sérialisation + rendu seuls (lignes déjà chargées)
+                drf, expected = _best(
+                    lambda: JSONRenderer().render(serializer_class(instances, many=True).data),
+                    options["repeat"],
+                )
+                fast, output = _best(
+                    lambda: ORJSONRenderer().render(serializer_class.fast_data(rows)),
+                    options["repeat"],
+                )
+                # Avec la requête (chargement des instances vs .values())
+                drf_total, _ = _best(
+                    lambda: JSONRenderer().render(serializer_class(list(queryset[:size]), many=True).data),
+                    options["repeat"],
+                )
+                fast_total, _ = _best(
+                    lambda: ORJSONRenderer().render(
+                        serializer_class.fast_data(serializer_class.fast_values(queryset)[:size])
+                    ),
+                    options["repeat"],
+                )
+
+                self.stdout.write(
+                    f"{name:<14} {len(instances):>5} {drf * 1000:>9.2f} {fast * 1000:>10.2f} {drf / fast:>6.1f}"
+                    f" {drf_total * 1000:>13.2f} {fast_total * 1000:>16.2f} {drf_total / fast_total:>6.1f}"
+                    f"  {'identique' if output == expected else 'DIFFÉRENT'}"
+                )
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.sqlite_tuned.base import tuned_pragmas
+from core.utils import percentile
+
+SCHEMA = """
+CREATE TABLE publication (
+    id INTEGER PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    titre TEXT NOT NULL,
+    contenu TEXT NOT NULL,
+    date_publication REAL NOT NULL
+);
+CREATE INDEX publication_org_date ON publication (organisation_id, date_publication);
+"""
+
+
+def _connect(path, profile):
+    # isolation_level=None : transactions explicites, comme Django
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if profile == "tuned":
+        for pragma in tuned_pragmas():
+            connection.execute(pragma)
+    return connection
+
+
+def _worker(args):
+    path, profile, role, duration, seed = args
+    rng = random.Random(seed)
+    connection = _connect(path, profile)
+    begin = "BEGIN IMMEDIATE" if profile == "tuned" else "BEGIN"
+    ops = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == "reader":
+                connection.execute(
+                    "SELECT id, titre, substr(contenu, 1, 120) FROM publication "
+                    "WHERE organisation_id = ? ORDER BY date_publication DESC LIMIT 20",
+                    (rng.randrange(50),),
+                ).fetchall()
+            else:
+                # lecture puis écriture dans la même transaction (cas qui
+                # provoque les montées de verrou en mode rollback journal)
+                connection.execute(begin)
+                connection.execute("SELECT count(*) FROM publication WHERE organisation_id = ?", (rng.randrange(50),)).fetchone()
+                connection.execute(
+                    "INSERT INTO publication (organisation_id, titre, contenu, date_publication) VALUES (?, ?, ?, ?)",
+                    (rng.randrange(50), "bench", "x" * 500, time.time()),
+                )
+                connection.execute("COMMIT")
+            ops += 1
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    connection.close()
+    return role, ops, errors, latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark multi-processus SQLite : lecteurs + écrivains concurrents, "
+        "profil d'origine (rollback journal) vs profil tuned (WAL, BEGIN IMMEDIATE)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--duration", type=float, default=5.0)
+        parser.add_argument("--rows", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        for profile in ("default", "tuned"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self._prepare(path, profile, options["rows"])
+                self._run(path, profile, options)
+
+    def _prepare(self, path, profile, rows):
+        connection = _connect(path, profile)
+        connection.executescript(SCHEMA)
+        rng = random.Random(0)
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO publication (organisation_id, titre, contenu, date_publication) VALUES (?, ?, ?, ?)",
+            ((rng.randrange(50), f"titre {i}", "x" * 500, time.time() - i) for i in range(rows)),
+        )
+        connection.execute("COMMIT")
+        connection.close()
+
+    def _run(self, path, profile, options):
+        duration = options["duration"]
+        jobs = [(path, profile, "reader", duration, i) for i in range(options["readers"])]
+        jobs += [(path, profile, "writer", duration, 1000 + i) for i in range(options["writers"])]
+
+        with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+            results = pool.map(_worker, jobs)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Profil {profile}"))
+        for role in ("reader", "writer"):
+            ops = sum(r[1] for r in results if r[0] == role)
+            errors = sum(r[2] for r in results if r[0] == role)
+            p99 = percentile([l for r in results if r[0] == role for l in r[3]], 99) * 1000
+            self.stdout.write(
+                f"  {role:<7} {ops / duration:9.0f} op/s   p99 {p99:7.1f} ms   "
+                f"verrous refusés {errors}"
+            )
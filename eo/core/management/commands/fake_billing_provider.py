@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from core.billing import FakePaymentProvider, SIGNATURE_HEADER, process_pending_events
+from core.models import Organisation
+
+
+class Command(BaseCommand):
+    help = (
+        "Stand-in local du prestataire de paiement : envoie des webhooks signés "
+        "au endpoint, puis les traite, et mesure le débit des deux étapes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1000)
+        parser.add_argument("--duplicates", type=float, default=0.1, help="Part d'événements rejoués (0-1)")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--no-process", action="store_true", help="Envoie seulement, sans traiter")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        org_ids = list(Organisation.objects.values_list("id", flat=True))
+        if not org_ids:
+            raise CommandError("Aucune organisation : lancer seed d'abord.")
+
+        if not getattr(settings, "EO_BILLING_WEBHOOK_SECRET", ""):
+            raise CommandError("EO_BILLING_WEBHOOK_SECRET non défini : le webhook refuserait tout.")
+
+        rng = random.Random(options["seed"])
+        provider = FakePaymentProvider()
+        client = Client(HTTP_HOST="localhost")
+        url = reverse("billing-webhook")
+
+        sent = []
+        statuses = ["active", "active", "active", "trialing", "past_due", "canceled"]
+
+        start = time.perf_counter()
+        for _ in range(options["events"]):
+            if sent and rng.random() < options["duplicates"]:
+                event = rng.choice(sent)  # rejeu : doit être ignoré
+            else:
+                event = provider.subscription_event(rng.choice(org_ids), status=rng.choice(statuses))
+                sent.append(event)
+
+            body, signature = provider.sign(event)
+            response = client.post(
+                url, data=body, content_type="application/json",
+                **{SIGNATURE_HEADER: signature},
+            )
+            if response.status_code != 200:
+                raise CommandError(f"Webhook refusé ({response.status_code}) : {response.content!r}")
+        ingest = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Webhooks : {options['events']} envoyés ({len(sent)} uniques) "
+            f"en {ingest:.2f}s → {options['events'] / ingest:.0f} req/s"
+        )
+
+        if options["no_process"]:
+            return
+
+        start = time.perf_counter()
+        processed = process_pending_events(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Traitement : {processed} événements en {elapsed:.2f}s → {rate:.0f} evt/s"
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.admin_jobs import CHUNK_SIZE, process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Applique les actions d'admin en masse planifiées (par lots, reprise après crash)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--interval", type=float, default=2.0, help="Pause (s) entre deux passes en mode --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            chunks = process_pending_jobs(chunk_size=options["chunk_size"])
+            if chunks:
+                self.stdout.write(self.style.SUCCESS(f"✔ {chunks} lot(s) appliqué(s)"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.billing import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Applique aux abonnements les événements de facturation reçus (par lots)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--interval", type=float, default=5.0, help="Pause (s) entre deux passes en mode --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            total = process_pending_events(batch_size=options["batch_size"])
+            if total:
+                self.stdout.write(self.style.SUCCESS(f"✔ {total} événement(s) traité(s)"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
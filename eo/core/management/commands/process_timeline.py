@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.timeline import process_pending_jobs, rebuild
+
+
+class Command(BaseCommand):
+    help = "Fan-out de la timeline d'accueil (publications publiées, nouvelles memberships)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--interval", type=float, default=2.0, help="Pause (s) entre deux passes en mode --loop")
+        parser.add_argument("--rebuild", action="store_true", help="Reconstruit toute la timeline avant de traiter")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            rebuild()
+            self.stdout.write("Timeline vidée, rattrapage planifié")
+
+        while True:
+            total = process_pending_jobs(batch_size=options["batch_size"])
+            if total:
+                self.stdout.write(self.style.SUCCESS(f"✔ {total} tâche(s) de timeline traitée(s)"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
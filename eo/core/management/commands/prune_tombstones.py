@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.events import EVENTS_RETENTION_HOURS, prune_events
+from core.sync import TOMBSTONE_RETENTION_DAYS, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Supprime les tombstones de synchronisation et les événements SSE plus anciens que la rétention"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=TOMBSTONE_RETENTION_DAYS)
+        parser.add_argument("--event-hours", type=int, default=EVENTS_RETENTION_HOURS)
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"✔ {deleted} tombstone(s) supprimée(s)"))
+        deleted = prune_events(hours=options["event_hours"])
+        self.stdout.write(self.style.SUCCESS(f"✔ {deleted} événement(s) SSE supprimé(s)"))
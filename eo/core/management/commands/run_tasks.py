@@ -0,0 +1,45 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = "Worker de la file de tâches différées (core/tasks.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "EO_TASK_CONCURRENCY", 4),
+            help="Taille du pool (0 : exécution dans le processus courant)",
+        )
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+        parser.add_argument("--batch-size", type=int, default=None, help="Tâches réclamées par lot (défaut : 2 x pool)")
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--interval", type=float, default=1.0, help="Pause (s) quand la file est vide en mode --loop")
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        batch_size = options["batch_size"] or max(1, concurrency) * 2
+
+        executor = None
+        if concurrency > 0:
+            pool = ProcessPoolExecutor if options["pool"] == "process" else ThreadPoolExecutor
+            executor = pool(max_workers=concurrency)
+
+        try:
+            while True:
+                count = run_pending(batch_size=batch_size, executor=executor)
+                if count:
+                    self.stdout.write(self.style.SUCCESS(f"✔ {count} tâche(s) exécutée(s)"))
+                elif not options["loop"]:
+                    break
+                else:
+                    time.sleep(options["interval"])
+        finally:
+            if executor is not None:
+                executor.shutdown()
@@ -1,18 +1,330 @@
-from django.core.management.base import BaseCommand
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from core.models import Organisation, Publication, Membership
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from backend.sqlite_tuned import atomic_immediate
+from core.models import Organisation, Publication, Membership, PublicationAttachment, Subscription
 
 User = get_user_model()
 
 
+# ---------------------------------------------------------------------------
+# Générateur à l'échelle (--scale N)
+#
+# Déterministe : l'organisation i est entièrement dérivée de Random(seed, i),
+# quel que soit le découpage en lots ou en processus. Insertion par
+# bulk_create (pas de save() par ligne : is_published et slug calculés ici).
+# Les lots d'organisations sont indépendants : --processes les répartit.
+# Les membres partagés (organisation i -> i + 1) sont insérés à la fin, une
+# fois toutes les organisations et tous les comptes créés. bulk_create ne
+# passe pas par les signaux : la timeline est reconstruite ensuite
+# (process_timeline --rebuild), sauf --skip-timeline.
+# ---------------------------------------------------------------------------
+
+WORDS = (
+    "assemblée réunion atelier bénévoles quartier festival concert sortie "
+    "adhésion cotisation bureau projet jardin école bibliothèque marché "
+    "rencontre formation sport repas visite exposition collecte solidarité "
+    "randonnée conseil planning inscription calendrier partenaires local"
+).split()
+
+SUBSCRIPTION_MIX = [
+    (Subscription.Status.ACTIVE, 60),
+    (Subscription.Status.TRIALING, 25),
+    (Subscription.Status.CANCELED, 15),
+]
+STATUS_MIX = [
+    (Publication.STATUS_PUBLISHED, 75),
+    (Publication.STATUS_DRAFT, 15),
+    (Publication.STATUS_ARCHIVED, 10),
+]
+ATTACHMENTS_MIX = [(0, 60), (1, 25), (2, 10), (3, 5)]
+
+# Part des membres qui rejoignent aussi l'organisation suivante (multi-organisations)
+SHARED_MEMBERS_RATIO = 0.05
+
+
+def _pick(rng, mix):
+    values, weights = zip(*mix)
+    return rng.choices(values, weights)[0]
+
+
+def _text(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _plan_organisation(index, options, now):
+    """
+    Décrit l'organisation `index` (sans toucher la base).
+    """
+    rng = random.Random(f"{options['seed']}:{index}")
+    prefix = options["prefix"]
+
+    # Tailles à queue lourde (Pareto, moyenne ~ --members) : quelques très
+    # grosses organisations, beaucoup de petites
+    members = min(int(rng.paretovariate(1.2) * options["members"] / 6) + 1, options["members"] * 50)
+    publications = rng.randint(options["publications"] // 2, options["publications"] * 3 // 2)
+
+    plan = {
+        "organisation": Organisation(
+            nom=f"{prefix.capitalize()} {index} {rng.choice(WORDS)}",
+            slug=f"{prefix}-{index}",
+            ville=rng.choice(["Lisbonne", "Porto", "Lyon", "Nantes", "Liège", "Genève"]),
+            pays=rng.choice(["Portugal", "France", "Belgique", "Suisse"]),
+            presentation=_text(rng, 10, 40),
+            periode_gratuite_jours=rng.choice([30, 90]),
+        ),
+        "subscription_status": _pick(rng, SUBSCRIPTION_MIX),
+        "users": [f"{prefix}-{index}-{j}@example.com".lower() for j in range(members)],
+        "roles": ["owner"] + [
+            "admin" if rng.random() < 0.1 else "member" for _ in range(members - 1)
+        ],
+        "shared": rng.sample(range(members), max(0, int(members * SHARED_MEMBERS_RATIO))),
+        "publications": [],
+    }
+
+    for _ in range(publications):
+        status = _pick(rng, STATUS_MIX)
+        date = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        is_event = rng.random() < 0.3
+        event_start = None
+        if is_event:
+            # ~1/3 des événements à venir
+            event_start = now + timedelta(hours=rng.randint(-24 * 180, 24 * 90))
+        plan["publications"].append((
+            Publication(
+                type=Publication.TYPE_EVENEMENT if is_event else Publication.TYPE_INFORMATION,
+                status=status,
+                is_published=status == Publication.STATUS_PUBLISHED,
+                titre=_text(rng, 3, 8).capitalize(),
+                contenu=_text(rng, 20, 200),
+                date_publication=date,
+                event_start=event_start,
+                event_end=event_start + timedelta(hours=rng.randint(1, 6)) if event_start else None,
+                event_location=rng.choice(WORDS).capitalize() if is_event else "",
+            ),
+            _pick(rng, ATTACHMENTS_MIX),
+        ))
+    return plan
+
+
+def _seed_batch(indexes, options, password, now):
+    """
+    Insère un lot d'organisations dans une transaction. Retourne le nombre
+    de lignes créées par table et les membres partagés à insérer ensuite :
+    [(slug de l'organisation i + 1, emails de membres de i)].
+    """
+    chunk = options["chunk_size"]
+    plans = [_plan_organisation(i, options, now) for i in indexes]
+    counts = {}
+
+    with transaction.atomic():
+        Organisation.objects.bulk_create([p["organisation"] for p in plans], batch_size=chunk)
+        # Relecture des ids (tous les moteurs ne les renvoient pas)
+        org_ids = dict(
+            Organisation.objects.filter(slug__in=[p["organisation"].slug for p in plans])
+            .values_list("slug", "id")
+        )
+        for plan in plans:
+            plan["organisation"].pk = org_ids[plan["organisation"].slug]
+
+        Subscription.objects.bulk_create(
+            [
+                Subscription(
+                    organisation_id=p["organisation"].pk,
+                    status=p["subscription_status"],
+                    trial_end=now + timedelta(days=p["organisation"].periode_gratuite_jours),
+                    current_period_end=now + timedelta(days=30),
+                )
+                for p in plans
+            ],
+            batch_size=chunk,
+        )
+
+        emails = [email for p in plans for email in p["users"]]
+        User.objects.bulk_create(
+            [User(email=email, username=email, password=password, date_joined=now) for email in emails],
+            batch_size=chunk,
+        )
+        user_ids = {}
+        for start in range(0, len(emails), chunk):
+            user_ids.update(
+                User.objects.filter(email__in=emails[start:start + chunk]).values_list("email", "id")
+            )
+
+        memberships = [
+            Membership(user_id=user_ids[email], organisation_id=plan["organisation"].pk, role=role)
+            for plan in plans
+            for email, role in zip(plan["users"], plan["roles"])
+        ]
+        Membership.objects.bulk_create(memberships, batch_size=chunk)
+
+        publications = []
+        for plan in plans:
+            for publication, _ in plan["publications"]:
+                publication.organisation_id = plan["organisation"].pk
+                publications.append(publication)
+        Publication.objects.bulk_create(publications, batch_size=chunk)
+
+        # Même ordre que l'insertion (ids croissants)
+        publication_ids = list(
+            Publication.objects.filter(organisation_id__in=org_ids.values())
+            .order_by("id").values_list("id", flat=True)
+        )
+        attachments = [
+            PublicationAttachment(
+                publication_id=publication_id,
+                file=f"attachments/{options['prefix']}/{publication_id}-{k}.pdf",
+                display_name=f"Document {k + 1}",
+            )
+            for publication_id, (_, n) in zip(
+                publication_ids, (item for p in plans for item in p["publications"])
+            )
+            for k in range(n)
+        ]
+        PublicationAttachment.objects.bulk_create(attachments, batch_size=chunk)
+
+    counts["organisations"] = len(plans)
+    counts["users"] = len(emails)
+    counts["memberships"] = len(memberships)
+    counts["publications"] = len(publications)
+    counts["attachments"] = len(attachments)
+
+    # Organisation suivante selon l'indice global (elle peut être dans un
+    # autre lot, voire un autre processus)
+    shared = [
+        (f"{options['prefix']}-{index + 1}", [plan["users"][j] for j in plan["shared"]])
+        for index, plan in zip(indexes, plans)
+        if index + 1 < options["scale"] and plan["shared"]
+    ]
+    return counts, shared
+
+
+def _seed_worker(args):
+    batches, options, password, now = args
+    totals = {}
+    shared = []
+    for indexes in batches:
+        counts, batch_shared = _seed_batch(indexes, options, password, now)
+        for table, count in counts.items():
+            totals[table] = totals.get(table, 0) + count
+        shared.extend(batch_shared)
+    connections.close_all()
+    return totals, shared
+
+
+def _seed_shared_members(shared, options):
+    """
+    Insère les membres partagés renvoyés par _seed_batch, par lots de
+    --batch organisations. Retourne le nombre d'adhésions créées.
+    """
+    chunk = options["chunk_size"]
+    created = 0
+    for start in range(0, len(shared), options["batch"]):
+        part = shared[start:start + options["batch"]]
+        emails = [email for _, batch_emails in part for email in batch_emails]
+        with atomic_immediate():
+            org_ids = dict(
+                Organisation.objects.filter(slug__in=[slug for slug, _ in part]).values_list("slug", "id")
+            )
+            user_ids = {}
+            for offset in range(0, len(emails), chunk):
+                user_ids.update(
+                    User.objects.filter(email__in=emails[offset:offset + chunk]).values_list("email", "id")
+                )
+            memberships = [
+                Membership(user_id=user_ids[email], organisation_id=org_ids[slug], role="member")
+                for slug, batch_emails in part
+                for email in batch_emails
+            ]
+            Membership.objects.bulk_create(memberships, batch_size=chunk)
+        created += len(memberships)
+    return created
+
+
 class Command(BaseCommand):
-    help = "Seed initial data for Éo"
+    help = "Seed initial data for Éo (--scale N : jeu de données synthétique de N organisations)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=0, help="Nombre d'organisations à générer")
+        parser.add_argument("--members", type=int, default=20, help="Membres par organisation (moyenne)")
+        parser.add_argument("--publications", type=int, default=50, help="Publications par organisation (moyenne)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="scale", help="Préfixe des slugs / emails générés")
+        parser.add_argument("--batch", type=int, default=50, help="Organisations par transaction")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Lignes par INSERT")
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--password", default="seed-password", help="Mot de passe de tous les comptes générés")
+        parser.add_argument(
+            "--skip-timeline", action="store_true",
+            help="Ne reconstruit pas la timeline (à lancer ensuite : process_timeline --rebuild)",
+        )
 
     def handle(self, *args, **options):
+        if options["scale"]:
+            return self._seed_scale(options)
+        self._seed_demo()
+
+    def _seed_scale(self, options):
+        if Organisation.objects.filter(slug=f"{options['prefix']}-0").exists():
+            raise CommandError(
+                f"Des données '{options['prefix']}' existent déjà : changer --prefix ou repartir d'une base vide."
+            )
+
+        # Un seul hash pour tous les comptes (le hasher est volontairement lent)
+        password = make_password(options["password"])
+        now = timezone.now().replace(second=0, microsecond=0)
+        indexes = list(range(options["scale"]))
+        batches = [indexes[i:i + options["batch"]] for i in range(0, len(indexes), options["batch"])]
+        processes = max(1, min(options["processes"], len(batches)))
+
+        start = time.perf_counter()
+        if processes == 1:
+            results = [_seed_worker((batches, options, password, now))]
+        else:
+            connections.close_all()
+            jobs = [(batches[i::processes], options, password, now) for i in range(processes)]
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                results = pool.map(_seed_worker, jobs)
+
+        totals = {}
+        shared = []
+        for counts, worker_shared in results:
+            for table, count in counts.items():
+                totals[table] = totals.get(table, 0) + count
+            shared.extend(worker_shared)
+        totals["memberships"] = totals.get("memberships", 0) + _seed_shared_members(shared, options)
+        elapsed = time.perf_counter() - start
+
+        rows = sum(totals.values())
+        for table, count in totals.items():
+            self.stdout.write(f"  {table:<14} {count:>10}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {rows} lignes en {elapsed:.1f}s ({rows / elapsed:.0f} lignes/s, {processes} processus)"
+        ))
+
+        # Sans timeline, le feed d'accueil (EO_TIMELINE_FEED) serait vide
+        if options["skip_timeline"]:
+            self.stdout.write("Timeline non reconstruite : lancer manage.py process_timeline --rebuild")
+            return
+        start = time.perf_counter()
+        call_command("process_timeline", rebuild=True, stdout=self.stdout)
+        self.stdout.write(f"Timeline reconstruite en {time.perf_counter() - start:.1f}s")
+
+    def _seed_demo(self):
         # USER
         user, created = User.objects.get_or_create(
             email="admin@eo.app",
             defaults={
+                "username": "admin@eo.app",
                 "is_staff": True,
                 "is_superuser": True,
             },
@@ -43,13 +355,13 @@ class Command(BaseCommand):
             defaults={"role": "owner"},
         )
 
-        # PUBLICATIONS
+        # PUBLICATIONS (is_published est dérivé de status dans save())
         Publication.objects.get_or_create(
             titre="Bienvenue sur Éo",
             organisation=organisation,
             defaults={
                 "contenu": "Première publication de démonstration.",
-                "is_published": True,
+                "status": Publication.STATUS_PUBLISHED,
             },
         )
 
@@ -58,8 +370,8 @@ class Command(BaseCommand):
             organisation=organisation,
             defaults={
                 "contenu": "Une autre publication pour tester l’API.",
-                "is_published": True,
+                "status": Publication.STATUS_PUBLISHED,
             },
         )
 
-        self.stdout.write(self.style.SUCCESS("🎉 Seed terminé avec succès"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("🎉 Seed terminé avec succès"))
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.notifications import NOTIFY_CHUNK_SIZE, send_digests
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Envoie les résumés de publications (cron : quotidien pour daily, hebdomadaire pour weekly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", choices=[User.NOTIFY_DAILY, User.NOTIFY_WEEKLY])
+        parser.add_argument("--chunk-size", type=int, default=NOTIFY_CHUNK_SIZE, help="Utilisateurs par connexion SMTP")
+
+    def handle(self, *args, **options):
+        sent = send_digests(options["mode"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"✔ {sent} résumé(s) envoyé(s)"))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "SQLite : checkpoint du WAL (TRUNCATE) et PRAGMA optimize, une fois ou périodiquement"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=300.0, help="Secondes entre deux passes (--loop)")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError("Base non SQLite : rien à faire.")
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                busy, log_frames, checkpointed = cursor.fetchone()
+                cursor.execute("PRAGMA optimize")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"✔ Checkpoint : {checkpointed}/{log_frames} pages"
+                + (" (lecteurs actifs, partiel)" if busy else "")
+            ))
+
+            if not options["loop"]:
+                break
+            connection.close()
+            time.sleep(options["interval"])
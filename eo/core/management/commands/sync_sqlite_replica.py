@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Réplica local pour les tests : copie la base SQLite primaire vers le "
+        "fichier EO_DB_REPLICA_NAME (API backup de SQLite), une fois ou en boucle"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Recopie en continu (simule le retard de réplication)")
+        parser.add_argument("--interval", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        replica = settings.DATABASES.get("replica")
+        if replica is None:
+            raise CommandError("Aucun réplica configuré (EO_DB_REPLICA_NAME).")
+        if "sqlite3" not in primary["ENGINE"] or "sqlite3" not in replica["ENGINE"]:
+            raise CommandError("Réservé au profil SQLite : avec Postgres, utiliser la réplication native.")
+
+        while True:
+            source = sqlite3.connect(str(primary["NAME"]))
+            target = sqlite3.connect(str(replica["NAME"]))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(f"✔ Réplica synchronisé ({replica['NAME']})"))
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_organisation_presentation_organisation_public_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscription',
+            name='stripe_customer_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='stripe_subscription_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='BillingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('type', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('provider_created', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['provider_created', 'id'], name='billingevent_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_billing_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('organisation_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='organisation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='publicationattachment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['organisation', 'updated_at'], name='membership_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['organisation', 'updated_at'], name='publication_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['organisation_id', 'deleted_at'], name='tombstone_org_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(condition=models.Q(('user_id__isnull', False)), fields=['user_id', 'deleted_at'], name='tombstone_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+    ]
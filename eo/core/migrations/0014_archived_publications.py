@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPublication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('information', 'Information'), ('evenement', 'Événement')], max_length=20)),
+                ('status', models.CharField(choices=[('draft', 'Brouillon'), ('published', 'Publié'), ('archived', 'Archivé')], max_length=20)),
+                ('is_published', models.BooleanField(default=False)),
+                ('titre', models.CharField(max_length=255)),
+                ('contenu', models.TextField()),
+                ('date_publication', models.DateTimeField()),
+                ('event_start', models.DateTimeField(blank=True, null=True)),
+                ('event_end', models.DateTimeField(blank=True, null=True)),
+                ('event_location', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPublicationAttachment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('file', models.FileField(upload_to='attachments/')),
+                ('display_name', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(condition=models.Q(('status', 'archived')), fields=['updated_at'], name='publication_archive_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedpublicationattachment',
+            name='publication',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='core.archivedpublication'),
+        ),
+        migrations.AddField(
+            model_name='archivedpublication',
+            name='organisation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_publications', to='core.organisation'),
+        ),
+    ]
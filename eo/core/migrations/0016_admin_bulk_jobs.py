@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0015_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminBulkJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('publish', 'Publier'), ('unpublish', 'Dépublier'), ('archive', 'Archiver'), ('delete', 'Supprimer')], max_length=20)),
+                ('object_ids', models.JSONField()),
+                ('total', models.PositiveIntegerField()),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'running'])), fields=['id'], name='adminbulkjob_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0017_tasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDigestItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.publication')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='notificationdigestitem',
+            constraint=models.UniqueConstraint(fields=('user', 'publication'), name='digest_item_uniq'),
+        ),
+    ]
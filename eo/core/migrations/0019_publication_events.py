@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_notification_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=20)),
+                ('organisation_id', models.BigIntegerField()),
+                ('publication_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organisation_id', 'id'], name='publication_event_org_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_publication_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='billing_event_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
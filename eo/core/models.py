@@ -26,9 +26,18 @@ class Organisation(models.Model):
     email = models.EmailField(blank=True)
     telephone = models.CharField(max_length=50, blank=True)
 
+    # Page publique
+    presentation = models.TextField(blank=True)
+    public_email = models.EmailField(blank=True)
+    public_image = models.ImageField(upload_to="org_public/", blank=True, null=True)
+
     date_creation = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     periode_gratuite_jours = models.PositiveIntegerField(default=90)
 
+    # Trop de membres pour le fan-out : fusionnée à la lecture (core/timeline.py)
+    timeline_pull = models.BooleanField(default=False)
+
     def fin_periode_gratuite(self):
         if not self.date_creation:
             return None
@@ -97,6 +106,27 @@ class Publication(models.Model):
     event_end = models.DateTimeField(null=True, blank=True)
     event_location = models.CharField(max_length=255, blank=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Synchronisation différentielle (core/sync.py)
+            models.Index(fields=["organisation", "updated_at"], name="publication_sync_idx"),
+            # Candidats à l'archivage froid (core/archive.py)
+            models.Index(
+                fields=["updated_at"],
+                name="publication_archive_idx",
+                condition=models.Q(status="archived"),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut lu en base : transitions publié / dépublié (core/signals.py)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     def save(self, *args, **kwargs):
         # Source de vérité unique
         self.is_published = self.status == self.STATUS_PUBLISHED
@@ -128,9 +158,13 @@ class Membership(models.Model):
         default="member",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "organisation")
+        indexes = [
+            models.Index(fields=["organisation", "updated_at"], name="membership_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.organisation} ({self.role})"
@@ -144,6 +178,7 @@ class PublicationAttachment(models.Model):
     file = models.FileField(upload_to="attachments/")
     display_name = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.display_name or self.file.name
@@ -169,11 +204,336 @@ class Subscription(models.Model):
     current_period_end = models.DateTimeField(null=True, blank=True)
 
     # On les met maintenant, même si on n'utilise pas Stripe tout de suite
-    stripe_customer_id = models.CharField(max_length=255, null=True, blank=True)
-    stripe_subscription_id = models.CharField(max_length=255, null=True, blank=True)
+    stripe_customer_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    stripe_subscription_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    # Date (prestataire) du dernier événement appliqué : un événement plus
+    # ancien reçu en retard est ignoré (core/billing.py)
+    billing_event_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.organisation.slug} - {self.status}"
+
+# ---------------------------------------------------------------------------
+# MODELE : BillingEvent (webhooks du prestataire de paiement, bruts)
+# ---------------------------------------------------------------------------
+
+class BillingEvent(models.Model):
+    """
+    Événement reçu du prestataire (Stripe ou stand-in local), stocké tel quel.
+    Le webhook ne fait qu'insérer (dédupliqué sur event_id) ; l'application
+    aux Subscription est faite par lots (core/billing.py).
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    provider_created = models.DateTimeField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["provider_created", "id"],
+                name="billingevent_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
+
+
+# ---------------------------------------------------------------------------
+# MODELE : Tombstone (suppressions, pour la synchronisation différentielle)
+# ---------------------------------------------------------------------------
+
+class Tombstone(models.Model):
+    """
+    Trace d'une Publication / PublicationAttachment / Membership supprimée
+    (signaux post_delete), lue par /api/sync/ (core/sync.py). Pas de clé
+    étrangère : l'organisation elle-même peut avoir disparu.
+    """
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    organisation_id = models.BigIntegerField()
+    # Membership : utilisateur concerné (il ne voit plus l'organisation)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organisation_id", "deleted_at"], name="tombstone_org_idx"),
+            models.Index(
+                fields=["user_id", "deleted_at"],
+                name="tombstone_user_idx",
+                condition=models.Q(user_id__isnull=False),
+            ),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
+
+
+# ---------------------------------------------------------------------------
+# MODELES : archives froides (core/archive.py)
+#
+# Publications archivées depuis longtemps, déplacées hors de la table
+# chaude avec leurs pièces jointes (mêmes ids, mêmes fichiers).
+# ---------------------------------------------------------------------------
+
+class ArchivedPublication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    organisation = models.ForeignKey(
+        Organisation,
+        on_delete=models.CASCADE,
+        related_name="archived_publications",
+    )
+    type = models.CharField(max_length=20, choices=Publication.TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=Publication.STATUS_CHOICES)
+    is_published = models.BooleanField(default=False)
+    titre = models.CharField(max_length=255)
+    contenu = models.TextField()
+    date_publication = models.DateTimeField()
+    event_start = models.DateTimeField(null=True, blank=True)
+    event_end = models.DateTimeField(null=True, blank=True)
+    event_location = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.titre} (archive)"
+
+
+class ArchivedPublicationAttachment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    publication = models.ForeignKey(
+        ArchivedPublication,
+        on_delete=models.CASCADE,
+        related_name="attachments",
+    )
+    file = models.FileField(upload_to="attachments/")
+    display_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.display_name or self.file.name
+
+
+# ---------------------------------------------------------------------------
+# MODELES : timeline (fan-out à l'écriture, core/timeline.py)
+# ---------------------------------------------------------------------------
+
+class TimelineEntry(models.Model):
+    """
+    Publication publiée d'une organisation de l'utilisateur : le feed
+    d'accueil est une lecture par index (user, date_publication).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name="timeline_entries")
+    organisation_id = models.BigIntegerField()
+    date_publication = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "publication"], name="timeline_unique_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-date_publication", "-publication"], name="timeline_feed_idx"),
+            models.Index(fields=["user", "organisation_id"], name="timeline_membership_idx"),
+        ]
+
+
+class TimelineJob(models.Model):
+    """
+    Fan-out en attente (commande process_timeline) : une publication
+    devenue publiée, ou une membership créée (rattrapage).
+    """
+    KIND_PUBLICATION = "publication"
+    KIND_MEMBERSHIP = "membership"
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+# ---------------------------------------------------------------------------
+# MODELE : AdminBulkJob (actions d'admin en masse, en tâche de fond)
+# ---------------------------------------------------------------------------
+
+class AdminBulkJob(models.Model):
+    """
+    Action d'admin sur une sélection de publications, appliquée par lots
+    (commande process_admin_jobs, core/admin_jobs.py). `cursor` = dernier
+    id traité, avancé dans la transaction du lot : reprise après crash.
+    """
+    ACTION_PUBLISH = "publish"
+    ACTION_UNPUBLISH = "unpublish"
+    ACTION_ARCHIVE = "archive"
+    ACTION_DELETE = "delete"
+
+    ACTION_CHOICES = [
+        (ACTION_PUBLISH, "Publier"),
+        (ACTION_UNPUBLISH, "Dépublier"),
+        (ACTION_ARCHIVE, "Archiver"),
+        (ACTION_DELETE, "Supprimer"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
 
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_DONE, "Terminé"),
+        (STATUS_FAILED, "Échec"),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    # Ids sélectionnés, triés
+    object_ids = models.JSONField()
+    total = models.PositiveIntegerField()
+    processed = models.PositiveIntegerField(default=0)
+    cursor = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="adminbulkjob_pending_idx",
+                condition=models.Q(status__in=["pending", "running"]),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.processed}/{self.total})"
+
+
+# ---------------------------------------------------------------------------
+# MODELE : Task (file de tâches différées, core/tasks.py)
+# ---------------------------------------------------------------------------
+
+class Task(models.Model):
+    """
+    Appel différé d'une fonction enregistrée (@task), exécuté par la
+    commande run_tasks. Supprimé une fois réussi ; en échec définitif après
+    max_attempts essais.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_FAILED, "Échec"),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Une seule tâche en attente / en cours par clé
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Bail du worker : au-delà, la tâche est reprise par un autre
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                name="task_dedup_key_uniq",
+                condition=models.Q(status__in=["pending", "running"]),
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["run_at", "id"],
+                name="task_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+            models.Index(
+                fields=["locked_until"],
+                name="task_running_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.organisation.slug} - {self.status}"
\ No newline at end of file
+        return f"{self.name} ({self.get_status_display()})"
+
+
+# ---------------------------------------------------------------------------
+# MODELE : NotificationDigestItem (publications en attente de résumé)
+# ---------------------------------------------------------------------------
+
+class NotificationDigestItem(models.Model):
+    """
+    Publication à inclure dans le prochain résumé (quotidien / hebdomadaire)
+    d'un utilisateur, vidé par la commande send_digests.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "publication"], name="digest_item_uniq"),
+        ]
+
+
+# ---------------------------------------------------------------------------
+# MODELE : PublicationEvent (flux SSE, core/events.py)
+# ---------------------------------------------------------------------------
+
+class PublicationEvent(models.Model):
+    """
+    Événement publié / modifié / retiré, diffusé aux clients SSE. L'id sert
+    de Last-Event-ID : un client reconnecté reprend après le dernier reçu.
+    Conservé EO_EVENTS_RETENTION_HOURS heures (commande prune_tombstones).
+    """
+    TYPE_PUBLISHED = "published"
+    TYPE_UPDATED = "updated"
+    TYPE_DELETED = "deleted"
+
+    type = models.CharField(max_length=20)
+    organisation_id = models.BigIntegerField()
+    publication_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organisation_id", "id"], name="publication_event_org_idx"),
+        ]
+
+    def as_event(self):
+        return {
+            "id": self.pk,
+            "type": self.type,
+            "organisation": self.organisation_id,
+            "publication": self.publication_id,
+        }
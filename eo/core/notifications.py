@@ -0,0 +1,178 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.utils.text import Truncator
+
+from .models import Membership, NotificationDigestItem, Publication
+from .tasks import task
+
+User = get_user_model()
+
+
+# ---------------------------------------------------------------------------
+# Notifications de publication
+#
+# Une publication qui devient publiée planifie une tâche notify_publication
+# (core/signals.py, file de tâches core/tasks.py) : aucun envoi dans la
+# requête. Cette tâche découpe les memberships de l'organisation en
+# tranches de EO_NOTIFY_CHUNK_SIZE ids, une tâche d'envoi par tranche.
+#
+# - Une tâche d'envoi = une connexion SMTP pour tous ses messages.
+# - Mode "résumé" (User.notification_mode daily / weekly) : la publication
+#   est mise de côté (NotificationDigestItem), la commande send_digests
+#   (cron) envoie un seul message par utilisateur et par période. Retour au
+#   mode immédiat : le résumé en attente part tout de suite (flush_digest) ;
+#   mode "aucune" : il est abandonné (core/signals.py).
+# - Nouvel essai d'une tranche (SMTP indisponible) : des membres de la
+#   tranche peuvent recevoir le message deux fois.
+# ---------------------------------------------------------------------------
+
+NOTIFY_CHUNK_SIZE = getattr(settings, "EO_NOTIFY_CHUNK_SIZE", 500)
+PREVIEW_CHARS = 500
+
+
+def send_messages(messages):
+    if not messages:
+        return 0
+    with get_connection() as connection:
+        return connection.send_messages(messages)
+
+
+def _publication_text(publication):
+    return f"{publication.titre}\n\n{Truncator(publication.contenu).chars(PREVIEW_CHARS)}"
+
+
+def publication_message(publication, email):
+    return EmailMessage(
+        subject=f"[{publication.organisation.nom}] {publication.titre}",
+        body=_publication_text(publication),
+        to=[email],
+    )
+
+
+def digest_message(email, publications):
+    body = "\n\n---\n\n".join(
+        f"{publication.organisation.nom} — {_publication_text(publication)}" for publication in publications
+    )
+    return EmailMessage(
+        subject=f"Éo : {len(publications)} nouvelle(s) publication(s)",
+        body=body,
+        to=[email],
+    )
+
+
+@task()
+def notify_publication(publication_id):
+    """
+    Planifie l'envoi par tranches de memberships.
+    """
+    organisation_id = (
+        Publication.objects.filter(pk=publication_id, status=Publication.STATUS_PUBLISHED)
+        .values_list("organisation_id", flat=True)
+        .first()
+    )
+    if organisation_id is None:
+        return
+
+    ids = list(
+        Membership.objects.filter(organisation_id=organisation_id).order_by("pk").values_list("pk", flat=True)
+    )
+    for start in range(0, len(ids), NOTIFY_CHUNK_SIZE):
+        chunk = ids[start:start + NOTIFY_CHUNK_SIZE]
+        send_publication_chunk.defer(
+            publication_id, chunk[0], chunk[-1], dedup_key=f"notify:{publication_id}:{chunk[0]}"
+        )
+
+
+@task()
+def send_publication_chunk(publication_id, first_membership_id, last_membership_id):
+    publication = (
+        Publication.objects.filter(pk=publication_id, status=Publication.STATUS_PUBLISHED)
+        .select_related("organisation")
+        .first()
+    )
+    if publication is None:
+        return
+
+    recipients = (
+        Membership.objects.filter(
+            organisation_id=publication.organisation_id,
+            pk__gte=first_membership_id,
+            pk__lte=last_membership_id,
+            user__is_active=True,
+        )
+        .exclude(user__email="")
+        .exclude(user__notification_mode=User.NOTIFY_OFF)
+        .values_list("user_id", "user__email", "user__notification_mode")
+    )
+
+    messages, digest = [], []
+    for user_id, email, mode in recipients:
+        if mode == User.NOTIFY_IMMEDIATE:
+            messages.append(publication_message(publication, email))
+        else:
+            digest.append(NotificationDigestItem(user_id=user_id, publication_id=publication_id))
+
+    NotificationDigestItem.objects.bulk_create(digest, ignore_conflicts=True)
+    send_messages(messages)
+
+
+def _digest_items(**filters):
+    return list(
+        NotificationDigestItem.objects.filter(**filters)
+        .select_related("user", "publication__organisation")
+        .order_by("user_id", "publication__date_publication", "pk")
+    )
+
+
+def _send_digest_items(items):
+    """
+    Un message par utilisateur (items triés par utilisateur), puis vide ces
+    items. Retourne le nombre de messages envoyés.
+    """
+    messages = []
+    for _, user_items in groupby(items, key=lambda item: item.user_id):
+        user_items = list(user_items)
+        publications = [
+            item.publication
+            for item in user_items
+            if item.publication.status == Publication.STATUS_PUBLISHED
+        ]
+        if publications and user_items[0].user.email:
+            messages.append(digest_message(user_items[0].user.email, publications))
+    sent = send_messages(messages)
+    NotificationDigestItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+    return sent
+
+
+@task()
+def flush_digest(user_id):
+    """
+    Envoie tout de suite le résumé en attente d'un utilisateur repassé en
+    mode immédiat (send_digests ne le traiterait plus). Sans effet s'il est
+    revenu entre-temps à un mode résumé.
+    """
+    _send_digest_items(_digest_items(user_id=user_id, user__notification_mode=User.NOTIFY_IMMEDIATE))
+
+
+def send_digests(mode, chunk_size=NOTIFY_CHUNK_SIZE):
+    """
+    Un message par utilisateur en mode `mode` (daily / weekly) regroupant
+    ses publications en attente. Retourne le nombre de messages envoyés.
+    """
+    sent = 0
+    cursor = 0
+    while True:
+        user_ids = list(
+            NotificationDigestItem.objects.filter(user_id__gt=cursor, user__notification_mode=mode)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+            .distinct()[:chunk_size]
+        )
+        if not user_ids:
+            return sent
+        cursor = user_ids[-1]
+
+        sent += _send_digest_items(_digest_items(user_id__in=user_ids))
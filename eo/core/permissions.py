@@ -2,6 +2,38 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 from .models import Membership
 
 
+ADMIN_ROLES = ("admin", "owner")
+
+
+def get_organisation_ids(user):
+    """
+    Organisations de l'utilisateur : depuis les claims JWT si disponibles
+    (liste, aucune requête), sinon sous-requête Membership.
+    """
+    roles = getattr(user, "org_roles", None)
+    if roles is not None:
+        return list(roles)
+    return Membership.objects.filter(user=user).values("organisation_id")
+
+
+def get_organisation_role(user, organisation_id):
+    roles = getattr(user, "org_roles", None)
+    if roles is not None:
+        return roles.get(organisation_id)
+    return (
+        Membership.objects
+        .filter(user=user, organisation_id=organisation_id)
+        .values_list("role", flat=True)
+        .first()
+    )
+
+
+def is_organisation_admin(user, organisation_id):
+    if user.is_staff or user.is_superuser:
+        return True
+    return get_organisation_role(user, organisation_id) in ADMIN_ROLES
+
+
 class IsOrganisationAdmin(BasePermission):
     """
     Autorise l'écriture seulement si user est admin/owner de l'organisation.
@@ -29,15 +61,8 @@ class IsOrganisationAdmin(BasePermission):
             return True
 
         # obj doit avoir une organisation (Subscription.organisation, Publication.organisation, etc.)
-        org = getattr(obj, "organisation", None)
-        if org is None:
+        organisation_id = getattr(obj, "organisation_id", None)
+        if organisation_id is None:
             return False
 
-        role = (
-            Membership.objects
-            .filter(user=user, organisation=org)
-            .values_list("role", flat=True)
-            .first()
-        )
-
-        return role in ("admin", "owner")
\ No newline at end of file
+        return is_organisation_admin(user, organisation_id)
@@ -0,0 +1,64 @@
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# ---------------------------------------------------------------------------
+# JSON via orjson (REST_FRAMEWORK DEFAULT_RENDERER/PARSER_CLASSES)
+#
+# Même sortie octet pour octet que le JSONRenderer DRF (compact, UTF-8,
+# U+2028/U+2029 échappés). Les types non natifs (datetime, Decimal, lazy
+# strings...) passent par l'encodeur DRF. Repli sur le renderer DRF
+# d'origine quand orjson ne sait pas faire pareil :
+# - indentation demandée (application/json; indent=4, API navigable)
+# - entiers hors 64 bits, clés non gérées (TypeError)
+# - flottants en notation exponentielle côté Python (1e+16, 1e-05), écrits
+#   autrement par orjson (1e16, 0.00001) : repérés dans la sortie, un faux
+#   positif (texte "1e5", "0.0000") coûte seulement le repli
+# Seul écart restant : NaN / Infinity, refusés par DRF (STRICT_JSON), écrits
+# null par orjson.
+# ---------------------------------------------------------------------------
+
+_default = JSONEncoder().default
+# Clés int / float / bool / None converties comme json.dumps
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+_FLOAT_MISMATCH = re.compile(rb"\d[eE]-?\d|0\.0000")
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError (entier > 64 bits...) : json de la stdlib
+            return super().render(data, accepted_media_type, renderer_context)
+        if _FLOAT_MISMATCH.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
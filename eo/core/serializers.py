@@ -1,7 +1,15 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework.settings import api_settings
 
 from .models import (
+    ArchivedPublication,
+    ArchivedPublicationAttachment,
     Organisation,
     Publication,
     PublicationAttachment,
@@ -12,6 +20,238 @@ from .models import (
 User = get_user_model()
 
 
+# ---------------------------------------------------------------------------
+# Lecture rapide (listes)
+#
+# Serializer.fast_values(queryset) + Serializer.fast_data(rows) produisent
+# la même sortie que Serializer(many=True).data, à partir de lignes
+# .values() : accesseurs compilés une fois par classe depuis les champs
+# déclarés (sources -> chemins "a__b", sérializers imbriqués aplatis).
+# Les SerializerMethodField déclarent leur équivalent dans fast_fields :
+# {nom: (chemin values(), fonction(valeur))}.
+# ---------------------------------------------------------------------------
+
+# Valeurs de base renvoyées telles quelles par to_representation()
+_FAST_IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+_FAST_CONVERTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.UUIDField,
+)
+
+
+def _fast_converter(field):
+    """
+    -> fonction(valeur, fuseau courant). Dates ISO 8601 : même sortie que
+    DateTimeField.to_representation(), fuseau résolu une fois par liste.
+    """
+    if (
+        isinstance(field, serializers.DateTimeField)
+        and settings.USE_TZ
+        and not hasattr(field, "timezone")
+        and (getattr(field, "format", api_settings.DATETIME_FORMAT) or "").lower() == ISO_8601
+    ):
+        def convert(value, tz):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            text = value.astimezone(tz).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+        return convert
+
+    to_representation = field.to_representation
+    return lambda value, tz: to_representation(value)
+
+
+def _compile_fast(serializer, prefix=""):
+    paths = []
+    steps = []
+    fast_fields = getattr(serializer, "fast_fields", {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        path = prefix + field.source.replace(".", "__")
+
+        if name in fast_fields:
+            source, function = fast_fields[name]
+            paths.append(prefix + source)
+            steps.append((name, prefix + source, lambda value, tz, f=function: f(value), None, True))
+        elif isinstance(field, serializers.BaseSerializer):
+            # Imbriqué : null si la ligne liée n'existe pas (pk NULL)
+            nested_paths, nested_build = _compile_fast(field, path + "__")
+            pk_path = f"{path}__{field.Meta.model._meta.pk.attname}"
+            paths.extend(nested_paths + [pk_path])
+            steps.append((name, pk_path, None, nested_build, False))
+        elif isinstance(field, _FAST_IDENTITY_FIELDS):
+            paths.append(path)
+            steps.append((name, path, None, None, False))
+        elif isinstance(field, _FAST_CONVERTED_FIELDS):
+            paths.append(path)
+            steps.append((name, path, _fast_converter(field), None, False))
+        else:
+            raise TypeError(
+                f"{type(serializer).__name__}.{name} ({type(field).__name__}) : "
+                "non supporté en lecture rapide"
+            )
+
+    def build(row, tz):
+        data = {}
+        for name, path, convert, nested, convert_none in steps:
+            value = row[path]
+            if nested is not None:
+                data[name] = None if value is None else nested(row, tz)
+            elif convert is None or (value is None and not convert_none):
+                # None -> null sans conversion, comme to_representation()
+                data[name] = value
+            else:
+                data[name] = convert(value, tz)
+        return data
+
+    return list(dict.fromkeys(paths)), build
+
+
+class FastReadMixin:
+    fast_fields = {}
+
+    # Compilations par jeu de champs (?fields= / ?expand=), borné
+    _FAST_CACHE_SIZE = 256
+
+    @classmethod
+    def _fast_compiled(cls, fields=None, expand=()):
+        cache = cls.__dict__.get("_fast")
+        if cache is None or len(cache) >= cls._FAST_CACHE_SIZE:
+            cache = cls._fast = {}
+        key = (fields and frozenset(fields), frozenset(expand or ()))
+        if key not in cache:
+            cache[key] = _compile_fast(cls(context={"fields": fields, "expand": expand}))
+        return cache[key]
+
+    @classmethod
+    def fast_values(cls, queryset, fields=None, expand=()):
+        return queryset.values(*cls._fast_compiled(fields, expand)[0])
+
+    @classmethod
+    def fast_data(cls, rows, fields=None, expand=()):
+        build = cls._fast_compiled(fields, expand)[1]
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [build(row, tz) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Champs partiels : ?fields=a,b et ?expand=relation
+#
+# context["fields"] (None = tous) restreint les champs du serializer racine.
+# Quand fields est donné, les relations de expandable_fields sont réduites
+# à leur(s) id(s), sauf si elles figurent dans context["expand"] (objet
+# imbriqué complet). Sans fields : sortie inchangée.
+# sparse_queryset() adapte only() / select_related / prefetch_related au
+# serializer ainsi réduit. SerializerMethodField : colonnes déclarées dans
+# method_sources {nom: (chemins,)}, sinon pas de only().
+# ---------------------------------------------------------------------------
+
+class SparseFieldsMixin:
+    expandable_fields = ()
+    method_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get("fields")
+        is_root = self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None
+        )
+        if requested is None or not is_root:
+            return fields
+
+        expand = self.context.get("expand") or ()
+        fields = {name: field for name, field in fields.items() if name in requested}
+        for name in self.expandable_fields:
+            if name in fields and name not in expand:
+                field = fields[name]
+                many = isinstance(field, serializers.ListSerializer)
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=field.source, many=many, read_only=True
+                )
+        return fields
+
+
+def _sparse_plan(serializer, model, prefix, plan):
+    fields = serializer.child.fields if isinstance(serializer, serializers.ListSerializer) else serializer.fields
+    method_sources = getattr(serializer, "method_sources", {})
+
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in method_sources:
+                plan["complete"] = False
+            plan["only"].extend(prefix + path for path in method_sources.get(name, ()))
+            continue
+        if field.source == "*":
+            plan["complete"] = False
+            continue
+
+        # Relations traversées (source "user.email") : select_related
+        parts = field.source.split(".")
+        current = model
+        try:
+            for i, part in enumerate(parts):
+                model_field = current._meta.get_field(part)
+                if i < len(parts) - 1:
+                    plan["select"].append(prefix + "__".join(parts[:i + 1]))
+                    current = model_field.related_model
+        except FieldDoesNotExist:
+            # Propriété / attribut calculé : colonnes inconnues
+            plan["complete"] = False
+            continue
+        path = prefix + "__".join(parts)
+
+        if isinstance(field, serializers.ListSerializer) or model_field.one_to_many or model_field.many_to_many:
+            # Listes imbriquées (ou ids) : requête séparée
+            if isinstance(field, serializers.ManyRelatedField) and model_field.one_to_many:
+                related = model_field.related_model
+                plan["prefetch"].append(Prefetch(
+                    path, queryset=related.objects.only(related._meta.pk.attname, model_field.field.attname)
+                ))
+            else:
+                plan["prefetch"].append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            plan["select"].append(path)
+            _sparse_plan(field, model_field.related_model, path + "__", plan)
+        elif model_field.is_relation and not model_field.concrete:
+            # id d'une relation inverse (OneToOne) : jointure
+            plan["select"].append(path)
+            plan["only"].append(f"{path}__{model_field.related_model._meta.pk.name}")
+        else:
+            plan["only"].append(path)
+
+
+def sparse_queryset(queryset, serializer):
+    """
+    Queryset réduit aux colonnes / jointures lues par `serializer` (déjà
+    restreint par ?fields= / ?expand=).
+    """
+    plan = {"only": [], "select": [], "prefetch": [], "complete": True}
+    _sparse_plan(serializer, queryset.model, "", plan)
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if plan["select"]:
+        queryset = queryset.select_related(*dict.fromkeys(plan["select"]))
+    if plan["prefetch"]:
+        queryset = queryset.prefetch_related(*plan["prefetch"])
+    if plan["complete"]:
+        queryset = queryset.only(*dict.fromkeys(plan["only"]))
+    return queryset
+
 
 # ---------------------------------------------------------------------------
 # SERIALIZER : Subscription
@@ -33,7 +273,7 @@ class SubscriptionPublicSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(SparseFieldsMixin, FastReadMixin, serializers.ModelSerializer):
     """
     Serializer complet (pour /api/subscriptions/)
     """
@@ -67,9 +307,11 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 # SERIALIZER : Organisation (complet)
 # ---------------------------------------------------------------------------
 
-class OrganisationSerializer(serializers.ModelSerializer):
+class OrganisationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     subscription = SubscriptionPublicSerializer(read_only=True)
 
+    expandable_fields = ("subscription",)
+
     class Meta:
         model = Organisation
         fields = "__all__"
@@ -91,9 +333,11 @@ class OrganisationMiniSerializer(serializers.ModelSerializer):
 # SERIALIZER : PublicationAttachment
 # ---------------------------------------------------------------------------
 
-class PublicationAttachmentSerializer(serializers.ModelSerializer):
+class PublicationAttachmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     file_size = serializers.SerializerMethodField()
 
+    method_sources = {"file_size": ("file",)}
+
     class Meta:
         model = PublicationAttachment
         fields = ["id", "publication", "file", "display_name", "file_size", "created_at"]
@@ -111,10 +355,26 @@ class PublicationAttachmentSerializer(serializers.ModelSerializer):
 # - léger : organisation mini + preview + count PJ
 # ---------------------------------------------------------------------------
 
-class PublicationListSerializer(serializers.ModelSerializer):
+def _contenu_preview(contenu):
+    if not contenu:
+        return ""
+    return contenu[:120] + ("…" if len(contenu) > 120 else "")
+
+
+class PublicationListSerializer(SparseFieldsMixin, FastReadMixin, serializers.ModelSerializer):
     organisation = OrganisationMiniSerializer(read_only=True)
     contenu_preview = serializers.SerializerMethodField()
-    attachments_count = serializers.IntegerField(source="attachments.count", read_only=True)
+    attachments_count = serializers.SerializerMethodField()
+
+    expandable_fields = ("organisation",)
+    # attachments_count : annotation (cf. PublicationViewSet.get_queryset)
+    method_sources = {"contenu_preview": ("contenu",), "attachments_count": ()}
+
+    # Lecture rapide : attachments_count doit être annoté sur le queryset
+    fast_fields = {
+        "contenu_preview": ("contenu", _contenu_preview),
+        "attachments_count": ("attachments_count", int),
+    }
 
     class Meta:
         model = Publication
@@ -133,10 +393,15 @@ class PublicationListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def get_attachments_count(self, obj):
+        # Annotation (vues async, querysets annotés) sinon requête COUNT
+        count = getattr(obj, "attachments_count", None)
+        if count is not None:
+            return count
+        return obj.attachments.count()
+
     def get_contenu_preview(self, obj):
-        if not obj.contenu:
-            return ""
-        return obj.contenu[:120] + ("…" if len(obj.contenu) > 120 else "")
+        return _contenu_preview(obj.contenu)
 
 
 # ---------------------------------------------------------------------------
@@ -144,10 +409,12 @@ class PublicationListSerializer(serializers.ModelSerializer):
 # - inclut PJ + validations event
 # ---------------------------------------------------------------------------
 
-class PublicationSerializer(serializers.ModelSerializer):
+class PublicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     organisation = OrganisationMiniSerializer(read_only=True)
     attachments = PublicationAttachmentSerializer(many=True, read_only=True)
 
+    expandable_fields = ("organisation", "attachments")
+
     class Meta:
         model = Publication
         fields = [
@@ -193,11 +460,29 @@ class PublicationSerializer(serializers.ModelSerializer):
         return attrs
 
 
+# ---------------------------------------------------------------------------
+# SERIALIZER : Publication archivée (table froide, lecture seule)
+# - même forme que PublicationSerializer
+# ---------------------------------------------------------------------------
+
+class ArchivedPublicationAttachmentSerializer(PublicationAttachmentSerializer):
+    class Meta(PublicationAttachmentSerializer.Meta):
+        model = ArchivedPublicationAttachment
+
+
+class ArchivedPublicationSerializer(PublicationSerializer):
+    attachments = ArchivedPublicationAttachmentSerializer(many=True, read_only=True)
+
+    class Meta(PublicationSerializer.Meta):
+        model = ArchivedPublication
+        read_only_fields = PublicationSerializer.Meta.fields
+
+
 # ---------------------------------------------------------------------------
 # SERIALIZER : Membership (liste / update)
 # ---------------------------------------------------------------------------
 
-class MembershipSerializer(serializers.ModelSerializer):
+class MembershipSerializer(SparseFieldsMixin, FastReadMixin, serializers.ModelSerializer):
     user_email = serializers.EmailField(source="user.email", read_only=True)
     organisation_slug = serializers.SlugField(source="organisation.slug", read_only=True)
 
@@ -240,7 +525,35 @@ class MembershipInviteSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "user", "user_email", "created_at"]
 
-    def validate_email(self, value):
-        if not User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("Aucun utilisateur avec cet email.")
-        return value
\ No newline at end of file
+    def validate(self, attrs):
+        # Résolu une seule fois ici ; la vue réutilise attrs["user"]
+        try:
+            attrs["user"] = User.objects.get_by_email(attrs["email"])
+        except User.DoesNotExist:
+            raise serializers.ValidationError({"email": "Aucun utilisateur avec cet email."})
+        return attrs
+
+# ---------------------------------------------------------------------------
+# SERIALIZER : Membership (invitations en masse)
+# ---------------------------------------------------------------------------
+
+class MembershipInviteEntrySerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    role = serializers.ChoiceField(choices=Membership.ROLE_CHOICES, default="member")
+
+
+class MembershipBulkInviteSerializer(serializers.Serializer):
+    """
+    POST /api/memberships/bulk/ avec:
+    {"organisation": <id>, "invitations": [{"email": "...", "role": "..."}, ...]}
+    """
+    organisation = serializers.PrimaryKeyRelatedField(queryset=Organisation.objects.all())
+    invitations = MembershipInviteEntrySerializer(many=True, allow_empty=False)
+
+    def validate_invitations(self, value):
+        max_entries = getattr(settings, "EO_BULK_INVITE_MAX", 500)
+        if len(value) > max_entries:
+            raise serializers.ValidationError(
+                f"{max_entries} invitations maximum par requête."
+            )
+        return value
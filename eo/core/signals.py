@@ -1,55 +1,129 @@
-import os
-from django.db.models.signals import pre_save, post_delete
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Association, Evenement
 
-@receiver(pre_save, sender=Association)
-def delete_old_logo(sender, instance, **kwargs):
-    if not instance.pk:
-        return
-    try:
-        old = Association.objects.get(pk=instance.pk).logo
-    except Association.DoesNotExist:
-        return
-    new = instance.logo
-    if old and old != new:
-        try:
-            if os.path.isfile(old.path):
-                os.remove(old.path)
-        except Exception:
-            pass
-
-@receiver(post_delete, sender=Association)
-def delete_logo_on_delete(sender, instance, **kwargs):
-    if instance.logo:
-        try:
-            if os.path.isfile(instance.logo.path):
-                os.remove(instance.logo.path)
-        except Exception:
-            pass
-
-@receiver(pre_save, sender=Evenement)
-def delete_old_piece(sender, instance, **kwargs):
-    if not instance.pk:
-        return
-    try:
-        old = Evenement.objects.get(pk=instance.pk).piece_jointe
-    except Evenement.DoesNotExist:
+from users.claims import bump_membership_versions
+
+from .entitlements import invalidate_entitlement
+from .feed_cache import bump_feed_versions
+from .models import (
+    Membership,
+    NotificationDigestItem,
+    Organisation,
+    Publication,
+    PublicationAttachment,
+    PublicationEvent,
+    Subscription,
+    TimelineJob,
+    Tombstone,
+)
+from . import events, timeline
+from .notifications import flush_digest, notify_publication
+from .tasks import delete_stored_files
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_subscription_entitlement(sender, instance, **kwargs):
+    invalidate_entitlement(instance.organisation_id)
+    bump_feed_versions([instance.organisation_id])
+
+
+@receiver(post_save, sender=Organisation)
+@receiver(post_delete, sender=Organisation)
+def invalidate_organisation_feed(sender, instance, **kwargs):
+    bump_feed_versions([instance.pk])
+
+
+@receiver(post_save, sender=Publication)
+def publication_saved(sender, instance, created, **kwargs):
+    bump_feed_versions([instance.organisation_id])
+    if not created:
+        # Sync : la visibilité des pièces jointes suit celle de la publication
+        PublicationAttachment.objects.filter(publication_id=instance.pk).update(updated_at=instance.updated_at)
+
+    # Timeline : fan-out en tâche de fond quand elle devient publiée
+    was_published = getattr(instance, "_loaded_status", None) == Publication.STATUS_PUBLISHED
+    if instance.status == Publication.STATUS_PUBLISHED:
+        if was_published:
+            timeline.refresh_publication_date(instance)
+            events.record(PublicationEvent.TYPE_UPDATED, instance)
+        else:
+            timeline.enqueue(TimelineJob.KIND_PUBLICATION, [instance.pk])
+            # Notification des membres (tâche différée, envoi par tranches)
+            notify_publication.defer(instance.pk, dedup_key=f"notify:{instance.pk}")
+            events.record(PublicationEvent.TYPE_PUBLISHED, instance)
+    elif was_published:
+        timeline.remove_publication(instance.pk)
+        events.record(PublicationEvent.TYPE_DELETED, instance)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Publication)
+def publication_deleted(sender, instance, **kwargs):
+    bump_feed_versions([instance.organisation_id])
+    if instance.status == Publication.STATUS_PUBLISHED:
+        events.record(PublicationEvent.TYPE_DELETED, instance)
+    Tombstone.objects.create(model="publication", object_id=instance.pk, organisation_id=instance.organisation_id)
+
+
+@receiver(post_save, sender=PublicationAttachment)
+@receiver(post_delete, sender=PublicationAttachment)
+def attachment_changed(sender, instance, **kwargs):
+    # attachments_count du feed
+    organisation_id = (
+        Publication.objects.filter(pk=instance.publication_id)
+        .values_list("organisation_id", flat=True)
+        .first()
+    )
+    if kwargs["signal"] is post_delete and instance.file:
+        # Fichier retiré du stockage hors requête, après commit
+        delete_stored_files.defer([instance.file.name])
+    if organisation_id is None:
         return
-    new = instance.piece_jointe
-    if old and old != new:
-        try:
-            if os.path.isfile(old.path):
-                os.remove(old.path)
-        except Exception:
-            pass
-
-@receiver(post_delete, sender=Evenement)
-def delete_piece_on_delete(sender, instance, **kwargs):
-    if instance.piece_jointe:
-        try:
-            if os.path.isfile(instance.piece_jointe.path):
-                os.remove(instance.piece_jointe.path)
-        except Exception:
-            pass
+    bump_feed_versions([organisation_id])
+    if kwargs["signal"] is post_delete:
+        Tombstone.objects.create(model="attachment", object_id=instance.pk, organisation_id=organisation_id)
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def bump_membership_version(sender, instance, **kwargs):
+    # Invalide les claims JWT {organisation: rôle} de l'utilisateur
+    bump_membership_versions([instance.user_id])
 
+
+@receiver(post_save, sender=Membership)
+def membership_created(sender, instance, created, **kwargs):
+    if created:
+        # Rattrapage de la timeline (tâche de fond)
+        timeline.enqueue(TimelineJob.KIND_MEMBERSHIP, [instance.pk])
+
+
+@receiver(post_delete, sender=Membership)
+def membership_deleted(sender, instance, **kwargs):
+    timeline.remove_membership(instance.user_id, instance.organisation_id)
+    Tombstone.objects.create(
+        model="membership",
+        object_id=instance.pk,
+        organisation_id=instance.organisation_id,
+        user_id=instance.user_id,
+    )
+
+
+@receiver(post_save, sender=User)
+def notification_mode_changed(sender, instance, created, **kwargs):
+    # Sortie du mode résumé : les publications mises de côté ne seraient plus
+    # envoyées par send_digests (filtre sur le mode). Quotidien <-> hebdomadaire :
+    # le résumé suit le nouveau rythme.
+    loaded = getattr(instance, "_loaded_notification_mode", None)
+    mode = instance.__dict__.get("notification_mode")
+    instance._loaded_notification_mode = mode
+    if created or loaded is None or loaded == mode:
+        return
+    if mode == User.NOTIFY_OFF:
+        NotificationDigestItem.objects.filter(user_id=instance.pk).delete()
+    elif mode == User.NOTIFY_IMMEDIATE:
+        flush_digest.defer(instance.pk, dedup_key=f"digest-flush:{instance.pk}")
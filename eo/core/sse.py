@@ -0,0 +1,149 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .async_views import _query
+from .events import events_since, get_broker
+from .permissions import get_organisation_ids
+
+
+# ---------------------------------------------------------------------------
+# Flux SSE des publications (GET /api/async/events/, backend/asgi.py)
+#
+# Application ASGI brute, hors stack Django : Django 4.2 ne voit pas la
+# déconnexion d'un client pendant une réponse en streaming, et une
+# connexion inactive ne doit coûter qu'une coroutine et sa file
+# (core/events.py). Pas de middleware (métriques, compression).
+#
+# - Authentification JWT : en-tête Authorization, ou ?token= (EventSource
+#   ne peut pas envoyer d'en-têtes). Organisations fixées à la connexion.
+# - Reprise : Last-Event-ID (ou ?last_event_id=), événements manqués lus
+#   dans le journal ; "reset" si l'historique ne suffit plus.
+# - Commentaire ": ping" toutes les EO_EVENTS_HEARTBEAT_SECONDS secondes
+#   (proxies, détection des connexions mortes).
+# ---------------------------------------------------------------------------
+
+SSE_PATH = "/api/async/events/"
+HEARTBEAT_SECONDS = getattr(settings, "EO_EVENTS_HEARTBEAT_SECONDS", 15)
+RETRY_MS = 3000
+
+
+def format_event(event):
+    data = json.dumps({"id": event["publication"], "organisation": event["organisation"]})
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n".encode()
+
+
+def _reset(last_id):
+    # Le client recharge le feed ; reprise après last_id (dernier événement)
+    return f"id: {last_id}\nevent: reset\ndata: {{}}\n\n".encode()
+
+
+def _authenticate(header, token):
+    authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+    raw = authenticator.get_raw_token(header) if header else token
+    if not raw:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _organisation_ids(user):
+    ids = get_organisation_ids(user)
+    if isinstance(ids, list):
+        return ids
+    return [row["organisation_id"] for row in ids]
+
+
+async def _json(send, status, payload):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def sse_application(scope, receive, send):
+    if scope["method"] != "GET":
+        return await _json(send, 405, {"detail": "Méthode non autorisée."})
+
+    headers = dict(scope["headers"])
+    query = {key: values[-1] for key, values in parse_qs(scope["query_string"].decode()).items()}
+    user = await _query(lambda: _authenticate(headers.get(b"authorization"), query.get("token")))
+    if user is None:
+        return await _json(send, 401, {"detail": "Informations d'authentification non fournies."})
+
+    try:
+        last_id = int(headers.get(b"last-event-id", b"").decode() or query.get("last_event_id") or 0)
+    except ValueError:
+        last_id = 0
+
+    organisation_ids = await _query(lambda: _organisation_ids(user))
+    broker = get_broker()
+    # Abonné avant de lire le journal : rien ne passe entre les deux
+    subscription = broker.subscribe(organisation_ids)
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    get = None
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": f"retry: {RETRY_MS}\n\n".encode(), "more_body": True})
+
+        # Ids rejoués depuis le journal : déjà envoyés s'ils arrivent aussi en
+        # direct. Pas de filtre "id <= dernier envoyé" : les ids suivent
+        # l'ordre d'insertion, pas celui des commits, un événement d'id plus
+        # petit peut être diffusé après un plus grand.
+        replayed = set()
+        if last_id:
+            backlog, reset = await _query(lambda: events_since(last_id, organisation_ids))
+            if reset is not None:
+                await send({"type": "http.response.body", "body": _reset(reset), "more_body": True})
+            for event in backlog:
+                await send({"type": "http.response.body", "body": format_event(event), "more_body": True})
+            replayed = {event["id"] for event in backlog}
+
+        while True:
+            if get is None:
+                get = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                return
+            if get not in done:
+                body = b": ping\n\n"
+            elif subscription.overflow:
+                # Client trop lent : il se reconnecte et rattrape par Last-Event-ID
+                break
+            else:
+                event, get = get.result(), None
+                if event["id"] in replayed:
+                    replayed.discard(event["id"])
+                    continue
+                body = format_event(event)
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        broker.unsubscribe(subscription)
+        disconnect.cancel()
+        if get is not None:
+            get.cancel()
@@ -0,0 +1,186 @@
+import base64
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Membership, Organisation, Publication, PublicationAttachment, Tombstone
+from .serializers import (
+    MembershipSerializer,
+    OrganisationSerializer,
+    PublicationAttachmentSerializer,
+    PublicationSerializer,
+)
+
+
+# ---------------------------------------------------------------------------
+# Synchronisation différentielle (GET /api/sync/?since=<token>)
+#
+# Chaque ligne synchronisée porte updated_at (auto_now) ; une suppression
+# laisse une Tombstone (core/signals.py). Le token encode la position
+# (horodatage, type, id) du dernier changement renvoyé : la page suivante
+# reprend strictement après, chaque type étant lu par index
+# (organisation, updated_at) puis fusionné. Une page = une requête par
+# type, quel que soit le volume : le coût suit le nombre de changements.
+#
+# - Fenêtre de stabilisation (EO_SYNC_SETTLE_SECONDS) : seuls les
+#   changements plus vieux que quelques secondes sont renvoyés, pour qu'une
+#   transaction pas encore commitée (updated_at antérieur au commit) ne
+#   passe pas derrière un token déjà délivré.
+# - Membre (non staff) : une publication non publiée, et ses pièces
+#   jointes, sont renvoyées en "delete" (repassée en brouillon / archivée).
+#   Un changement de statut touche updated_at des pièces jointes.
+# - Membership de l'utilisateur créée : synchroniser cette organisation
+#   depuis zéro (?organisation=<id> sans since).
+# - queryset.update() ne met pas updated_at à jour : à passer explicitement.
+# ---------------------------------------------------------------------------
+
+SYNC_PAGE_SIZE = getattr(settings, "EO_SYNC_PAGE_SIZE", 200)
+SYNC_SETTLE_SECONDS = getattr(settings, "EO_SYNC_SETTLE_SECONDS", 2)
+TOMBSTONE_RETENTION_DAYS = getattr(settings, "EO_SYNC_TOMBSTONE_RETENTION_DAYS", 90)
+
+# Ordre de fusion à horodatage égal
+KINDS = ("organisation", "publication", "attachment", "membership", "tombstone")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_START = (_EPOCH, -1, 0)
+
+# Champs renvoyés (serializers existants, réduits via SparseFieldsMixin)
+_PUBLICATION_FIELDS = frozenset(PublicationSerializer().fields) - {"attachments"}
+# file_size : lecture du stockage par fichier
+_ATTACHMENT_FIELDS = frozenset(PublicationAttachmentSerializer().fields) - {"file_size"}
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Token de synchronisation expiré : resynchroniser depuis zéro."
+    default_code = "sync_expired"
+
+
+_MAX_INT = 2 ** 63
+
+
+def encode_token(position):
+    moment, rank, pk = position
+    micros = (moment - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{rank}:{pk}".encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        micros, rank, pk = (int(part) for part in raw.split(":"))
+        moment = _EPOCH + timedelta(microseconds=micros)
+    except (ValueError, OverflowError):
+        # OverflowError : micros hors des bornes de datetime
+        raise ValidationError({"since": "Token invalide."})
+    if not (0 <= rank < _MAX_INT and 0 <= pk < _MAX_INT):
+        # Entier hors des colonnes SQL (64 bits)
+        raise ValidationError({"since": "Token invalide."})
+    return moment, rank, pk
+
+
+def _after(queryset, field, rank, position):
+    moment, position_rank, pk = position
+    if rank > position_rank:
+        return queryset.filter(**{f"{field}__gte": moment})
+    if rank < position_rank:
+        return queryset.filter(**{f"{field}__gt": moment})
+    return queryset.filter(Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "pk__gt": pk}))
+
+
+def _sources(user, organisation_ids):
+    """
+    kind -> (queryset scopé, champ horodatage)
+    """
+    return {
+        "organisation": (
+            Organisation.objects.filter(pk__in=organisation_ids).select_related("subscription"),
+            "updated_at",
+        ),
+        "publication": (Publication.objects.filter(organisation_id__in=organisation_ids), "updated_at"),
+        "attachment": (
+            PublicationAttachment.objects.filter(publication__organisation_id__in=organisation_ids)
+            .annotate(publication_status=F("publication__status")),
+            "updated_at",
+        ),
+        "membership": (
+            Membership.objects.filter(organisation_id__in=organisation_ids).select_related("user", "organisation"),
+            "updated_at",
+        ),
+        "tombstone": (
+            Tombstone.objects.filter(Q(organisation_id__in=organisation_ids) | Q(user_id=user.pk)),
+            "deleted_at",
+        ),
+    }
+
+
+def sync_page(request, organisation_ids, since=None, limit=SYNC_PAGE_SIZE):
+    """
+    -> {"changes": [...], "next": token, "has_more": bool}
+    """
+    now = timezone.now()
+    position = decode_token(since) if since else _START
+    if since and position[0] < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        # Tombstones plus anciennes purgées : suppressions potentiellement perdues
+        raise SyncTokenExpired()
+    until = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+    merged = []
+    for kind, (queryset, field) in _sources(request.user, organisation_ids).items():
+        rank = KINDS.index(kind)
+        rows = (
+            _after(queryset, field, rank, position)
+            .filter(**{f"{field}__lte": until})
+            .order_by(field, "pk")[:limit]
+        )
+        merged.extend(((getattr(obj, field), rank, obj.pk), kind, obj) for obj in rows)
+    merged.sort(key=lambda item: item[0])
+    page = merged[:limit]
+
+    staff = request.user.is_staff or request.user.is_superuser
+    upserts = {kind: [] for kind in KINDS}
+    for _, kind, obj in page:
+        if kind == "publication" and not staff and obj.status != Publication.STATUS_PUBLISHED:
+            continue
+        if kind == "attachment" and not staff and obj.publication_status != Publication.STATUS_PUBLISHED:
+            continue
+        if kind != "tombstone":
+            upserts[kind].append(obj)
+
+    context = {"request": request}
+    data = {}
+    for kind, serializer_class, fields in (
+        ("organisation", OrganisationSerializer, None),
+        ("publication", PublicationSerializer, _PUBLICATION_FIELDS),
+        ("attachment", PublicationAttachmentSerializer, _ATTACHMENT_FIELDS),
+        ("membership", MembershipSerializer, None),
+    ):
+        if upserts[kind]:
+            serializer_context = {**context, "fields": fields, "expand": ()} if fields else context
+            serialized = serializer_class(upserts[kind], many=True, context=serializer_context).data
+            data.update({(kind, obj.pk): item for obj, item in zip(upserts[kind], serialized)})
+
+    changes = []
+    for _, kind, obj in page:
+        if kind == "tombstone":
+            changes.append({"type": obj.model, "id": obj.object_id, "op": "delete"})
+        elif (kind, obj.pk) in data:
+            changes.append({"type": kind, "id": obj.pk, "op": "upsert", "data": data[(kind, obj.pk)]})
+        else:
+            changes.append({"type": kind, "id": obj.pk, "op": "delete"})
+
+    return {
+        "changes": changes,
+        "next": encode_token(page[-1][0]) if page else (since or encode_token(_START)),
+        "has_more": len(merged) > limit,
+    }
+
+
+def prune_tombstones(days=TOMBSTONE_RETENTION_DAYS):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,208 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from backend.sqlite_tuned import atomic_immediate
+
+from .models import PublicationAttachment, Task
+
+
+# ---------------------------------------------------------------------------
+# File de tâches différées (en base, sans broker)
+#
+#   @task()
+#   def ma_tache(a, b): ...
+#
+#   ma_tache.defer(1, 2, dedup_key="ma-tache:1")
+#
+# defer() insère la tâche au commit de la transaction courante
+# (transaction.on_commit) : rien n'est exécuté pour une requête annulée, et
+# le worker ne voit jamais une tâche avant les données qu'elle lit.
+# Arguments JSON uniquement. La commande run_tasks réclame des lots
+# (select_for_update skip_locked) et les exécute dans un pool de threads
+# ou de processus.
+#
+# - dedup_key : une seule tâche en attente / en cours par clé, les
+#   doublons sont ignorés à l'insertion.
+# - Échec : nouvel essai après EO_TASK_BACKOFF_SECONDS * 2^(essai - 1)
+#   (plafonné, avec gigue), échec définitif après max_attempts.
+# - Bail : une tâche réclamée par un worker tué est reprise après
+#   EO_TASK_LEASE_SECONDS. Les tâches doivent donc être idempotentes.
+# ---------------------------------------------------------------------------
+
+TASK_MAX_ATTEMPTS = getattr(settings, "EO_TASK_MAX_ATTEMPTS", 5)
+TASK_BACKOFF_SECONDS = getattr(settings, "EO_TASK_BACKOFF_SECONDS", 10)
+TASK_BACKOFF_MAX_SECONDS = getattr(settings, "EO_TASK_BACKOFF_MAX_SECONDS", 3600)
+TASK_LEASE_SECONDS = getattr(settings, "EO_TASK_LEASE_SECONDS", 300)
+
+_registry = {}
+
+
+class TaskFunction:
+    """
+    Fonction enregistrée : appel direct = exécution immédiate,
+    defer() = exécution différée par un worker.
+    """
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def defer(self, *args, dedup_key=None, delay=0, **kwargs):
+        enqueue(self.name, args, kwargs, dedup_key=dedup_key, delay=delay, max_attempts=self.max_attempts)
+
+
+def task(name=None, max_attempts=TASK_MAX_ATTEMPTS):
+    def decorator(func):
+        # Nom = chemin d'import : résolu aussi dans un processus qui n'a pas
+        # encore importé le module
+        wrapped = TaskFunction(func, name or f"{func.__module__}.{func.__qualname__}", max_attempts)
+        _registry[wrapped.name] = wrapped
+        return wrapped
+
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, dedup_key=None, delay=0, max_attempts=TASK_MAX_ATTEMPTS):
+    row = Task(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        dedup_key=dedup_key,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    # Doublon (dedup_key) : contrainte unique partielle, ignoré
+    transaction.on_commit(lambda: Task.objects.bulk_create([row], ignore_conflicts=True))
+
+
+def _resolve(name):
+    if name not in _registry:
+        import_string(name)
+    return _registry[name]
+
+
+# -------------------------------------------------------
+# Worker
+# -------------------------------------------------------
+def backoff(attempt):
+    delay = min(TASK_BACKOFF_MAX_SECONDS, TASK_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def recover_expired():
+    """
+    Tâches dont le worker a disparu (bail expiré) : de nouveau en attente.
+    """
+    return Task.objects.filter(status=Task.STATUS_RUNNING, locked_until__lt=timezone.now()).update(
+        status=Task.STATUS_PENDING, locked_until=None
+    )
+
+
+def claim(limit):
+    """
+    Réserve jusqu'à `limit` tâches dues (bail + essai compté). Retourne leurs ids.
+    """
+    now = timezone.now()
+    with atomic_immediate():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.STATUS_PENDING, run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        Task.objects.filter(pk__in=ids).update(
+            status=Task.STATUS_RUNNING,
+            locked_until=now + timedelta(seconds=TASK_LEASE_SECONDS),
+            attempts=F("attempts") + 1,
+        )
+    return ids
+
+
+def run_task(task_id):
+    """
+    Exécute une tâche réclamée. Retourne True si elle a réussi.
+    """
+    row = Task.objects.filter(pk=task_id, status=Task.STATUS_RUNNING).first()
+    if row is None:
+        return False
+    try:
+        _resolve(row.name).func(*row.args, **row.kwargs)
+    except Exception as exc:
+        if row.attempts >= row.max_attempts:
+            changes = {"status": Task.STATUS_FAILED}
+        else:
+            changes = {
+                "status": Task.STATUS_PENDING,
+                "run_at": timezone.now() + timedelta(seconds=backoff(row.attempts)),
+            }
+        Task.objects.filter(pk=row.pk).update(
+            locked_until=None, last_error=f"{type(exc).__name__}: {exc}", **changes
+        )
+        return False
+    Task.objects.filter(pk=row.pk).delete()
+    return True
+
+
+def _run_pooled(task_id):
+    try:
+        return run_task(task_id)
+    finally:
+        # Threads / processus du pool : connexions propres à chaque tâche
+        close_old_connections()
+
+
+def run_pending(batch_size=50, executor=None):
+    """
+    Réclame et exécute un lot (dans `executor` s'il est fourni).
+    Retourne le nombre de tâches réclamées (0 : rien à faire).
+    """
+    recover_expired()
+    ids = claim(batch_size)
+    if not ids:
+        return 0
+    if executor is None:
+        for task_id in ids:
+            run_task(task_id)
+    else:
+        if isinstance(executor, ProcessPoolExecutor):
+            # Pas de connexion partagée avec les processus forkés
+            connections.close_all()
+        list(executor.map(_run_pooled, ids))
+    return len(ids)
+
+
+def retry_failed(queryset):
+    """
+    Relance des tâches en échec définitif (nouveaux essais).
+    """
+    # Clé déjà reprise par une tâche plus récente : pas de doublon
+    active = Task.objects.filter(
+        status__in=[Task.STATUS_PENDING, Task.STATUS_RUNNING], dedup_key__isnull=False
+    ).values("dedup_key")
+    return queryset.filter(status=Task.STATUS_FAILED).exclude(dedup_key__in=active).update(
+        status=Task.STATUS_PENDING, attempts=0, run_at=timezone.now()
+    )
+
+
+# -------------------------------------------------------
+# Tâches
+# -------------------------------------------------------
+@task()
+def delete_stored_files(names):
+    """
+    Retire des fichiers du stockage des pièces jointes (déjà absents : ignoré).
+    """
+    storage = PublicationAttachment._meta.get_field("file").storage
+    for name in names:
+        storage.delete(name)
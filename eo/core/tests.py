@@ -1,3 +1,1691 @@
-from django.test import TestCase
+import asyncio
+import base64
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, OperationalError, connection, connections, transaction
+from django.db.models import Count
+from django.db.utils import load_backend
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware, get_token
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.claims import add_membership_claims
+
+from backend.compression import CompressionMiddleware, negotiate
+from backend.db_router import REPLICA_DB_ALIAS, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from backend.metrics import MetricsMiddleware
+from backend.sqlite_tuned import atomic_immediate
+from backend.sqlite_tuned.base import DatabaseWrapper as TunedDatabaseWrapper
+from backend.urls import router
+
+from .admin_jobs import create_job, process_chunk, process_pending_jobs as process_admin_jobs
+from .archive import archive_batch, restore_publications
+from .async_views import _authenticate
+from .billing import SIGNATURE_HEADER, FakePaymentProvider, process_pending_events
+from .entitlements import HasActiveSubscription, get_entitlement, invalidate_entitlement, is_entitled
+from .models import (
+    AdminBulkJob,
+    ArchivedPublication,
+    BillingEvent,
+    Membership,
+    NotificationDigestItem,
+    Organisation,
+    Publication,
+    PublicationAttachment,
+    PublicationEvent,
+    Subscription,
+    Task,
+    TimelineEntry,
+    TimelineJob,
+)
+from .events import SocketBroker, events_since, get_broker
+from .notifications import send_digests
+from .sync import encode_token
+from .tasks import enqueue, run_pending, task
+from .timeline import process_pending_jobs
+from .renderers import ORJSONRenderer
+from .sse import sse_application
+from .serializers import MembershipSerializer, PublicationListSerializer, SubscriptionSerializer
+
+User = get_user_model()
+
+
+# ---------------------------------------------------------------------------
+# Budgets de requêtes SQL
+#
+# Chaque endpoint list/detail (et action GET) des viewsets enregistrés a un
+# budget fixe. On le mesure sur un petit jeu de données, puis après avoir
+# multiplié les lignes : le nombre de requêtes doit rester identique (pas de
+# N+1) et ne pas dépasser le budget.
+#
+# Les SELECT capturés passent ensuite par EXPLAIN : un scan complet de table
+# (SQLite "SCAN <table>", PostgreSQL "Seq Scan" avec enable_seqscan=off)
+# fait échouer le test.
+# ---------------------------------------------------------------------------
+
+class OrganisationFactory:
+    """
+    Jeux de données de test. Compteur propre à l'instance (une par classe
+    de test, cf. setUpTestData) : noms et slugs uniques sans état global.
+    """
+
+    def __init__(self):
+        self.sequence = 0
+
+    def next(self):
+        self.sequence += 1
+        return self.sequence
+
+    def seed(self, member, count, publications=3, attachments=2, members=3, role="admin"):
+        """
+        Crée `count` organisations (abonnement, publications publiées et
+        brouillons, événements à venir, pièces jointes, autres membres) dont
+        `member` est membre avec `role`. Retourne les organisations.
+        """
+        now = timezone.now()
+        organisations = []
+        for _ in range(count):
+            n = self.next()
+            organisation = Organisation.objects.create(nom=f"Organisation {n}", slug=f"organisation-{n}")
+            Subscription.objects.create(organisation=organisation, status=Subscription.Status.ACTIVE)
+            if member is not None:
+                Membership.objects.create(user=member, organisation=organisation, role=role)
+
+            for i in range(members):
+                other = User.objects.create_user(
+                    username=f"membre-{n}-{i}", email=f"membre-{n}-{i}@example.com", password=None
+                )
+                Membership.objects.create(user=other, organisation=organisation, role="member")
+
+            for i in range(publications):
+                publication = Publication.objects.create(
+                    organisation=organisation,
+                    titre=f"Publication {n}-{i}",
+                    contenu="Contenu " * 40,
+                    type=Publication.TYPE_EVENEMENT if i % 2 else Publication.TYPE_INFORMATION,
+                    status=Publication.STATUS_DRAFT if i % 3 == 2 else Publication.STATUS_PUBLISHED,
+                    event_start=now + timezone.timedelta(days=i + 1) if i % 2 else None,
+                )
+                for j in range(attachments):
+                    PublicationAttachment.objects.create(
+                        publication=publication,
+                        file=f"attachments/{n}-{i}-{j}.pdf",
+                        display_name=f"PJ {j}",
+                    )
+            organisations.append(organisation)
+        return organisations
+
+
+class _QueryRecorder:
+    # execute_wrapper : garde (sql, params) pour pouvoir rejouer EXPLAIN
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?!subquery|\(subquery|CONSTANT ROW)(\S+)")
+
+
+def full_scans(queries):
+    """
+    Lignes de plan qui parcourent une table entière, pour chaque SELECT.
+    """
+    found = []
+    selects = [(sql, params) for sql, params in queries if sql.lstrip().upper().startswith("SELECT")]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for sql, params in selects:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                for row in cursor.fetchall():
+                    if _SQLITE_FULL_SCAN.match(row[-1]):
+                        found.append((row[-1], sql))
+        elif connection.vendor == "postgresql":
+            # Petites tables de test : sans ça, le planner préfère toujours Seq Scan
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                for sql, params in selects:
+                    cursor.execute("EXPLAIN " + sql, params)
+                    for (line,) in cursor.fetchall():
+                        if "Seq Scan" in line:
+                            found.append((line.strip(), sql))
+            finally:
+                cursor.execute("RESET enable_seqscan")
+    return found
+
+
+class MemberTestCase(TestCase):
+    """
+    Utilisateur "membre" de ORGANISATIONS organisations (rôle ROLE, SEED :
+    options de OrganisationFactory.seed) et FOREIGN organisations dont il ne
+    fait pas partie. self.client est authentifié en tant que membre :
+    force_authenticate, ou login réel + Bearer si PASSWORD est défini.
+    """
+
+    ORGANISATIONS = 2
+    FOREIGN = 0
+    ROLE = "admin"
+    SEED = {}
+    PASSWORD = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = User.objects.create_user(
+            username="membre", email="membre@example.com", password=cls.PASSWORD
+        )
+        cls.factory = OrganisationFactory()
+        cls.organisations = cls.factory.seed(cls.member, cls.ORGANISATIONS, role=cls.ROLE, **cls.SEED)
+        cls.foreign = cls.factory.seed(None, cls.FOREIGN, **cls.SEED)
+
+    def setUp(self):
+        # Feed, versions de memberships, throttling du login : cache
+        cache.clear()
+        self.client = APIClient()
+        if self.PASSWORD is None:
+            self.client.force_authenticate(self.member)
+        else:
+            self.login()
+
+    def login(self, password=None):
+        response = self.client.post(
+            reverse("jwt-login"),
+            {"email": self.member.email, "password": password or self.PASSWORD},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+
+class QueryBudgetMixin:
+    """
+    À combiner avec MemberTestCase. Les sous-classes définissent
+    QUERY_BUDGETS {nom d'url: budget} et endpoints() -> {nom d'url: chemin}.
+    """
+
+    QUERY_BUDGETS = {}
+    # Organisation dont le membre ne fait pas partie
+    FOREIGN = 1
+
+    def setUp(self):
+        self.assertTrue(
+            callable(getattr(self, "endpoints", None)), f"{type(self).__name__} : endpoints() manquant"
+        )
+        super().setUp()
+
+    def record(self, path):
+        recorder = _QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, f"{path} : {response.status_code}")
+        return recorder.queries
+
+    def grow(self):
+        # x4 organisations du membre, plus de lignes par organisation
+        self.factory.seed(self.member, 6, publications=8, attachments=4, members=6)
+        self.factory.seed(None, 3, publications=8, attachments=4, members=6)
+
+    def test_query_budget_independent_of_row_count(self):
+        small = {name: len(self.record(path)) for name, path in self.endpoints().items()}
+        self.grow()
+        large = {name: len(self.record(path)) for name, path in self.endpoints().items()}
+
+        for name, budget in self.QUERY_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(
+                    small[name], large[name],
+                    f"{name} : {small[name]} -> {large[name]} requêtes (N+1 ?)",
+                )
+                self.assertLessEqual(large[name], budget, f"{name} : budget {budget} dépassé")
+
+    def test_no_full_table_scan(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest("EXPLAIN non interprété pour ce moteur")
+        self.grow()
+        for name, path in self.endpoints().items():
+            with self.subTest(endpoint=name):
+                scans = full_scans(self.record(path))
+                self.assertEqual(scans, [], f"{name} : scan complet")
+
+
+# -------------------------------------------------------
+# Viewsets enregistrés dans backend/urls.py
+# -------------------------------------------------------
+class ViewSetQueryBudgetTests(QueryBudgetMixin, MemberTestCase):
+
+    QUERY_BUDGETS = {
+        "organisation-list": 2,
+        "organisation-detail": 1,
+        "organisation-subscription": 2,
+        "organisation-batch": 2,
+        "publication-list": 2,
+        "publication-detail": 2,
+        "publication-upcoming": 2,
+        "publication-attachments": 2,
+        "publication-batch": 3,
+        "attachment-list": 2,
+        "attachment-detail": 1,
+        "membership-list": 2,
+        "membership-detail": 1,
+    }
+
+    def endpoints(self):
+        organisation = self.organisations[0]
+        publication = organisation.publications.filter(status=Publication.STATUS_PUBLISHED).first()
+        detail_objects = {
+            "organisation": organisation,
+            "publication": publication,
+            "attachment": publication.attachments.first(),
+            "membership": organisation.memberships.get(user=self.member),
+        }
+
+        paths = {}
+        for prefix, viewset, basename in router.registry:
+            lookup = {viewset.lookup_field: getattr(detail_objects[basename], viewset.lookup_field)}
+            paths[f"{basename}-list"] = reverse(f"{basename}-list")
+            paths[f"{basename}-detail"] = reverse(f"{basename}-detail", kwargs=lookup)
+            for action in viewset.get_extra_actions():
+                if "get" not in action.mapping:
+                    continue
+                name = f"{basename}-{action.url_name}"
+                paths[name] = reverse(name, kwargs=lookup if action.detail else None)
+                if action.url_name == "batch":
+                    # Visibles, interdits et un id inexistant
+                    model = type(detail_objects[basename])
+                    ids = list(model.objects.order_by("-pk").values_list("pk", flat=True)[:50]) + [0]
+                    paths[name] += "?ids=" + ",".join(map(str, ids))
+        return paths
+
+    def test_every_endpoint_has_a_budget(self):
+        # Nouveau viewset / action GET => ajouter son budget ici
+        self.assertEqual(set(self.endpoints()), set(self.QUERY_BUDGETS))
+
+    def test_list_scoped_to_member_organisations(self):
+        self.grow()
+        response = self.client.get(reverse("organisation-list"))
+        member_orgs = Membership.objects.filter(user=self.member).count()
+        self.assertEqual(response.data["count"], member_orgs)
+
+
+# -------------------------------------------------------
+# Login réel + Authorization: Bearer (claims, users/authentication.py)
+# -------------------------------------------------------
+class BearerTokenTests(MemberTestCase):
+
+    ROLE = "member"
+    FOREIGN = 1
+    PASSWORD = "mot-de-passe-de-test"
+
+    def test_same_results_as_session_user(self):
+        bearer = self.client.get(reverse("publication-list")).json()
+        other = APIClient()
+        other.force_authenticate(self.member)
+        self.assertEqual(bearer, other.get(reverse("publication-list")).json())
+        self.assertEqual(
+            {o["id"] for o in self.client.get(reverse("organisation-list")).json()["results"]},
+            {o.pk for o in self.organisations},
+        )
+        path = reverse("publication-detail", args=[self.foreign[0].publications.first().pk])
+        self.assertEqual(self.client.get(path).status_code, 404)
+
+    def test_no_user_query(self):
+        self.client.get(reverse("organisation-list"))
+        # Version des memberships en cache : plus aucune lecture de users_user
+        recorder = _QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            self.assertEqual(self.client.get(reverse("organisation-list")).status_code, 200)
+        self.assertFalse([sql for sql, _ in recorder.queries if "users_user" in sql])
+
+    def test_membership_change_requires_refresh(self):
+        tokens = self.login()
+        Membership.objects.filter(user=self.member, organisation=self.organisations[0]).delete()
+        self.assertEqual(self.client.get(reverse("organisation-list")).status_code, 401)
+
+        refreshed = self.client.post(reverse("jwt-refresh"), {"refresh": tokens["refresh"]}, format="json")
+        self.assertEqual(refreshed.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+        response = self.client.get(reverse("organisation-list"))
+        self.assertEqual([o["id"] for o in response.json()["results"]], [self.organisations[1].pk])
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(self.client.get(reverse("publication-list")).status_code, 401)
+
+
+# -------------------------------------------------------
+# Droits d'abonnement (core/entitlements.py)
+# -------------------------------------------------------
+@override_settings(EO_TIMELINE_FEED=False)
+class AsyncReadViewTests(TransactionTestCase):
+    """
+    Endpoints async (core/async_views.py) : même JSON que les viewsets DRF.
+    TransactionTestCase : _query() lit depuis d'autres threads (autres
+    connexions), qui ne voient que des données commitées.
+    """
+
+    PASSWORD = "mot-de-passe-membre"
+
+    def setUp(self):
+        # Ids réutilisés après flush : versions de memberships en cache périmées
+        cache.clear()
+        self.member = User.objects.create_user(username="membre", email="membre@example.com", password=self.PASSWORD)
+        factory = OrganisationFactory()
+        # 12 publiées par organisation : deux pages de feed
+        self.organisations = factory.seed(self.member, 2, publications=18, role="member")
+        self.foreign = factory.seed(None, 1, publications=3)
+        self.client = APIClient()
+        response = self.client.post(
+            reverse("jwt-login"), {"email": self.member.email, "password": self.PASSWORD}, format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def assertSamePayload(self, async_path, drf_path):
+        async_response = self.client.get(async_path)
+        drf_response = self.client.get(drf_path)
+        self.assertEqual(async_response.status_code, 200, async_response.content)
+        self.assertEqual(drf_response.status_code, 200, drf_response.content)
+        # Seuls les liens de pagination portent le chemin /api/async/
+        payload = json.loads(async_response.content.replace(b"/api/async/", b"/api/"))
+        self.assertEqual(payload, json.loads(drf_response.content))
+        return payload
+
+    def test_feed(self):
+        first = self.assertSamePayload(reverse("async-publication-feed"), reverse("publication-list"))
+        self.assertEqual(first["count"], 24)
+        self.assertIsNotNone(first["next"])
+        last = self.assertSamePayload(
+            reverse("async-publication-feed") + "?page=2", reverse("publication-list") + "?page=2"
+        )
+        self.assertIsNotNone(last["previous"])
+        slug = self.organisations[1].slug
+        self.assertSamePayload(
+            reverse("async-publication-feed") + f"?organisation__slug={slug}&type=evenement",
+            reverse("publication-list") + f"?organisation__slug={slug}&type=evenement",
+        )
+
+    def test_upcoming(self):
+        payload = self.assertSamePayload(
+            reverse("async-publication-upcoming"), reverse("publication-upcoming")
+        )
+        self.assertTrue(payload["results"])
+
+    def test_attachments(self):
+        publication = Publication.objects.filter(
+            organisation=self.organisations[0], status=Publication.STATUS_PUBLISHED
+        ).first()
+        payload = self.assertSamePayload(
+            reverse("async-publication-attachments", args=[publication.pk]),
+            reverse("publication-attachments", args=[publication.pk]),
+        )
+        self.assertEqual(len(payload), 2)
+
+    def test_organisation_detail(self):
+        slug = self.organisations[0].slug
+        self.assertSamePayload(
+            reverse("async-organisation-detail", args=[slug]), reverse("organisation-detail", args=[slug])
+        )
+
+    def test_errors(self):
+        foreign = self.foreign[0]
+        draft = Publication.objects.filter(
+            organisation=self.organisations[0], status=Publication.STATUS_DRAFT
+        ).first()
+        not_found = [
+            reverse("async-organisation-detail", args=[foreign.slug]),
+            reverse("async-publication-attachments", args=[foreign.publications.first().pk]),
+            reverse("async-publication-attachments", args=[draft.pk]),
+            reverse("async-publication-feed") + "?page=3",
+            reverse("async-publication-upcoming") + "?page=2",
+        ]
+        for path in not_found:
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+        self.client.credentials()
+        for path in (
+            reverse("async-publication-feed"),
+            reverse("async-publication-upcoming"),
+            reverse("async-publication-attachments", args=[draft.pk]),
+            reverse("async-organisation-detail", args=[self.organisations[0].slug]),
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalide")
+        self.assertEqual(self.client.get(reverse("async-publication-feed")).status_code, 401)
+
+
+class EntitlementTests(MemberTestCase):
+
+    ORGANISATIONS = 1
+    SEED = {"attachments": 0, "members": 0}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.organisation = cls.organisations[0]
+        cls.publication = cls.organisation.publications.first()
+
+    def patch(self):
+        return self.client.patch(
+            reverse("publication-detail", args=[self.publication.pk]), {"titre": "Modifiée"}, format="json"
+        )
+
+    def test_cached_until_subscription_changes(self):
+        self.assertTrue(is_entitled(get_entitlement(self.organisation.pk)))
+        with self.assertNumQueries(0):
+            get_entitlement(self.organisation.pk)
+
+        subscription = self.organisation.subscription
+        subscription.status = Subscription.Status.CANCELED
+        subscription.save()
+        with self.assertNumQueries(1):
+            entitlement = get_entitlement(self.organisation.pk)
+        self.assertFalse(is_entitled(entitlement))
+        self.assertEqual(entitlement["limits"]["max_attachment_size"], 0)
+
+        subscription.delete()
+        self.assertIsNone(get_entitlement(self.organisation.pk)["status"])
+
+    def test_writes_require_active_subscription(self):
+        self.assertEqual(self.patch().status_code, 200)
+
+        Subscription.objects.filter(organisation=self.organisation).update(
+            status=Subscription.Status.TRIALING, trial_end=timezone.now() - timedelta(days=1)
+        )
+        # queryset.update() : pas de signal, l'entrée en cache reste valable
+        self.assertEqual(self.patch().status_code, 200)
+        invalidate_entitlement(self.organisation.pk)
+
+        response = self.patch()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(str(response.data["detail"]), HasActiveSubscription.message)
+        created = self.client.post(
+            reverse("publication-list"),
+            {"organisation": self.organisation.pk, "titre": "Nouvelle", "contenu": "…"},
+            format="json",
+        )
+        self.assertEqual(created.status_code, 403)
+        # Lecture toujours autorisée
+        self.assertEqual(self.client.get(reverse("publication-detail", args=[self.publication.pk])).status_code, 200)
+
+    def test_staff_bypass(self):
+        Subscription.objects.filter(organisation=self.organisation).update(status=Subscription.Status.CANCELED)
+        self.member.is_staff = True
+        self.assertEqual(self.patch().status_code, 200)
+
+
+# -------------------------------------------------------
+# Webhooks de facturation (core/billing.py)
+# -------------------------------------------------------
+@override_settings(EO_BILLING_WEBHOOK_SECRET="whsec_test")
+class BillingWebhookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisation = OrganisationFactory().seed(None, 1, publications=0, members=0)[0]
+
+    def setUp(self):
+        self.provider = FakePaymentProvider(secret="whsec_test")
+
+    def post(self, event, signature=None):
+        body, header = self.provider.sign(event)
+        return self.client.post(
+            reverse("billing-webhook"), data=body, content_type="application/json",
+            **{SIGNATURE_HEADER: signature or header},
+        )
+
+    def subscription(self):
+        return Subscription.objects.get(organisation=self.organisation)
+
+    def test_signature(self):
+        event = self.provider.subscription_event(self.organisation.pk)
+        header = self.provider.sign(event)[1]
+        self.assertEqual(self.post(event, header.replace("v1=", "v1=0")).status_code, 400)
+        expired = self.provider.sign(event, timestamp=int(time.time()) - 3600)[1]
+        self.assertEqual(self.post(event, expired).status_code, 400)
+        self.assertEqual(self.post(event, FakePaymentProvider(secret="autre").sign(event)[1]).status_code, 400)
+        with override_settings(EO_BILLING_WEBHOOK_SECRET=""):
+            self.assertEqual(self.post(event).status_code, 400)
+        self.assertFalse(BillingEvent.objects.exists())
+        self.assertEqual(self.post(event).status_code, 200)
+
+    def test_replayed_event_recorded_once(self):
+        event = self.provider.subscription_event(self.organisation.pk, status="canceled")
+        self.assertEqual(self.post(event).json(), {"received": True, "duplicate": False})
+        self.assertEqual(self.post(event).json(), {"received": True, "duplicate": True})
+        self.assertEqual(BillingEvent.objects.count(), 1)
+        self.assertEqual(process_pending_events(), 1)
+        self.assertEqual(process_pending_events(), 0)
+        self.assertEqual(self.subscription().status, Subscription.Status.CANCELED)
+
+    def test_late_older_event_ignored(self):
+        older = self.provider.subscription_event(self.organisation.pk, status="active")
+        newer = self.provider.subscription_event(self.organisation.pk, status="canceled")
+        self.post(newer)
+        process_pending_events()
+        # Livré après coup : ne réactive pas l'abonnement
+        self.post(older)
+        self.assertEqual(process_pending_events(), 1)
+        self.assertEqual(self.subscription().status, Subscription.Status.CANCELED)
+        self.assertIn("périmé", BillingEvent.objects.get(event_id=older["id"]).error)
+
+        # Même lot, reçus dans le désordre : ordre du prestataire
+        latest = self.provider.subscription_event(self.organisation.pk, status="active")
+        late = self.provider.subscription_event(self.organisation.pk, status="canceled")
+        late["created"], latest["created"] = latest["created"], late["created"]
+        self.post(latest)
+        self.post(late)
+        process_pending_events()
+        self.assertEqual(self.subscription().status, Subscription.Status.ACTIVE)
+
+
+# -------------------------------------------------------
+# Lecture rapide + orjson : même JSON que DRF
+# -------------------------------------------------------
+class FastSerializerTests(MemberTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Cas limites : pas d'abonnement, contenu vide / unicode, dates nulles
+        organisation = Organisation.objects.create(nom="Sans abonnement", slug="sans-abonnement")
+        Publication.objects.create(
+            organisation=organisation, titre="Vide", contenu="", status=Publication.STATUS_PUBLISHED
+        )
+        Publication.objects.create(
+            organisation=organisation,
+            titre="Unicode « é » \u2028",
+            contenu="Événement ☀ \u2029 " * 20,
+            type=Publication.TYPE_EVENEMENT,
+            event_start=timezone.now(),
+        )
+
+    def assertSameJSON(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        fast = ORJSONRenderer().render(serializer_class.fast_data(serializer_class.fast_values(queryset)))
+        self.assertEqual(fast, expected)
+
+    def test_publication_list(self):
+        queryset = (
+            Publication.objects.select_related("organisation", "organisation__subscription")
+            .annotate(attachments_count=Count("attachments"))
+            .order_by("-date_publication")
+        )
+        self.assertSameJSON(PublicationListSerializer, queryset)
+
+    def test_membership(self):
+        self.assertSameJSON(MembershipSerializer, Membership.objects.select_related("user", "organisation"))
+
+    def test_subscription(self):
+        self.assertSameJSON(SubscriptionSerializer, Subscription.objects.all())
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_same_output_as_drf(self):
+        payloads = [
+            {1: "x", None: "n", True: "t", 2.5: "f"},
+            {"n": 2 ** 70, "m": -(2 ** 64)},
+            {"floats": [1e16, -1e16, 1.5e-7, 1e-05, 0.0001, 0.1, 1 / 3, 123456.789, 2.5e300]},
+            {"texte": "1e5 0.00001 « é » \u2028", "date": timezone.now(), "ids": list(range(5))},
+            [{"id": 1, "titre": "Assemblée"}, {"id": 2, "titre": None}],
+        ]
+        for data in payloads:
+            with self.subTest(data=data):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+# -------------------------------------------------------
+# Compression négociée + cache du feed pré-compressé
+# -------------------------------------------------------
+class CompressionTests(TestCase):
+
+    def compressed(self, response, accept_encoding="gzip, deflate"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate("gzip;q=0.5, identity"), "gzip")
+        self.assertIsNone(negotiate("gzip;q=0, identity"))
+        self.assertIsNone(negotiate(""))
+        self.assertEqual(negotiate("*"), negotiate("zstd, br, gzip"))
+
+    def test_json_body(self):
+        body = b'{"results": [' + b'{"titre": "Assembl\u00e9e"},' * 100 + b'{}]}'
+        response = self.compressed(HttpResponse(body, content_type="application/json"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+
+    def test_skips_tiny_and_compressed_types(self):
+        tiny = self.compressed(HttpResponse(b'{"ok": true}', content_type="application/json"))
+        self.assertFalse(tiny.has_header("Content-Encoding"))
+        image = self.compressed(HttpResponse(b"\x89PNG" + b"\0" * 4096, content_type="image/png"))
+        self.assertFalse(image.has_header("Content-Encoding"))
+
+    def test_streaming(self):
+        chunks = [b"id,titre\n"] + [f"{i},ligne {i}\n".encode() for i in range(500)]
+        response = self.compressed(StreamingHttpResponse(iter(chunks), content_type="text/csv"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+
+        # Chaque morceau est décompressable dès réception (flush)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parts = [decompressor.decompress(part) for part in response.streaming_content]
+        self.assertEqual(parts[0], chunks[0])
+        self.assertEqual(b"".join(parts), b"".join(chunks))
+
+    def test_skips_event_stream(self):
+        events = (f"data: {i}\n\n".encode() * 50 for i in range(5))
+        response = self.compressed(StreamingHttpResponse(events, content_type="text/event-stream"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_skips_html_with_csrf_token(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+
+        def view(request):
+            token = get_token(request)
+            return HttpResponse(f'<input name="csrfmiddlewaretoken" value="{token}">' * 50)
+
+        response = CompressionMiddleware(CsrfViewMiddleware(view))(request)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        # Même page sans jeton : compressée
+        html = self.compressed(HttpResponse(b"<p>Assembl\xc3\xa9e</p>" * 100), accept_encoding="gzip")
+        self.assertEqual(html["Content-Encoding"], "gzip")
+
+
+class HybridMiddlewareTests(TestCase):
+
+    async def test_async_chain_without_thread_switch(self):
+        body = b'{"results": [' + b'{"titre": "x"},' * 100 + b'{}]}'
+
+        async def view(request):
+            return HttpResponse(body, content_type="application/json")
+
+        handler = view
+        for middleware in (ReplicaRoutingMiddleware, CompressionMiddleware, MetricsMiddleware):
+            handler = middleware(handler)
+            self.assertTrue(iscoroutinefunction(handler), middleware.__name__)
+        response = await handler(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(gzip.decompress(response.content), body)
+
+    async def test_async_authentication_errors(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer x")
+        with mock.patch("core.async_views._authenticator") as authenticator:
+            authenticator.return_value.authenticate.side_effect = InvalidToken()
+            self.assertIsNone(await _authenticate(request))
+            # Panne : erreur serveur, pas un 401
+            authenticator.return_value.authenticate.side_effect = DatabaseError("indisponible")
+            with self.assertRaises(DatabaseError):
+                await _authenticate(request)
+
+
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.reads = []
+
+        def view(request):
+            self.reads.append(self.router.db_for_read(Publication))
+            return HttpResponse(status=400 if "invalid" in request.path else 200)
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+        # Sans alias "replica" dans DATABASES, le middleware est inactif
+        self.middleware.enabled = True
+
+    def call(self, method, path="/", token="a"):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        self.middleware(getattr(RequestFactory(), method)(path, **headers))
+        return self.reads[-1]
+
+    def test_reads_and_writes(self):
+        self.assertEqual(self.call("get"), REPLICA_DB_ALIAS)
+        self.assertEqual(self.call("head"), REPLICA_DB_ALIAS)
+        self.assertEqual(self.call("post"), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_write(Publication), DEFAULT_DB_ALIAS)
+        # Hors requête (commandes, workers) : primaire
+        self.assertEqual(self.router.db_for_read(Publication), DEFAULT_DB_ALIAS)
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB_ALIAS, "core"))
+
+    def test_client_pinned_to_primary_after_write(self):
+        self.call("post", "/invalid/")
+        self.assertEqual(self.call("get"), REPLICA_DB_ALIAS)
+
+        self.call("patch")
+        self.assertEqual(self.call("get"), DEFAULT_DB_ALIAS)
+        # Autres clients, anonymes : réplica
+        self.assertEqual(self.call("get", token="b"), REPLICA_DB_ALIAS)
+        self.call("post", token=None)
+        self.assertEqual(self.call("get", token=None), REPLICA_DB_ALIAS)
+
+        with override_settings(EO_DB_PIN_PRIMARY_SECONDS=0):
+            self.call("post", token="c")
+        self.assertEqual(self.call("get", token="c"), REPLICA_DB_ALIAS)
+
+
+class MetricsViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username="staff", email="staff@example.com", password=None, is_staff=True
+        )
+        cls.member = User.objects.create_user(username="membre", email="membre@example.com", password=None)
+
+    def test_denied_by_default(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    def test_staff(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    @override_settings(EO_METRICS_TOKEN="secret")
+    def test_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer autre").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    @override_settings(EO_METRICS_ALLOWED_IPS=["10.0.0.0/8", "192.168.1.5"])
+    def test_allowed_ips(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.1.2.3").status_code, 200)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="192.168.1.5").status_code, 200)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="192.168.1.6").status_code, 403)
+
+
+class SQLiteTunedBackendTests(SimpleTestCase):
+    """
+    Charge le moteur backend.sqlite_tuned sur un fichier temporaire (WAL
+    impossible en mémoire) : PRAGMA appliqués, BEGIN IMMEDIATE sur demande.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tuned.sqlite3")
+
+    def open(self, alias):
+        backend = load_backend("backend.sqlite_tuned")
+        wrapper = backend.DatabaseWrapper({**connection.settings_dict, "NAME": self.path}, alias)
+        connections[alias] = wrapper
+        self.addCleanup(wrapper.close)
+        self.addCleanup(delattr, connections._connections, alias)
+        return wrapper
+
+    def test_pragmas(self):
+        wrapper = self.open("tuned")
+        self.assertIsInstance(wrapper, TunedDatabaseWrapper)
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_begin_immediate_is_opt_in(self):
+        writer, other = self.open("tuned"), self.open("tuned_other")
+        with writer.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (x integer)")
+        with other.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout = 0")
+
+        # BEGIN différé : tant que rien n'est lu ni écrit, aucun verrou
+        with transaction.atomic(using="tuned"):
+            with other.cursor() as cursor:
+                cursor.execute("INSERT INTO t VALUES (1)")
+
+        # BEGIN IMMEDIATE : verrou d'écriture dès l'ouverture
+        with atomic_immediate(using="tuned"):
+            self.assertFalse(writer.begin_immediate)
+            with self.assertRaises(OperationalError), other.cursor() as cursor:
+                cursor.execute("INSERT INTO t VALUES (2)")
+        self.assertFalse(writer.begin_immediate)
+
+        with other.cursor() as cursor:
+            cursor.execute("INSERT INTO t VALUES (3)")
+            cursor.execute("SELECT COUNT(*) FROM t")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+class FeedCacheTests(MemberTestCase):
+
+    SEED = {"publications": 10}
+
+    def setUp(self):
+        super().setUp()
+        # Organisations connues par les claims JWT (cf. users/authentication.py)
+        self.member.org_roles = {organisation.pk: "admin" for organisation in self.organisations}
+
+    def get(self, path, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(path, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_served_precompressed_without_queries(self):
+        path = reverse("publication-list")
+        miss = self.get(path, 2)
+        hit = self.get(path, 0)
+        self.assertEqual(hit["Content-Encoding"], "gzip")
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(gzip.decompress(hit.content), gzip.decompress(miss.content))
+
+        # Autre URL (filtre) : autre entrée
+        self.get(path + "?type=evenement", 2)
+
+    def test_invalidated_on_write(self):
+        path = reverse("publication-list")
+        first = gzip.decompress(self.get(path, 2).content)
+        publication = Publication.objects.filter(organisation=self.organisations[0]).first()
+        publication.titre = "Titre modifié"
+        publication.save()
+        self.assertIn("Titre modifié".encode(), gzip.decompress(self.get(path, 2).content))
+        self.assertNotEqual(gzip.decompress(self.get(path, 0).content), first)
+
+
+# -------------------------------------------------------
+# ?fields= / ?expand= : payload et requêtes réduits
+# -------------------------------------------------------
+class SparseFieldsTests(MemberTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.publication = Publication.objects.filter(
+            organisation=cls.organisations[0], status=Publication.STATUS_PUBLISHED
+        ).first()
+
+    def get(self, path):
+        recorder = _QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), recorder.queries
+
+    def test_list_fields(self):
+        data, queries = self.get(reverse("publication-list") + "?fields=id,titre")
+        self.assertEqual(set(data["results"][0]), {"id", "titre"})
+        self.assertNotIn("core_organisation", queries[-1])
+        self.assertNotIn("contenu", queries[-1])
+
+    def test_relation_collapsed_unless_expanded(self):
+        path = reverse("publication-list") + "?fields=id,organisation"
+        data, queries = self.get(path)
+        self.assertIsInstance(data["results"][0]["organisation"], int)
+        self.assertNotIn("JOIN", queries[-1])
+
+        data, _ = self.get(path + "&expand=organisation")
+        self.assertIn(data["results"][0]["organisation"]["slug"], {o.slug for o in self.organisations})
+
+    def test_detail_fields(self):
+        path = reverse("publication-detail", args=[self.publication.pk])
+        data, queries = self.get(path + "?fields=id,attachments")
+        self.assertEqual(
+            data, {"id": self.publication.pk, "attachments": list(
+                self.publication.attachments.order_by("pk").values_list("pk", flat=True)
+            )}
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("display_name", queries[-1])
+
+        full, _ = self.get(path)
+        expanded, _ = self.get(path + "?fields=id,attachments,organisation&expand=attachments,organisation")
+        self.assertEqual(expanded, {name: full[name] for name in ("id", "attachments", "organisation")})
+
+    def test_organisation_subscription(self):
+        data, queries = self.get(
+            reverse("organisation-detail", args=[self.organisations[0].slug]) + "?fields=nom,subscription"
+        )
+        self.assertEqual(data, {"nom": self.organisations[0].nom, "subscription": self.organisations[0].subscription.pk})
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_names(self):
+        for query in ("?fields=nope", "?fields=id&expand=contenu_preview"):
+            response = self.client.get(reverse("publication-list") + query)
+            self.assertEqual(response.status_code, 400)
+
+
+# -------------------------------------------------------
+# Lecture groupée (/batch/)
+# -------------------------------------------------------
+class BatchRetrieveTests(MemberTestCase):
+
+    ROLE = "member"
+    FOREIGN = 1
+
+    def test_publications_in_request_order(self):
+        published = list(
+            Publication.objects.filter(organisation__in=self.organisations, status=Publication.STATUS_PUBLISHED)
+            .order_by("pk")[:3]
+        )
+        draft = Publication.objects.filter(
+            organisation=self.organisations[0], status=Publication.STATUS_DRAFT
+        ).first()
+        foreign = self.foreign[0].publications.first()
+        ids = [published[2].pk, 0, foreign.pk, published[0].pk, draft.pk, published[1].pk]
+
+        response = self.client.get(reverse("publication-batch") + "?ids=" + ",".join(map(str, ids)))
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["id"] for r in results], ids)
+        self.assertEqual(
+            [r["status"] for r in results], ["ok", "not_found", "forbidden", "ok", "forbidden", "ok"]
+        )
+        detail = self.client.get(reverse("publication-detail", args=[published[0].pk])).json()
+        self.assertEqual(results[3]["data"], detail)
+        self.assertNotIn("data", results[1])
+
+    def test_post_and_sparse_fields(self):
+        response = self.client.post(
+            reverse("organisation-batch") + "?fields=id,nom",
+            {"ids": [self.organisations[1].pk, self.foreign[0].pk]},
+            format="json",
+        )
+        self.assertEqual(response.json()["results"], [
+            {"id": self.organisations[1].pk, "status": "ok",
+             "data": {"id": self.organisations[1].pk, "nom": self.organisations[1].nom}},
+            {"id": self.foreign[0].pk, "status": "forbidden"},
+        ])
+
+    def test_invalid_ids(self):
+        path = reverse("publication-batch")
+        with self.settings(EO_BATCH_MAX_IDS=2):
+            for query in ("", "?ids=", "?ids=1,a", "?ids=1,2,3"):
+                with self.subTest(query=query):
+                    self.assertEqual(self.client.get(path + query).status_code, 400)
+        for body in ([1, 2], 3, "ids", {"ids": 1}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(path, body, format="json").status_code, 400)
+
+
+# -------------------------------------------------------
+# Invitations en masse (/api/memberships/bulk/)
+# -------------------------------------------------------
+class BulkInviteTests(MemberTestCase):
+
+    ORGANISATIONS = 1
+    SEED = {"publications": 0, "attachments": 0, "members": 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.organisation = cls.organisations[0]
+        cls.existing = cls.organisation.memberships.exclude(user=cls.member).order_by("pk").first().user
+        cls.invited = User.objects.create_user(username="nouveau", email="nouveau@example.com", password=None)
+
+    def invite(self, invitations):
+        return self.client.post(
+            reverse("membership-bulk-invite"),
+            {"organisation": self.organisation.pk, "invitations": invitations},
+            format="json",
+        )
+
+    def test_counts_and_roles(self):
+        TimelineJob.objects.all().delete()
+        versions = dict(User.objects.values_list("pk", "membership_version"))
+        response = self.invite([
+            {"email": self.existing.email.upper(), "role": "admin"},
+            {"email": "nouveau@example.com", "role": "member"},
+            {"email": "inconnu@example.com", "role": "member"},
+            # Doublon : la dernière occurrence fixe le rôle
+            {"email": " Nouveau@Example.com ", "role": "admin"},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual((data["created"], data["updated"], data["unknown"]), (2, 1, 1))
+        self.assertEqual(
+            [r["status"] for r in data["results"]], ["updated", "created", "unknown", "created"]
+        )
+
+        roles = dict(self.organisation.memberships.values_list("user_id", "role"))
+        self.assertEqual((roles[self.existing.pk], roles[self.invited.pk]), ("admin", "admin"))
+        self.assertEqual(len(roles), 4)
+        # Claims invalidés, rattrapage de la timeline du nouveau membre seulement
+        bumped = {pk for pk, version in User.objects.values_list("pk", "membership_version") if version > versions[pk]}
+        self.assertEqual(bumped, {self.existing.pk, self.invited.pk})
+        self.assertEqual(
+            list(TimelineJob.objects.filter(kind=TimelineJob.KIND_MEMBERSHIP).values_list("object_id", flat=True)),
+            [self.organisation.memberships.get(user=self.invited).pk],
+        )
+
+    def test_requires_admin_and_limit(self):
+        Membership.objects.filter(user=self.member).update(role="member")
+        self.assertEqual(self.invite([{"email": "nouveau@example.com", "role": "member"}]).status_code, 403)
+        Membership.objects.filter(user=self.member).update(role="admin")
+
+        with self.settings(EO_BULK_INVITE_MAX=1):
+            response = self.invite([{"email": "a@example.com", "role": "member"}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.organisation.memberships.filter(user=self.invited).exists())
+
+
+# -------------------------------------------------------
+# Synchronisation différentielle (/api/sync/)
+# -------------------------------------------------------
+@mock.patch("core.sync.SYNC_SETTLE_SECONDS", 0)
+class SyncTests(MemberTestCase):
+
+    ROLE = "member"
+    FOREIGN = 1
+
+    def sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get(reverse("sync"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def sync_all(self, since=None, limit=7):
+        changes = []
+        while True:
+            page = self.sync(since, limit=limit)
+            changes.extend(page["changes"])
+            since = page["next"]
+            if not page["has_more"]:
+                return changes, since
+
+    def test_full_sync_paginated(self):
+        changes, token = self.sync_all()
+        upserts = {(c["type"], c["id"]) for c in changes if c["op"] == "upsert"}
+        visible = Publication.objects.filter(organisation__in=self.organisations, status=Publication.STATUS_PUBLISHED)
+
+        self.assertEqual(len(changes), len({(c["type"], c["id"]) for c in changes}))
+        self.assertEqual({pk for kind, pk in upserts if kind == "publication"}, set(visible.values_list("pk", flat=True)))
+        self.assertEqual(
+            {pk for kind, pk in upserts if kind == "attachment"},
+            set(PublicationAttachment.objects.filter(publication__in=visible).values_list("pk", flat=True)),
+        )
+        self.assertEqual({pk for kind, pk in upserts if kind == "organisation"}, {o.pk for o in self.organisations})
+        # Rien de neuf depuis le dernier token
+        self.assertEqual(self.sync(token)["changes"], [])
+
+    def test_delta_with_tombstones(self):
+        _, token = self.sync_all()
+        publication, hidden = Publication.objects.filter(
+            organisation=self.organisations[0], status=Publication.STATUS_PUBLISHED
+        )[:2]
+        publication.titre = "Modifiée"
+        publication.save()
+        attachment = publication.attachments.first()
+        attachment_pk = attachment.pk
+        attachment.delete()
+        hidden.status = Publication.STATUS_DRAFT
+        hidden.save()
+        other = self.organisations[1].memberships.exclude(user=self.member).first()
+        other_pk = other.pk
+        other.delete()
+
+        changes, _ = self.sync_all(token)
+        ops = {(c["type"], c["id"]): c["op"] for c in changes}
+        expected = {
+            ("publication", publication.pk): "upsert",
+            ("attachment", attachment_pk): "delete",
+            ("publication", hidden.pk): "delete",
+            ("membership", other_pk): "delete",
+        }
+        expected.update({("attachment", pk): "upsert" for pk in publication.attachments.values_list("pk", flat=True)})
+        expected.update({("attachment", pk): "delete" for pk in hidden.attachments.values_list("pk", flat=True)})
+        self.assertEqual(ops, expected)
+
+        data = next(c["data"] for c in changes if (c["type"], c["id"]) == ("publication", publication.pk))
+        self.assertEqual(data["titre"], "Modifiée")
+        self.assertEqual(data["organisation"], self.organisations[0].pk)
+
+    def test_own_membership_removed(self):
+        _, token = self.sync_all()
+        membership = Membership.objects.get(user=self.member, organisation=self.organisations[0])
+        membership_pk = membership.pk
+        membership.delete()
+        changes, _ = self.sync_all(token)
+        self.assertIn({"type": "membership", "id": membership_pk, "op": "delete"}, changes)
+
+    def test_queries_per_page_independent_of_changes(self):
+        counts = []
+        for limit in (5, 50):
+            recorder = _QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                self.sync(limit=limit)
+            counts.append(len(recorder.queries))
+            self.assertEqual(full_scans(recorder.queries), [])
+        self.assertEqual(counts[0], counts[1])
+
+    def test_invalid_and_expired_tokens(self):
+        self.assertEqual(self.client.get(reverse("sync"), {"since": "@@"}).status_code, 400)
+        # Hors bornes : datetime, colonnes SQL
+        overflow = base64.urlsafe_b64encode(f"{10 ** 30}:0:0".encode()).decode()
+        for token in (overflow, encode_token((timezone.now(), 0, 10 ** 30)), encode_token((timezone.now(), -1, 0))):
+            self.assertEqual(self.client.get(reverse("sync"), {"since": token}).status_code, 400)
+        expired = encode_token((timezone.now() - timedelta(days=365), 0, 0))
+        self.assertEqual(self.client.get(reverse("sync"), {"since": expired}).status_code, 410)
+
+
+# -------------------------------------------------------
+# Archivage froid
+# -------------------------------------------------------
+class SeedScaleTests(TestCase):
+
+    def seed(self, prefix, **options):
+        call_command(
+            "seed", scale=6, members=60, publications=2, prefix=prefix, stdout=io.StringIO(), **options
+        )
+        # Même graine par indice : seuls les préfixes diffèrent entre deux exécutions
+        return {
+            (email.replace(prefix, "", 1), slug.replace(prefix, "", 1))
+            for email, slug in Membership.objects.filter(organisation__slug__startswith=f"{prefix}-")
+            .values_list("user__email", "organisation__slug")
+        }
+
+    def test_shared_members_do_not_depend_on_batches(self):
+        single = self.seed("un", batch=6)
+        split = self.seed("lots", batch=1)
+        self.assertEqual(single, split)
+        # "-<i>-<j>@example.com" membre de "-<k>" : k == i + 1 pour les partagés,
+        # y compris à la frontière de deux lots
+        pairs = [(int(email.split("-")[1]), int(slug.split("-")[1])) for email, slug in split]
+        shared = [(i, k) for i, k in pairs if i != k]
+        self.assertTrue(shared)
+        self.assertTrue(all(k == i + 1 for i, k in shared))
+
+    def test_timeline_is_rebuilt(self):
+        self.seed("tl", batch=3)
+        # bulk_create sans signaux : timeline remplie par process_timeline --rebuild
+        member = Membership.objects.filter(organisation__slug="tl-2").order_by("pk").first().user
+        published = Publication.objects.filter(
+            organisation__memberships__user=member, status=Publication.STATUS_PUBLISHED
+        ).count()
+        self.assertTrue(published)
+        self.assertEqual(TimelineEntry.objects.filter(user=member).count(), published)
+        self.assertFalse(TimelineJob.objects.exists())
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username="staff", email="staff@example.com", password=None, is_staff=True
+        )
+        cls.organisation = OrganisationFactory().seed(cls.staff, 1)[0]
+        cls.old = Publication.objects.create(
+            organisation=cls.organisation, titre="Ancienne", contenu="…", status=Publication.STATUS_ARCHIVED
+        )
+        for n in range(2):
+            PublicationAttachment.objects.create(publication=cls.old, file=f"attachments/old-{n}.pdf")
+        cls.recent = Publication.objects.create(
+            organisation=cls.organisation, titre="Récente", contenu="…", status=Publication.STATUS_ARCHIVED
+        )
+        Publication.objects.filter(pk=cls.old.pk).update(updated_at=timezone.now() - timedelta(days=400))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_archive_fallback_and_restore(self):
+        path = reverse("publication-detail", args=[self.old.pk])
+        before = self.client.get(path).json()
+        created_at = dict(PublicationAttachment.objects.values_list("pk", "created_at"))
+
+        self.assertEqual(archive_batch(days=180, chunk_size=1), 1)
+        self.assertEqual(archive_batch(days=180, chunk_size=1), 0)
+        self.assertFalse(Publication.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(Publication.objects.filter(pk=self.recent.pk).exists())
+        self.assertEqual(ArchivedPublication.objects.get(pk=self.old.pk).attachments.count(), 2)
+
+        # Lecture transparente depuis la table froide
+        self.assertEqual(self.client.get(path).json(), before)
+        self.assertNotIn(self.old.pk, [p["id"] for p in self.client.get(reverse("publication-list")).json()["results"]])
+
+        self.assertEqual(restore_publications([self.old.pk]), 1)
+        self.assertFalse(ArchivedPublication.objects.exists())
+        self.assertEqual(self.client.get(path).json(), before)
+        self.assertEqual(dict(PublicationAttachment.objects.values_list("pk", "created_at")), created_at)
+
+    def test_archived_hidden_from_members(self):
+        member = User.objects.create_user(username="membre", email="membre@example.com", password=None)
+        Membership.objects.create(user=member, organisation=self.organisation, role="member")
+        archive_batch(days=180)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(reverse("publication-detail", args=[self.old.pk])).status_code, 404)
+
+    def test_pending_digest_items_are_removed(self):
+        NotificationDigestItem.objects.create(user=self.staff, publication=self.old)
+        self.assertEqual(archive_batch(days=180), 1)
+        self.assertFalse(NotificationDigestItem.objects.exists())
+        # Suppression brute : aucune clé étrangère orpheline
+        connection.check_constraints()
+
+
+class TimelineTests(MemberTestCase):
+
+    ROLE = "member"
+    SEED = {"publications": 4, "members": 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        process_pending_jobs()
+
+    def feed(self, **flags):
+        with override_settings(**flags):
+            return self.client.get(reverse("publication-list")).json()
+
+    def test_fan_out_and_feed(self):
+        published = Publication.objects.filter(status=Publication.STATUS_PUBLISHED)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.member).count(), published.count())
+        self.assertFalse(TimelineJob.objects.exists())
+        self.assertEqual(self.feed(EO_TIMELINE_FEED=True), self.feed(EO_TIMELINE_FEED=False))
+
+        # Liste des organisations sans fan-out en cache : COUNT + page
+        with override_settings(EO_TIMELINE_FEED=True), self.assertNumQueries(2):
+            self.client.get(reverse("publication-list"))
+        # Filtre : chemin classique
+        with override_settings(EO_TIMELINE_FEED=True), self.assertNumQueries(2):
+            self.client.get(reverse("publication-list"), {"type": Publication.TYPE_EVENEMENT})
+
+    def test_unpublish_and_leave(self):
+        publication = Publication.objects.filter(status=Publication.STATUS_PUBLISHED).first()
+        publication.status = Publication.STATUS_DRAFT
+        publication.save()
+        self.assertFalse(TimelineEntry.objects.filter(publication=publication).exists())
+
+        publication.status = Publication.STATUS_PUBLISHED
+        publication.save()
+        process_pending_jobs()
+        self.assertTrue(TimelineEntry.objects.filter(publication=publication, user=self.member).exists())
+
+        Membership.objects.filter(user=self.member, organisation=self.organisations[0]).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.member, organisation_id=self.organisations[0].pk).exists()
+        )
+        self.assertEqual(self.feed(EO_TIMELINE_FEED=True), self.feed(EO_TIMELINE_FEED=False))
+
+    def test_new_member_backfill(self):
+        other = User.objects.create_user(username="nouveau", email="nouveau@example.com", password=None)
+        Membership.objects.create(user=other, organisation=self.organisations[1], role="member")
+        published = self.organisations[1].publications.filter(status=Publication.STATUS_PUBLISHED).count()
+        # Historique inséré par tranches de FANOUT_CHUNK_SIZE
+        with mock.patch("core.timeline.FANOUT_CHUNK_SIZE", 2), mock.patch.object(
+            TimelineEntry.objects, "bulk_create", wraps=TimelineEntry.objects.bulk_create
+        ) as bulk_create:
+            process_pending_jobs()
+        self.assertEqual(TimelineEntry.objects.filter(user=other).count(), published)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, published - 2])
+
+    def test_large_organisation_merged_at_read(self):
+        with mock.patch("core.timeline.FANOUT_MAX_MEMBERS", 2):
+            Publication.objects.create(
+                organisation=self.organisations[0], titre="Grosse", contenu="…", status=Publication.STATUS_PUBLISHED
+            )
+            process_pending_jobs()
+        self.organisations[0].refresh_from_db()
+        self.assertTrue(self.organisations[0].timeline_pull)
+        self.assertFalse(TimelineEntry.objects.filter(organisation_id=self.organisations[0].pk).exists())
+        self.assertEqual(self.feed(EO_TIMELINE_FEED=True), self.feed(EO_TIMELINE_FEED=False))
+
+
+class AdminBulkJobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="root", email="root@example.com", password="x")
+        cls.organisation = OrganisationFactory().seed(None, 1, publications=5)[0]
+
+    def test_admin_action_schedules_job(self):
+        self.client.force_login(self.admin)
+        ids = list(Publication.objects.values_list("pk", flat=True))
+        response = self.client.post(
+            reverse("admin:core_publication_changelist"),
+            {"action": "publier", "_selected_action": ids},
+        )
+        self.assertEqual(response.status_code, 302)
+        job = AdminBulkJob.objects.get()
+        self.assertEqual((job.action, job.total, job.object_ids), (AdminBulkJob.ACTION_PUBLISH, 5, sorted(ids)))
+        self.assertTrue(Publication.objects.filter(status=Publication.STATUS_DRAFT).exists())
+        self.assertContains(self.client.get(reverse("admin:core_adminbulkjob_changelist")), "0 / 5")
+        self.assertEqual(self.client.get(reverse("admin:core_adminbulkjob_change", args=[job.pk])).status_code, 200)
+
+    def test_chunks_resume_and_signals(self):
+        job = create_job(AdminBulkJob.ACTION_PUBLISH, Publication.objects.all())
+        process_chunk(chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminBulkJob.STATUS_RUNNING, 2))
+        self.assertEqual(job.cursor, job.object_ids[1])
+
+        # Reprise (nouveau worker) depuis le curseur
+        self.assertEqual(process_admin_jobs(chunk_size=2), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminBulkJob.STATUS_DONE, 5))
+        self.assertFalse(Publication.objects.exclude(status=Publication.STATUS_PUBLISHED).exists())
+        self.assertFalse(Publication.objects.filter(is_published=False).exists())
+        # save() : fan-out de la timeline planifié
+        self.assertTrue(TimelineJob.objects.filter(kind=TimelineJob.KIND_PUBLICATION).exists())
+
+    def test_delete_removes_files(self):
+        create_job(AdminBulkJob.ACTION_DELETE, Publication.objects.all())
+        files = set(PublicationAttachment.objects.values_list("file", flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            process_admin_jobs()
+        self.assertFalse(Publication.objects.exists())
+
+        # Fichiers : file de tâches
+        storage = PublicationAttachment._meta.get_field("file").storage
+        with mock.patch.object(storage, "delete") as delete:
+            run_pending(batch_size=100)
+        self.assertEqual({c.args[0] for c in delete.call_args_list}, files)
+
+    def test_failure_then_resume(self):
+        job = create_job(AdminBulkJob.ACTION_ARCHIVE, Publication.objects.all())
+        with mock.patch.object(Publication, "save", side_effect=RuntimeError("boom")):
+            process_admin_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminBulkJob.STATUS_FAILED, 0))
+        self.assertIn("boom", job.error)
+        self.assertFalse(Publication.objects.filter(status=Publication.STATUS_ARCHIVED).exists())
+
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse("admin:core_adminbulkjob_changelist"), {"action": "reprendre", "_selected_action": [job.pk]}
+        )
+        process_admin_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, AdminBulkJob.STATUS_DONE)
+        self.assertFalse(Publication.objects.exclude(status=Publication.STATUS_ARCHIVED).exists())
+
+
+_task_calls = []
+
+
+@task(max_attempts=2)
+def _flaky_task(value):
+    _task_calls.append(value)
+    if value == "boom":
+        raise ValueError(value)
+
+
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        _task_calls.clear()
+
+    def test_on_commit_and_dedup(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            _flaky_task.defer("a", dedup_key="k")
+        self.assertFalse(Task.objects.exists())
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            _flaky_task.defer("b", dedup_key="k")
+            _flaky_task.defer("c")
+        self.assertEqual(Task.objects.count(), 2)
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(sorted(_task_calls), ["a", "c"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_retry_with_backoff_then_fail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _flaky_task.defer("boom")
+        run_pending()
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.attempts), (Task.STATUS_PENDING, 1))
+        self.assertGreater(row.run_at, timezone.now())
+        self.assertIn("ValueError", row.last_error)
+
+        # Pas encore dû
+        self.assertEqual(run_pending(), 0)
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Task.STATUS_FAILED, 2))
+
+    def test_expired_lease_is_recovered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(_flaky_task.name, ["x"])
+        Task.objects.update(status=Task.STATUS_RUNNING, locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(_task_calls, ["x"])
+
+
+class NotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisation = OrganisationFactory().seed(None, 1, publications=0, members=5)[0]
+        members = list(User.objects.filter(memberships__organisation=cls.organisation).order_by("pk"))
+        User.objects.filter(pk=members[0].pk).update(notification_mode=User.NOTIFY_DAILY)
+        User.objects.filter(pk=members[1].pk).update(notification_mode=User.NOTIFY_OFF)
+        cls.digest_user = members[0]
+
+    def publish(self, titre):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Publication.objects.create(
+                organisation=self.organisation, titre=titre, contenu="…", status=Publication.STATUS_PUBLISHED
+            )
+
+    def drain(self):
+        # notify_publication puis les tâches d'envoi qu'elle planifie
+        while True:
+            with self.captureOnCommitCallbacks(execute=True):
+                if not run_pending(batch_size=100):
+                    return
+
+    @mock.patch("core.notifications.NOTIFY_CHUNK_SIZE", 2)
+    def test_chunked_send_with_one_connection_per_chunk(self):
+        self.publish("Annonce")
+        self.assertEqual(len(mail.outbox), 0)
+        with mock.patch("core.notifications.get_connection", wraps=mail.get_connection) as get_connection:
+            self.drain()
+        # 5 membres en 3 tranches ; la première (résumé + aucune) n'envoie rien
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertTrue(all(m.subject.endswith("Annonce") for m in mail.outbox))
+        self.assertNotIn(self.digest_user.email, [m.to[0] for m in mail.outbox])
+
+    def test_digest_groups_publications(self):
+        self.publish("Première")
+        self.publish("Seconde")
+        self.drain()
+        mail.outbox.clear()
+
+        self.assertEqual(send_digests(User.NOTIFY_WEEKLY), 0)
+        self.assertEqual(send_digests(User.NOTIFY_DAILY), 1)
+        self.assertEqual(mail.outbox[0].to, [self.digest_user.email])
+        self.assertIn("Première", mail.outbox[0].body)
+        self.assertIn("Seconde", mail.outbox[0].body)
+        self.assertEqual(send_digests(User.NOTIFY_DAILY), 0)
+
+    def test_mode_change_flushes_or_drops_pending_digest(self):
+        self.publish("Première")
+        self.drain()
+        mail.outbox.clear()
+        pending = NotificationDigestItem.objects.filter(user=self.digest_user)
+        self.assertEqual(pending.count(), 1)
+
+        # Quotidien -> hebdomadaire : le résumé suit
+        user = User.objects.get(pk=self.digest_user.pk)
+        user.notification_mode = User.NOTIFY_WEEKLY
+        user.save()
+        self.drain()
+        self.assertEqual(pending.count(), 1)
+
+        # -> immédiat : envoyé tout de suite
+        user.notification_mode = User.NOTIFY_IMMEDIATE
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.drain()
+        self.assertEqual([m.to for m in mail.outbox], [[user.email]])
+        self.assertIn("Première", mail.outbox[0].body)
+        self.assertFalse(pending.exists())
+
+        # -> aucune : abandonné
+        user.notification_mode = User.NOTIFY_DAILY
+        user.save()
+        self.publish("Seconde")
+        self.drain()
+        self.assertEqual(pending.count(), 1)
+        user.notification_mode = User.NOTIFY_OFF
+        user.save()
+        self.assertFalse(pending.exists())
+
+
+class PublicationEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisation = OrganisationFactory().seed(None, 1, publications=0, members=0)[0]
+
+    def test_member_visible_changes_are_recorded(self):
+        publication = Publication.objects.create(organisation=self.organisation, titre="Brouillon", contenu="…")
+        publication.status = Publication.STATUS_PUBLISHED
+        publication.save()
+        publication.titre = "Modifiée"
+        publication.save()
+        publication.status = Publication.STATUS_DRAFT
+        publication.save()
+        publication.status = Publication.STATUS_PUBLISHED
+        publication.save()
+        publication.delete()
+        self.assertEqual(
+            list(PublicationEvent.objects.order_by("pk").values_list("type", flat=True)),
+            ["published", "updated", "deleted", "published", "deleted"],
+        )
+
+        first = PublicationEvent.objects.order_by("pk").first().pk
+        events, reset = events_since(first, [self.organisation.pk])
+        self.assertEqual((len(events), reset), (4, None))
+        self.assertEqual(events_since(first, [self.organisation.pk + 1]), ([], None))
+        with mock.patch("core.events.EVENTS_BACKLOG", 2):
+            self.assertEqual(events_since(first, [self.organisation.pk]), ([], events[-1]["id"]))
+
+    async def test_socket_broker_round_trip(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            receiver, sender = SocketBroker(directory), SocketBroker(directory)
+            subscription = receiver.subscribe([1])
+            event = {"id": 7, "type": "published", "organisation": 1, "publication": 3}
+            sender.publish({**event, "organisation": 2})
+            sender.publish(event)
+            self.assertEqual(await asyncio.wait_for(subscription.queue.get(), 2), event)
+            receiver.unsubscribe(subscription)
+
+
+class SSETests(TransactionTestCase):
+
+    def setUp(self):
+        # Ids réutilisés après flush : versions de memberships en cache périmées
+        cache.clear()
+        self.member = User.objects.create_user(username="membre", email="membre@example.com", password=None)
+        self.organisation = OrganisationFactory().seed(self.member, 1, publications=0, members=0, role="member")[0]
+        self.publication = Publication.objects.create(
+            organisation=self.organisation, titre="Annonce", contenu="…", status=Publication.STATUS_PUBLISHED
+        )
+        self.member.refresh_from_db()
+        token = add_membership_claims(RefreshToken.for_user(self.member).access_token, self.member)
+        self.headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    async def stream(self, headers, until, action=None):
+        """
+        Appelle l'application SSE jusqu'à ce que `until(corps)` soit vrai.
+        """
+        disconnected = asyncio.Event()
+        messages = []
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if until(b"".join(m.get("body", b"") for m in messages)):
+                disconnected.set()
+
+        task = asyncio.ensure_future(
+            sse_application({"type": "http", "method": "GET", "headers": headers, "query_string": b""}, receive, send)
+        )
+        if action is not None:
+            await asyncio.sleep(0.05)
+            await action()
+        await asyncio.wait_for(task, 5)
+        return messages[0], b"".join(m.get("body", b"") for m in messages).decode()
+
+    async def test_requires_authentication(self):
+        start, body = await self.stream([], until=lambda body: True)
+        self.assertEqual(start["status"], 401)
+
+    async def test_live_event_heartbeat_and_resume(self):
+        first = await PublicationEvent.objects.alatest("pk")
+
+        async def publish():
+            self.publication.titre = "Modifiée"
+            await asyncio.to_thread(self.publication.save)
+
+        with mock.patch("core.sse.HEARTBEAT_SECONDS", 0.01):
+            start, body = await self.stream(
+                self.headers, until=lambda body: b"event: updated" in body and b": ping" in body, action=publish
+            )
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+        self.assertIn(f'"id": {self.publication.pk}', body)
+
+        # Reprise : l'événement manqué est rejoué
+        _, body = await self.stream(
+            self.headers + [(b"last-event-id", str(first.pk).encode())],
+            until=lambda body: b"event: updated" in body,
+        )
+        self.assertIn(f"id: {first.pk + 1}", body)
+
+    async def test_late_committed_event_is_not_dropped(self):
+        first = await PublicationEvent.objects.alatest("pk")
+        for titre in ("Deuxième", "Troisième"):
+            self.publication.titre = titre
+            await asyncio.to_thread(self.publication.save)
+        late, last = [
+            event.as_event() async for event in PublicationEvent.objects.filter(pk__gt=first.pk).order_by("pk")
+        ]
+        # Pas encore commité à la lecture du journal : absent de la reprise
+        await PublicationEvent.objects.filter(pk=late["id"]).adelete()
+
+        async def deliver():
+            broker = get_broker()
+            broker.dispatch(last)  # déjà rejoué : ignoré
+            broker.dispatch(late)  # id plus petit, commité après
+
+        _, body = await self.stream(
+            self.headers + [(b"last-event-id", str(first.pk).encode())],
+            until=lambda body: f"id: {late['id']}\n".encode() in body,
+            action=deliver,
+        )
+        self.assertEqual(body.count(f"id: {last['id']}\n"), 1)
+        self.assertLess(body.index(f"id: {last['id']}\n"), body.index(f"id: {late['id']}\n"))
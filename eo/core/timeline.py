@@ -0,0 +1,235 @@
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from backend.sqlite_tuned import atomic_immediate
+
+from .feed_cache import bump_feed_versions
+from .models import Membership, Organisation, Publication, PublicationAttachment, TimelineEntry, TimelineJob
+
+
+# ---------------------------------------------------------------------------
+# Timeline d'accueil (fan-out à l'écriture)
+#
+# Une publication qui devient publiée est recopiée (id + date) dans la
+# timeline de chaque membre de son organisation, par lots, hors requête
+# HTTP (TimelineJob + commande process_timeline). Le feed d'accueil d'un
+# membre se lit alors par index (user, -date_publication), sans jointure
+# Membership ni tri de tout l'historique.
+#
+# - Organisations de plus de EO_TIMELINE_FANOUT_MAX_MEMBERS membres :
+#   pas de fan-out (timeline_pull), leurs publications sont fusionnées à la
+#   lecture.
+# - Dépublication / suppression / archivage froid : entrées retirées tout
+#   de suite ; nouvelle membership : rattrapage en tâche de fond.
+# - EO_TIMELINE_FEED active la lecture (la timeline se remplit dans tous
+#   les cas) ; process_timeline --rebuild la reconstruit entièrement.
+# ---------------------------------------------------------------------------
+
+FANOUT_MAX_MEMBERS = getattr(settings, "EO_TIMELINE_FANOUT_MAX_MEMBERS", 5000)
+FANOUT_CHUNK_SIZE = 1000
+PULL_CACHE_KEY = "eo:timeline:pull"
+PULL_CACHE_TTL = 300
+
+
+def enqueue(kind, object_ids):
+    TimelineJob.objects.bulk_create([TimelineJob(kind=kind, object_id=pk) for pk in object_ids])
+
+
+def remove_publication(publication_id):
+    TimelineEntry.objects.filter(publication_id=publication_id).delete()
+
+
+def remove_membership(user_id, organisation_id):
+    TimelineEntry.objects.filter(user_id=user_id, organisation_id=organisation_id).delete()
+
+
+def refresh_publication_date(publication):
+    TimelineEntry.objects.filter(publication_id=publication.pk).exclude(
+        date_publication=publication.date_publication
+    ).update(date_publication=publication.date_publication)
+
+
+# -------------------------------------------------------
+# Lecture
+# -------------------------------------------------------
+def pull_organisation_ids():
+    """
+    Organisations sans fan-out (peu nombreuses), en cache.
+    """
+    ids = cache.get(PULL_CACHE_KEY)
+    if ids is None:
+        ids = set(Organisation.objects.filter(timeline_pull=True).values_list("pk", flat=True))
+        cache.set(PULL_CACHE_KEY, ids, PULL_CACHE_TTL)
+    return ids
+
+
+def timeline_queryset(user, organisation_ids):
+    """
+    Publications du feed d'accueil de `user` (membre, non staff), plus
+    récentes d'abord. `organisation_ids` : liste ou sous-requête
+    (core.permissions.get_organisation_ids), évaluée seulement s'il existe
+    des organisations sans fan-out.
+    """
+    # Sous-requête corrélée : évaluée pour les lignes de la page seulement
+    attachments_count = Coalesce(
+        Subquery(
+            PublicationAttachment.objects.filter(publication_id=OuterRef("pk"))
+            .order_by()
+            .values("publication_id")
+            .annotate(n=Count("pk"))
+            .values("n")
+        ),
+        0,
+    )
+
+    pull = pull_organisation_ids()
+    if pull and not isinstance(organisation_ids, list):
+        organisation_ids = list(organisation_ids.values_list("organisation_id", flat=True))
+    pull = [pk for pk in organisation_ids if pk in pull] if pull else []
+    queryset = Publication.objects.select_related("organisation", "organisation__subscription").annotate(
+        attachments_count=attachments_count
+    )
+
+    if not pull:
+        return queryset.filter(timeline_entries__user_id=user.pk).order_by(
+            "-timeline_entries__date_publication", "-timeline_entries__publication_id"
+        )
+
+    # Fusion à la lecture des grosses organisations
+    fanned_out = TimelineEntry.objects.filter(user_id=user.pk).values("publication_id")
+    return queryset.filter(
+        Q(pk__in=fanned_out) | Q(organisation_id__in=pull, status=Publication.STATUS_PUBLISHED)
+    ).order_by("-date_publication", "-pk")
+
+
+# -------------------------------------------------------
+# Fan-out (tâche de fond)
+# -------------------------------------------------------
+def _mark_pull(organisation_id):
+    Organisation.objects.filter(pk=organisation_id, timeline_pull=False).update(timeline_pull=True)
+    TimelineEntry.objects.filter(organisation_id=organisation_id).delete()
+    cache.delete(PULL_CACHE_KEY)
+
+
+def _fan_out_publication(publication_id):
+    publication = (
+        Publication.objects.filter(pk=publication_id, status=Publication.STATUS_PUBLISHED)
+        .values("organisation_id", "date_publication", "organisation__timeline_pull")
+        .first()
+    )
+    if publication is None or publication["organisation__timeline_pull"]:
+        return None
+
+    organisation_id = publication["organisation_id"]
+    members = Membership.objects.filter(organisation_id=organisation_id)
+    if members.count() > FANOUT_MAX_MEMBERS:
+        _mark_pull(organisation_id)
+        return organisation_id
+
+    user_ids = list(members.values_list("user_id", flat=True))
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                publication_id=publication_id,
+                organisation_id=organisation_id,
+                date_publication=publication["date_publication"],
+            )
+            for user_id in user_ids
+        ],
+        batch_size=FANOUT_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    return organisation_id
+
+
+def _backfill_membership(membership_id):
+    membership = (
+        Membership.objects.filter(pk=membership_id)
+        .values("user_id", "organisation_id", "organisation__timeline_pull")
+        .first()
+    )
+    if membership is None or membership["organisation__timeline_pull"]:
+        return None
+
+    publications = (
+        Publication.objects.filter(organisation_id=membership["organisation_id"], status=Publication.STATUS_PUBLISHED)
+        .values_list("pk", "date_publication")
+        .iterator(chunk_size=FANOUT_CHUNK_SIZE)
+    )
+    # Par tranches : l'historique d'une grosse organisation n'est jamais
+    # entièrement en mémoire (process_batch garde sa transaction ouverte)
+    while chunk := list(islice(publications, FANOUT_CHUNK_SIZE)):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=membership["user_id"],
+                    publication_id=pk,
+                    organisation_id=membership["organisation_id"],
+                    date_publication=date_publication,
+                )
+                for pk, date_publication in chunk
+            ],
+            ignore_conflicts=True,
+        )
+    return membership["organisation_id"]
+
+
+def process_batch(batch_size=100):
+    """
+    Traite un lot de TimelineJob. Retourne le nombre de tâches traitées.
+    """
+    with atomic_immediate():
+        jobs = list(TimelineJob.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+        if not jobs:
+            return 0
+
+        organisation_ids = set()
+        for job in jobs:
+            if job.kind == TimelineJob.KIND_PUBLICATION:
+                organisation_ids.add(_fan_out_publication(job.object_id))
+            else:
+                organisation_ids.add(_backfill_membership(job.object_id))
+        TimelineJob.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+
+        # Le cache du feed a pu être rempli avant le fan-out
+        organisation_ids.discard(None)
+        transaction.on_commit(lambda: bump_feed_versions(organisation_ids))
+    return len(jobs)
+
+
+def process_pending_jobs(batch_size=100, max_batches=None):
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = process_batch(batch_size=batch_size)
+        if not count:
+            break
+        total += count
+        batches += 1
+    return total
+
+
+def rebuild():
+    """
+    Vide la timeline et planifie le rattrapage de toutes les memberships.
+    """
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        TimelineJob.objects.all().delete()
+        Organisation.objects.filter(timeline_pull=True).update(timeline_pull=False)
+        large = (
+            Membership.objects.values("organisation_id")
+            .annotate(n=Count("pk"))
+            .filter(n__gt=FANOUT_MAX_MEMBERS)
+            .values_list("organisation_id", flat=True)
+        )
+        Organisation.objects.filter(pk__in=list(large)).update(timeline_pull=True)
+        membership_ids = Membership.objects.exclude(organisation__timeline_pull=True).values_list("pk", flat=True)
+        enqueue(TimelineJob.KIND_MEMBERSHIP, membership_ids.iterator(chunk_size=FANOUT_CHUNK_SIZE))
+    cache.delete(PULL_CACHE_KEY)
@@ -16,3 +16,15 @@ class UniqueUploadPath:
             [],
             {"subfolder": self.subfolder},
         )
+
+
+def percentile(values, pct):
+    """
+    Centile `pct` (0-100) par rang le plus proche, 0.0 si `values` est vide.
+    Partagé par les commandes bench_*.
+    """
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
@@ -1,50 +1,233 @@
 # core/views.py
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.http import Http404
 
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.generics import get_object_or_404
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.claims import add_membership_claims
+
+from backend.sqlite_tuned import atomic_immediate
 
 from .models import (
+    ArchivedPublication,
     Organisation,
     Publication,
     Membership,
     PublicationAttachment,
     Subscription,
+    TimelineJob,
 )
 from .serializers import (
+    ArchivedPublicationSerializer,
     OrganisationSerializer,
     PublicationSerializer,
     PublicationListSerializer,
     PublicationAttachmentSerializer,
     MembershipSerializer,
     MembershipInviteSerializer,
+    MembershipBulkInviteSerializer,
     SubscriptionSerializer,
+    sparse_queryset,
 )
-from .permissions import IsOrganisationAdmin
+from .permissions import IsOrganisationAdmin, get_organisation_ids, is_organisation_admin
+from .entitlements import HasActiveSubscription, check_entitlement
+from users.claims import bump_membership_versions
+from .billing import SIGNATURE_HEADER, InvalidSignature, record_event, verify_signature
+from .feed_cache import FEED_CACHE_TTL, feed_cache_key, get_cached_response, store_response
+from .sync import SYNC_PAGE_SIZE, sync_page
+from .timeline import enqueue as enqueue_timeline, timeline_queryset
 
 User = get_user_model()
 
 
+def _check_attachment_limits(entitlement, uploaded_file):
+    # entitlement None : staff/superuser, pas de limite
+    if entitlement is None or uploaded_file is None:
+        return
+    max_size = entitlement["limits"].get("max_attachment_size")
+    if max_size is not None and uploaded_file.size > max_size:
+        raise PermissionDenied("Pièce jointe trop volumineuse pour cet abonnement.")
+
+
+def _split_param(value):
+    return frozenset(item.strip() for item in value.split(",") if item.strip())
+
+
+class SparseFieldsViewMixin:
+    """
+    ?fields=a,b&expand=relation sur list / retrieve : serializer réduit
+    (SparseFieldsMixin, via le contexte) et queryset adapté
+    (sparse_queryset). Noms inconnus : 400.
+    """
+
+    sparse_actions = ("list", "retrieve", "batch")
+
+    def sparse_params(self):
+        """
+        -> (fields, expand) ; fields None = pas de restriction.
+        """
+        if hasattr(self, "_sparse_params"):
+            return self._sparse_params
+
+        fields, expand = None, frozenset()
+        query = self.request.query_params
+        if self.action in self.sparse_actions and ("fields" in query or "expand" in query):
+            serializer_class = self.get_serializer_class()
+            fields = _split_param(query.get("fields", "")) or None
+            expand = _split_param(query.get("expand", ""))
+
+            unknown = (fields or set()) - set(serializer_class().fields)
+            if unknown:
+                raise ValidationError({"fields": f"Champs inconnus : {', '.join(sorted(unknown))}."})
+            unknown = expand - set(getattr(serializer_class, "expandable_fields", ()))
+            if unknown:
+                raise ValidationError({"expand": f"Relations non dépliables : {', '.join(sorted(unknown))}."})
+
+        self._sparse_params = fields, expand
+        return self._sparse_params
+
+    def wants_field(self, name):
+        fields = self.sparse_params()[0]
+        return fields is None or name in fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields, expand = self.sparse_params()
+        if fields is not None:
+            context.update(fields=fields, expand=expand)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_params()[0] is None:
+            return queryset
+        return sparse_queryset(queryset, self.get_serializer())
+
+
+class FastListMixin(SparseFieldsViewMixin):
+    """
+    list() via la lecture rapide du serializer (FastReadMixin) : lignes
+    .values() paginées, même JSON. EO_FAST_SERIALIZERS=False : chemin DRF.
+    """
+
+    def fast_list_response(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        if not getattr(settings, "EO_FAST_SERIALIZERS", True) or not hasattr(serializer_class, "fast_data"):
+            return None
+
+        fields, expand = self.sparse_params()
+        rows = serializer_class.fast_values(queryset, fields, expand)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer_class.fast_data(page, fields, expand))
+        return Response(serializer_class.fast_data(rows, fields, expand))
+
+    def list(self, request, *args, **kwargs):
+        response = self.fast_list_response(self.filter_queryset(self.get_queryset()))
+        if response is None:
+            return super().list(request, *args, **kwargs)
+        return response
+
+
+class BatchRetrieveMixin:
+    """
+    GET ?ids=1,2,3 ou POST {"ids": [...]} (EO_BATCH_MAX_IDS au plus) :
+    {"results": [{"id", "status": "ok" | "not_found" | "forbidden", "data"}]}
+    dans l'ordre demandé. Une requête scopée par get_queryset() (+ préchargements),
+    une seconde seulement pour les ids manquants (introuvable vs interdit).
+    ?fields= / ?expand= supportés.
+    """
+
+    batch_prefetch = ()
+
+    def batch_ids(self, request):
+        if request.method == "POST":
+            # Corps JSON qui n'est pas un objet (liste, nombre...) : 400, pas 500
+            if not isinstance(request.data, dict):
+                raise ValidationError({"ids": "Objet JSON attendu : {\"ids\": [...]}."})
+            raw = request.data.get("ids")
+        else:
+            raw = request.query_params.get("ids", "")
+        if isinstance(raw, str):
+            raw = [item for item in raw.split(",") if item.strip()]
+        if not isinstance(raw, list) or not raw:
+            raise ValidationError({"ids": "Liste d'ids requise (?ids=1,2,3 ou {\"ids\": [...]})."})
+        try:
+            ids = list(dict.fromkeys(int(item) for item in raw))
+        except (TypeError, ValueError):
+            raise ValidationError({"ids": "Les ids doivent être des entiers."})
+
+        max_ids = getattr(settings, "EO_BATCH_MAX_IDS", 100)
+        if len(ids) > max_ids:
+            raise ValidationError({"ids": f"{max_ids} ids maximum par requête."})
+        return ids
+
+    @action(detail=False, methods=["get", "post"], url_path="batch")
+    def batch(self, request, *args, **kwargs):
+        ids = self.batch_ids(request)
+
+        queryset = self.get_queryset().filter(pk__in=ids).order_by()
+        if self.sparse_params()[0] is not None:
+            queryset = sparse_queryset(queryset, self.get_serializer())
+        elif self.batch_prefetch:
+            queryset = queryset.prefetch_related(*self.batch_prefetch)
+        found = {obj.pk: obj for obj in queryset}
+
+        missing = [pk for pk in ids if pk not in found]
+        existing = set()
+        if missing:
+            existing = set(
+                queryset.model._default_manager.filter(pk__in=missing).values_list("pk", flat=True)
+            )
+
+        data = iter(self.get_serializer([found[pk] for pk in ids if pk in found], many=True).data)
+        results = []
+        for pk in ids:
+            if pk in found:
+                results.append({"id": pk, "status": "ok", "data": next(data)})
+            else:
+                results.append({"id": pk, "status": "forbidden" if pk in existing else "not_found"})
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 # -------------------------------------------------------
 # Organisations
 # -------------------------------------------------------
-class OrganisationViewSet(viewsets.ModelViewSet):
+class OrganisationViewSet(BatchRetrieveMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = OrganisationSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "slug"
 
     def get_queryset(self):
         # Un utilisateur ne voit que ses organisations
-        return Organisation.objects.filter(memberships__user=self.request.user).distinct()
+        return Organisation.objects.filter(
+            id__in=get_organisation_ids(self.request.user)
+        ).select_related("subscription").order_by("nom")
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if request.auth is not None:
+            # Membership owner créé : version incrémentée, le token courant
+            # est refusé. Nouvel access token avec les claims à jour.
+            request.user.refresh_from_db(fields=["membership_version"])
+            token = add_membership_claims(AccessToken.for_user(request.user), request.user)
+            response.data["access"] = str(token)
+        return response
 
     def perform_create(self, serializer):
         org = serializer.save()
@@ -90,7 +273,7 @@ class OrganisationViewSet(viewsets.ModelViewSet):
 # -------------------------------------------------------
 # Publications
 # -------------------------------------------------------
-class PublicationViewSet(viewsets.ModelViewSet):
+class PublicationViewSet(BatchRetrieveMixin, FastListMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
 
@@ -98,20 +281,24 @@ class PublicationViewSet(viewsets.ModelViewSet):
     ordering_fields = ["date_publication", "event_start", "titre"]
     ordering = ["-date_publication"]
     search_fields = ["titre", "contenu", "event_location"]
+    batch_prefetch = ["attachments"]
 
     def get_queryset(self):
         user = self.request.user
 
         qs = (
-            Publication.objects.filter(organisation__memberships__user=user)
-            .select_related("organisation")
-            .distinct()
+            Publication.objects.filter(organisation_id__in=get_organisation_ids(user))
+            .select_related("organisation", "organisation__subscription")
         )
 
         # Member (non staff/superuser) -> seulement published
         if not user.is_staff and not user.is_superuser:
             qs = qs.filter(status=Publication.STATUS_PUBLISHED)
 
+        if self.action == "upcoming" or (self.action == "list" and self.wants_field("attachments_count")):
+            # attachments_count en une requête (sinon un COUNT par publication)
+            qs = qs.annotate(attachments_count=Count("attachments"))
+
         return qs.order_by("-date_publication")
 
     def get_serializer_class(self):
@@ -122,16 +309,84 @@ class PublicationViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         # Écriture publications : admin/owner
         if self.action in ["create", "update", "partial_update", "destroy"]:
-            return [permissions.IsAuthenticated(), IsOrganisationAdmin()]
+            return [permissions.IsAuthenticated(), IsOrganisationAdmin(), HasActiveSubscription()]
 
         # Nested attachments : POST/DELETE admin/owner ; GET auth
         if self.action == "attachments":
             if self.request.method.upper() in ["POST", "DELETE"]:
-                return [permissions.IsAuthenticated(), IsOrganisationAdmin()]
+                return [permissions.IsAuthenticated(), IsOrganisationAdmin(), HasActiveSubscription()]
             return [permissions.IsAuthenticated()]
 
         return [permissions.IsAuthenticated()]
 
+    def cached_feed(self, request, build):
+        """
+        Réponse du feed depuis core/feed_cache.py, sinon build() (stockée
+        une fois rendue, cf. finalize_response). Seulement si les
+        organisations viennent des claims JWT (clé sans requête) et pour le
+        rendu JSON.
+        """
+        roles = getattr(request.user, "org_roles", None)
+        if not FEED_CACHE_TTL or roles is None or request.accepted_renderer.format != "json":
+            return build()
+
+        key = feed_cache_key(request, roles)
+        response = get_cached_response(key)
+        if response is None:
+            self._feed_cache_key = key
+            response = build()
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "_feed_cache_key", None)
+        if key and response.status_code == 200:
+            store_response(key, response.render())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_feed(request, lambda: super(PublicationViewSet, self).list(request, *args, **kwargs))
+
+    def uses_timeline(self):
+        """
+        Feed d'accueil d'un membre (pas de filtre / recherche / tri, champs
+        complets) : lu depuis la timeline (core/timeline.py).
+        """
+        user = self.request.user
+        params = set(self.request.query_params) - {"page"}
+        return (
+            getattr(settings, "EO_TIMELINE_FEED", False)
+            and self.action == "list"
+            and not params
+            and not user.is_staff
+            and not user.is_superuser
+        )
+
+    def filter_queryset(self, queryset):
+        if self.uses_timeline():
+            return timeline_queryset(self.request.user, get_organisation_ids(self.request.user))
+        return super().filter_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Archivée depuis longtemps : table froide (core/archive.py)
+            return self.retrieve_archived()
+
+    def retrieve_archived(self):
+        user = self.request.user
+        qs = (
+            ArchivedPublication.objects.filter(organisation_id__in=get_organisation_ids(user))
+            .select_related("organisation", "organisation__subscription")
+            .prefetch_related("attachments")
+        )
+        if not user.is_staff and not user.is_superuser:
+            qs = qs.filter(status=Publication.STATUS_PUBLISHED)
+
+        publication = get_object_or_404(qs, pk=self.kwargs[self.lookup_field])
+        return Response(ArchivedPublicationSerializer(publication, context=self.get_serializer_context()).data)
+
     def perform_create(self, serializer):
         user = self.request.user
 
@@ -150,11 +405,11 @@ class PublicationViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Organisation manquante ou introuvable.")
 
         # user doit être admin/owner de l'orga pour créer une publication
-        if not (user.is_staff or user.is_superuser) and not org.memberships.filter(
-            user=user, role__in=["owner", "admin"]
-        ).exists():
+        if not is_organisation_admin(user, org.id):
             raise PermissionDenied("Vous n'avez pas les droits pour publier dans cette organisation.")
 
+        check_entitlement(self.request, org.id)
+
         serializer.save(organisation=org, created_by=user)
 
     @action(
@@ -172,6 +427,11 @@ class PublicationViewSet(viewsets.ModelViewSet):
             return Response(ser.data, status=status.HTTP_200_OK)
 
         if request.method.lower() == "post":
+            # L'abonnement est déjà vérifié par HasActiveSubscription (get_object)
+            _check_attachment_limits(
+                check_entitlement(request, publication.organisation_id),
+                request.data.get("file"),
+            )
             ser = PublicationAttachmentSerializer(
                 data={
                     "publication": publication.id,
@@ -203,6 +463,10 @@ class PublicationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="upcoming")
     def upcoming(self, request):
+        # En cache : un événement qui commence reste listé au plus EO_FEED_CACHE_TTL
+        return self.cached_feed(request, lambda: self.upcoming_response(request))
+
+    def upcoming_response(self, request):
         now = timezone.now()
         qs = (
             self.get_queryset()
@@ -214,6 +478,10 @@ class PublicationViewSet(viewsets.ModelViewSet):
             .order_by("event_start")
         )
 
+        response = self.fast_list_response(qs, PublicationListSerializer)
+        if response is not None:
+            return response
+
         page = self.paginate_queryset(qs)
         if page is not None:
             ser = PublicationListSerializer(page, many=True, context={"request": request})
@@ -226,9 +494,9 @@ class PublicationViewSet(viewsets.ModelViewSet):
 # -------------------------------------------------------
 # Attachments (endpoint non-nested)
 # -------------------------------------------------------
-class PublicationAttachmentViewSet(viewsets.ModelViewSet):
+class PublicationAttachmentViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = PublicationAttachmentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasActiveSubscription]
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -236,10 +504,9 @@ class PublicationAttachmentViewSet(viewsets.ModelViewSet):
 
         qs = (
             PublicationAttachment.objects.filter(
-                publication__organisation__memberships__user=user
+                publication__organisation_id__in=get_organisation_ids(user)
             )
             .select_related("publication", "publication__organisation")
-            .distinct()
         )
 
         if not user.is_staff and not user.is_superuser:
@@ -248,24 +515,26 @@ class PublicationAttachmentViewSet(viewsets.ModelViewSet):
         return qs.order_by("-created_at")
 
     def _is_org_admin_for_publication(self, publication) -> bool:
-        user = self.request.user
-        if user.is_staff or user.is_superuser:
-            return True
-
-        return publication.organisation.memberships.filter(
-            user=user, role__in=["owner", "admin"]
-        ).exists()
+        return is_organisation_admin(self.request.user, publication.organisation_id)
 
     def perform_create(self, serializer):
         publication = serializer.validated_data["publication"]
         if not self._is_org_admin_for_publication(publication):
             raise PermissionDenied("Vous n'avez pas les droits pour ajouter une pièce jointe.")
+        _check_attachment_limits(
+            check_entitlement(self.request, publication.organisation_id),
+            serializer.validated_data.get("file"),
+        )
         serializer.save()
 
     def perform_update(self, serializer):
         attachment = self.get_object()
         if not self._is_org_admin_for_publication(attachment.publication):
             raise PermissionDenied("Vous n'avez pas les droits pour modifier une pièce jointe.")
+        _check_attachment_limits(
+            check_entitlement(self.request, attachment.publication.organisation_id),
+            serializer.validated_data.get("file"),
+        )
         serializer.save()
 
     def perform_destroy(self, instance):
@@ -279,14 +548,14 @@ class PublicationAttachmentViewSet(viewsets.ModelViewSet):
 # /api/memberships?organisation=<id>
 # /api/memberships?organisation_slug=<slug>
 # -------------------------------------------------------
-class MembershipViewSet(viewsets.ModelViewSet):
+class MembershipViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = MembershipSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         qs = Membership.objects.filter(
-            organisation__memberships__user=user
+            organisation_id__in=get_organisation_ids(user)
         ).select_related("user", "organisation")
 
         org_id = self.request.query_params.get("organisation")
@@ -308,7 +577,7 @@ class MembershipViewSet(viewsets.ModelViewSet):
         serializer = MembershipInviteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        email = serializer.validated_data["email"]
+        target = serializer.validated_data["user"]
         role = serializer.validated_data["role"]
         organisation_id = request.data.get("organisation")
 
@@ -320,15 +589,9 @@ class MembershipViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Organisation introuvable."}, status=status.HTTP_404_NOT_FOUND)
 
         # Vérifie droits (admin/owner) sur l'orga cible
-        if not (request.user.is_staff or request.user.is_superuser) and not organisation.memberships.filter(
-            user=request.user, role__in=["owner", "admin"]
-        ).exists():
+        if not is_organisation_admin(request.user, organisation.id):
             raise PermissionDenied("Vous n'avez pas les droits pour inviter un membre.")
 
-        target = User.objects.filter(email__iexact=email).first()
-        if not target:
-            return Response({"detail": "Aucun utilisateur avec cet email."}, status=status.HTTP_400_BAD_REQUEST)
-
         membership, created = Membership.objects.get_or_create(
             organisation=organisation,
             user=target,
@@ -344,15 +607,136 @@ class MembershipViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_invite(self, request):
+        """
+        Invitations en masse : une requête pour résoudre tous les emails
+        (index Lower(email)), un upsert bulk_create dans une transaction.
+        """
+        serializer = MembershipBulkInviteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        organisation = serializer.validated_data["organisation"]
+        invitations = serializer.validated_data["invitations"]
+
+        if not is_organisation_admin(request.user, organisation.id):
+            raise PermissionDenied("Vous n'avez pas les droits pour inviter un membre.")
+
+        # Dernière occurrence gagnante si un email apparaît plusieurs fois
+        roles = {}
+        for entry in invitations:
+            roles[User.objects.normalize_email(entry["email"])] = entry["role"]
+
+        user_ids = dict(
+            User.objects.filter_by_emails(roles.keys()).values_list("email", "id")
+        )
+
+        # Lecture puis écriture : verrou d'écriture dès le BEGIN (SQLite)
+        with atomic_immediate():
+            existing = set(
+                Membership.objects.filter(
+                    organisation=organisation, user_id__in=user_ids.values()
+                ).values_list("user_id", flat=True)
+            )
+            Membership.objects.bulk_create(
+                [
+                    Membership(organisation=organisation, user_id=user_id, role=roles[email])
+                    for email, user_id in user_ids.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["user", "organisation"],
+                update_fields=["role", "updated_at"],
+            )
+            # bulk_create ne déclenche pas post_save : claims JWT à invalider,
+            # rattrapage de la timeline des nouveaux membres
+            bump_membership_versions(user_ids.values())
+            created = Membership.objects.filter(
+                organisation=organisation, user_id__in=set(user_ids.values()) - existing
+            ).values_list("pk", flat=True)
+            enqueue_timeline(TimelineJob.KIND_MEMBERSHIP, list(created))
+
+        results = []
+        counts = {"created": 0, "updated": 0, "unknown": 0}
+        for entry in invitations:
+            user_id = user_ids.get(User.objects.normalize_email(entry["email"]))
+            if user_id is None:
+                outcome = "unknown"
+            elif user_id in existing:
+                outcome = "updated"
+            else:
+                outcome = "created"
+            counts[outcome] += 1
+            results.append({"email": entry["email"], "role": entry["role"], "status": outcome})
+
+        return Response(
+            {"organisation": organisation.id, **counts, "results": results},
+            status=status.HTTP_200_OK,
+        )
+
 
 # -------------------------------------------------------
 # Subscriptions (read-only)
 # -------------------------------------------------------
-class SubscriptionViewSet(viewsets.ReadOnlyModelViewSet):
+class SubscriptionViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Subscription.objects.filter(
-            organisation__memberships__user=self.request.user
-        ).select_related("organisation")
\ No newline at end of file
+            organisation_id__in=get_organisation_ids(self.request.user)
+        ).select_related("organisation")
+
+
+# -------------------------------------------------------
+# Synchronisation différentielle (clients hors ligne)
+# -------------------------------------------------------
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<token>[&organisation=<id>][&limit=N]
+    Changements (upsert / delete) après le token, cf. core/sync.py.
+    Sans since : état complet, page par page.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        organisation_ids = get_organisation_ids(request.user)
+        if not isinstance(organisation_ids, list):
+            organisation_ids = list(organisation_ids.values_list("organisation_id", flat=True))
+
+        organisation = request.query_params.get("organisation")
+        if organisation:
+            if not organisation.isdigit() or int(organisation) not in organisation_ids:
+                raise PermissionDenied("Organisation inconnue ou non accessible.")
+            organisation_ids = [int(organisation)]
+
+        try:
+            limit = min(int(request.query_params.get("limit", SYNC_PAGE_SIZE)), SYNC_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({"limit": "Entier attendu."})
+
+        return Response(sync_page(request, organisation_ids, request.query_params.get("since"), max(limit, 1)))
+
+
+# -------------------------------------------------------
+# Billing webhook
+# POST /api/billing/webhook/  (signé, non authentifié)
+# -------------------------------------------------------
+class BillingWebhookView(APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        # Corps brut : la signature porte sur les octets exacts reçus
+        body = request.body
+        try:
+            verify_signature(body, request.META.get(SIGNATURE_HEADER))
+        except InvalidSignature as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            created = record_event(body)
+        except (ValueError, KeyError, TypeError):
+            return Response({"detail": "Événement invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Traitement différé (process_billing_events) : on répond tout de suite
+        return Response({"received": True, "duplicate": not created}, status=status.HTTP_200_OK)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .claims import get_membership_version
+from .models import User
+
+
+def user_from_claims(validated_token):
+    """
+    User reconstruit depuis le token, sans requête : seuls id / email /
+    is_staff / is_superuser sont chargés, les autres champs sont différés
+    (chargés à la demande si une vue en a réellement besoin).
+    is_active vaut True : une désactivation incrémente la version (cf.
+    users/signals.py), le token est refusé avant d'arriver ici.
+    """
+    values = {
+        "id": validated_token[api_settings.USER_ID_CLAIM],
+        "is_superuser": bool(validated_token.get("su")),
+        "is_staff": bool(validated_token.get("staff")),
+        "is_active": True,
+        "email": validated_token.get("email", ""),
+    }
+    # from_db attend les valeurs dans l'ordre des champs concrets du modèle
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+    # Lu par core.permissions (rôles sans requête Membership)
+    user.org_roles = {int(org_id): role for org_id, role in validated_token["orgs"].items()}
+    return user
+
+
+class MembershipClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authentification sans lecture de la table User : l'utilisateur et ses
+    rôles viennent des claims. Seule la version est vérifiée (cache, requête
+    seulement en cas de miss) : elle change avec les memberships, le mot de
+    passe, is_active, is_staff et is_superuser.
+    Tokens sans claim "orgs" (anciens, ou trop d'organisations) : mode DB.
+    """
+
+    def get_user(self, validated_token):
+        if "orgs" not in validated_token or "mv" not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = get_membership_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if version != validated_token["mv"]:
+            raise AuthenticationFailed(
+                "Les droits ont changé : rafraîchir le token.", code="membership_changed"
+            )
+
+        return user_from_claims(validated_token)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from core.models import Membership
+from .models import User
+
+
+# ---------------------------------------------------------------------------
+# Claims d'appartenance embarqués dans les access tokens
+#
+#   "orgs": {"<organisation_id>": "<role>"}   (omis au-delà de EO_JWT_MAX_ORG_CLAIMS)
+#   "mv":   version des memberships de l'utilisateur
+#
+# La version est incrémentée à chaque changement de Membership (signaux +
+# invitations en masse) : un token portant une ancienne version est refusé,
+# le client doit passer par /refresh/ qui recalcule les claims.
+# ---------------------------------------------------------------------------
+
+MAX_ORG_CLAIMS = getattr(settings, "EO_JWT_MAX_ORG_CLAIMS", 200)
+VERSION_CACHE_TTL = getattr(settings, "EO_MEMBERSHIP_VERSION_CACHE_TTL", 60)
+
+
+def _version_key(user_id):
+    return f"eo:membership_version:{user_id}"
+
+
+def get_membership_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id)
+            .values_list("membership_version", flat=True)
+            .first()
+        )
+        if version is None:
+            return None
+        cache.set(key, version, VERSION_CACHE_TTL)
+    return version
+
+
+def bump_membership_versions(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    User.objects.filter(pk__in=user_ids).update(membership_version=F("membership_version") + 1)
+    cache.delete_many([_version_key(user_id) for user_id in user_ids])
+
+
+def add_membership_claims(token, user):
+    """
+    Ajoute orgs / mv / staff / su au token (access token).
+    """
+    roles = dict(
+        Membership.objects.filter(user=user).values_list("organisation_id", "role")[: MAX_ORG_CLAIMS + 1]
+    )
+    if len(roles) <= MAX_ORG_CLAIMS:
+        token["orgs"] = {str(org_id): role for org_id, role in roles.items()}
+    token["mv"] = user.membership_version
+    token["email"] = user.email
+    token["staff"] = user.is_staff
+    token["su"] = user.is_superuser
+    return token
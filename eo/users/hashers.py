@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+# ---------------------------------------------------------------------------
+# Hashers paramétrables (profil EO_PASSWORD_HASHER_PROFILE, cf. settings)
+#
+# Même nom d'algorithme que les hashers Django : les hash existants restent
+# valides. Si les paramètres changent, must_update() renvoie True et Django
+# re-hache le mot de passe au prochain login réussi (check_password setter).
+# ---------------------------------------------------------------------------
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return getattr(settings, "EO_PBKDF2_ITERATIONS", None) or PBKDF2PasswordHasher.iterations
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Nécessite argon2-cffi (profil "argon2").
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, "EO_ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "EO_ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "EO_ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
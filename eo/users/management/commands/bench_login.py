@@ -0,0 +1,67 @@
+import multiprocessing
+import secrets
+import time
+from functools import partial
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from users.models import User
+from users.serializers import EmailTokenObtainPairSerializer
+
+# Compte temporaire : mot de passe aléatoire à chaque exécution, supprimé à la fin
+BENCH_EMAIL = "bench-login@eo.local"
+
+
+def _run_logins(password, iterations):
+    # Chemin de login complet hors HTTP/throttle : authenticate + hash + tokens
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer = EmailTokenObtainPairSerializer(
+            data={"email": BENCH_EMAIL, "password": password}
+        )
+        serializer.is_valid(raise_exception=True)
+    elapsed = time.perf_counter() - start
+    connections.close_all()
+    return iterations / elapsed
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre de logins par seconde et par cœur (profil de hachage courant)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--processes", type=int, default=1, help="Processus en parallèle (1 par cœur)")
+
+    def handle(self, *args, **options):
+        password = secrets.token_urlsafe(24)
+        User.objects.filter_by_emails([BENCH_EMAIL]).delete()
+        user = User.objects.create_user(username=BENCH_EMAIL, email=BENCH_EMAIL, password=password)
+        try:
+            self.bench(user, password, options["iterations"], options["processes"])
+        finally:
+            User.objects.filter(pk=user.pk).delete()
+
+    def bench(self, user, password, iterations, processes):
+        hasher = get_hasher()
+        self.stdout.write(f"Hasher : {hasher.algorithm} {hasher.safe_summary(user.password)}")
+
+        # Hash seul (borne haute du débit)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            hasher.verify(password, user.password)
+        hash_rate = iterations / (time.perf_counter() - start)
+        self.stdout.write(f"Vérification du hash seule : {hash_rate:.1f}/s/cœur")
+
+        connections.close_all()
+        if processes == 1:
+            rates = [_run_logins(password, iterations)]
+        else:
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                rates = pool.map(partial(_run_logins, password), [iterations] * processes)
+
+        per_core = sum(rates) / len(rates)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Login : {per_core:.1f}/s/cœur, {sum(rates):.1f}/s au total ({processes} processus)"
+        ))
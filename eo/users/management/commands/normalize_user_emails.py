@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from users.utils import backfill_normalized_emails
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Normalise les emails des utilisateurs (minuscules) et liste les conflits"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--report", action="store_true", help="N'écrit rien, affiche seulement le rapport")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated, conflicts = backfill_normalized_emails(
+            User,
+            chunk_size=options["chunk_size"],
+            dry_run=options["report"],
+        )
+
+        verb = "à normaliser" if options["report"] else "normalisé(s)"
+        self.stdout.write(self.style.SUCCESS(f"✔ {updated} email(s) {verb}"))
+
+        if not conflicts:
+            self.stdout.write("Aucun conflit")
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(conflicts)} conflit(s) (comptes à fusionner) :"))
+        for email, rows in conflicts.items():
+            accounts = ", ".join(f"#{pk} <{raw}>" for pk, raw in rows)
+            self.stdout.write(f"  {email} : {accounts}")
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:10
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_organisation_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='users_user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:11
+
+from django.db import migrations, models
+import django.db.models.functions.text
+import users.models
+import users.utils
+
+
+def normalize_emails(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    _, conflicts = users.utils.backfill_normalized_emails(User)
+    if conflicts:
+        raise RuntimeError(
+            f"{len(conflicts)} email(s) en conflit après normalisation : "
+            "lancer `python manage.py normalize_user_emails --report` et fusionner "
+            "les comptes concernés avant de migrer."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_user_email_lower_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='users_user_email_lower_uniq'),
+        ),
+    ]
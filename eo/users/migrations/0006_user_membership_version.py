@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='membership_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_membership_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_mode',
+            field=models.CharField(choices=[('immediate', 'À chaque publication'), ('daily', 'Résumé quotidien'), ('weekly', 'Résumé hebdomadaire'), ('off', 'Aucune')], default='immediate', max_length=20),
+        ),
+    ]
@@ -1,11 +1,57 @@
 # users/models.py
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 # évite import circulaire : on n'importe Organisation que typiquement dans serializers/views
 # si besoin, utiliser settings.AUTH_USER_MODEL côté relations inverses
 
+class UserManager(DjangoUserManager):
+    """
+    Toutes les recherches par email passent par ici : elles utilisent
+    l'index unique fonctionnel sur Lower(email) (coût constant, pas de scan).
+    """
+
+    @classmethod
+    def normalize_email(cls, email):
+        # Email stocké en minuscules, sans espaces
+        return (email or "").strip().lower()
+
+    def filter_by_emails(self, emails):
+        normalized = {self.normalize_email(e) for e in emails}
+        return self.alias(email_lower=Lower("email")).filter(email_lower__in=normalized)
+
+    def get_by_email(self, email):
+        return self.alias(email_lower=Lower("email")).get(
+            email_lower=self.normalize_email(email)
+        )
+
+    def search_prefix(self, prefix):
+        """
+        Recherche par préfixe sur email / username, en plage d'index
+        (>= préfixe, < borne) : pas de LIKE non indexable. Le startswith
+        ne fait que revérifier les lignes déjà sélectionnées par la plage.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return self.all()
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self.alias(username_lower=Lower("username")).filter(
+            Q(email__gte=prefix, email__lt=upper, email__startswith=prefix)
+            | Q(
+                username_lower__gte=prefix,
+                username_lower__lt=upper,
+                username_lower__startswith=prefix,
+            )
+        )
+
+    def get_by_natural_key(self, username):
+        # Login (ModelBackend) : USERNAME_FIELD = "email"
+        return self.get_by_email(username)
+
+
 class User(AbstractUser):
     """
     Utilisateur personnalisé.
@@ -17,6 +63,24 @@ class User(AbstractUser):
 
     date_created = models.DateTimeField(default=timezone.now)
 
+    # Incrémenté à chaque changement de Membership, de mot de passe ou de
+    # is_active / is_staff / is_superuser (invalide les claims JWT)
+    membership_version = models.PositiveIntegerField(default=0)
+
+    # Notifications de publication (core/notifications.py)
+    NOTIFY_IMMEDIATE = "immediate"
+    NOTIFY_DAILY = "daily"
+    NOTIFY_WEEKLY = "weekly"
+    NOTIFY_OFF = "off"
+
+    NOTIFICATION_CHOICES = [
+        (NOTIFY_IMMEDIATE, "À chaque publication"),
+        (NOTIFY_DAILY, "Résumé quotidien"),
+        (NOTIFY_WEEKLY, "Résumé hebdomadaire"),
+        (NOTIFY_OFF, "Aucune"),
+    ]
+    notification_mode = models.CharField(max_length=20, choices=NOTIFICATION_CHOICES, default=NOTIFY_IMMEDIATE)
+
     ROLE_CHOICES = [
         ("owner", "Owner"),
         ("admin", "Admin"),
@@ -35,9 +99,40 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Unicité insensible à la casse + index des recherches (invitations, login)
+            models.UniqueConstraint(Lower("email"), name="users_user_email_lower_uniq"),
+        ]
+        indexes = [
+            # Recherche par préfixe de l'annuaire (l'email, normalisé, utilise son index unique)
+            models.Index(Lower("username"), name="users_user_username_lower_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
+    AUTH_FIELDS = ("password", "is_active", "is_staff", "is_superuser")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État lu en base : changements qui invalident les tokens (users/signals.py)
+        instance._loaded_auth_state = instance.auth_state()
+        # Résumé en attente envoyé ou abandonné au changement (core/signals.py)
+        instance._loaded_notification_mode = instance.__dict__.get("notification_mode")
+        return instance
+
+    def auth_state(self):
+        # Champs différés : absents de __dict__, pas de requête
+        return tuple(self.__dict__.get(name) for name in self.AUTH_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.email = User.objects.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     # --- Helpers Éo ---
 
     @property
@@ -1,8 +1,22 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .claims import add_membership_claims
 from .models import User
 
 
+def _validate_unique_email(value, instance=None):
+    email = User.objects.normalize_email(value)
+    try:
+        existing = User.objects.get_by_email(email)
+    except User.DoesNotExist:
+        return email
+    if instance is None or existing.pk != instance.pk:
+        raise serializers.ValidationError("Un utilisateur avec cet email existe déjà.")
+    return email
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Serializer "profil" (lecture / update éventuel).
@@ -20,8 +34,14 @@ class UserSerializer(serializers.ModelSerializer):
             "date_created",
             "role",
             "organisation",
+            "notification_mode",
         ]
         read_only_fields = ["id", "date_created", "role", "organisation"]
+        # Unicité vérifiée dans validate_email (insensible à la casse)
+        extra_kwargs = {"email": {"validators": []}}
+
+    def validate_email(self, value):
+        return _validate_unique_email(value, self.instance)
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -35,6 +55,10 @@ class UserCreateSerializer(serializers.ModelSerializer):
         model = User
         fields = ["id", "email", "password"]
         read_only_fields = ["id"]
+        extra_kwargs = {"email": {"validators": []}}
+
+    def validate_email(self, value):
+        return _validate_unique_email(value)
 
     def create(self, validated_data):
         email = validated_data["email"]
@@ -50,4 +74,30 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
-    username_field = "email"
\ No newline at end of file
+    username_field = "email"
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Claims d'appartenance dans l'access token seulement (refresh compact)
+        refresh = RefreshToken(data["refresh"])
+        data["access"] = str(add_membership_claims(refresh.access_token, self.user))
+        return data
+
+
+class MembershipClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh : claims recalculés depuis la base (les rôles ont pu changer).
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = RefreshToken(data.get("refresh", attrs["refresh"]))
+
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}, is_active=True
+        ).first()
+        if user is None:
+            raise serializers.ValidationError("Utilisateur introuvable ou inactif.")
+
+        data["access"] = str(add_membership_claims(refresh.access_token, user))
+        return data
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .claims import bump_membership_versions
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def bump_auth_version(sender, instance, created, **kwargs):
+    # Désactivation, droits staff / superuser, mot de passe : les access
+    # tokens en cours portent l'ancien état (claims), ils sont refusés.
+    # queryset.update() ne passe pas ici : appeler bump_membership_versions.
+    loaded = getattr(instance, "_loaded_auth_state", None)
+    state = instance.auth_state()
+    instance._loaded_auth_state = state
+    if created or loaded is None or loaded == state:
+        return
+    bump_membership_versions([instance.pk])
+    if "membership_version" in instance.__dict__:
+        # Un save() complet ultérieur ne doit pas réécrire l'ancienne version
+        instance.membership_version += 1
@@ -1,3 +1,264 @@
-from django.test import TestCase
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Membership, Publication
+from core.tests import MemberTestCase, QueryBudgetMixin
+
+from .models import User
+from .throttling import LoginIPRateThrottle
+from .utils import backfill_normalized_emails
+
+
+# -------------------------------------------------------
+# Annuaire utilisateurs (budgets : voir core/tests.py)
+# -------------------------------------------------------
+class UserQueryBudgetTests(QueryBudgetMixin, MemberTestCase):
+
+    QUERY_BUDGETS = {
+        "user-list": 1,
+        "user-list-search": 1,
+        "user-list-organisation": 1,
+        "user-detail": 1,
+    }
+
+    def endpoints(self):
+        users = reverse("user-list")
+        return {
+            "user-list": users,
+            "user-list-search": f"{users}?q=membre",
+            "user-list-organisation": f"{users}?organisation={self.organisations[0].id}",
+            "user-detail": reverse("user-detail", kwargs={"pk": self.member.pk}),
+        }
+
+
+# -------------------------------------------------------
+# Annuaire : organisations partagées, recherche par préfixe
+# -------------------------------------------------------
+class DirectoryTests(MemberTestCase):
+
+    ORGANISATIONS = 1
+    FOREIGN = 1
+    SEED = {"publications": 0, "attachments": 0, "members": 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.durand = User.objects.create_user(username="Durand", email="contact@example.com", password=None)
+        Membership.objects.create(user=cls.durand, organisation=cls.organisations[0], role="member")
+
+    def emails(self, **params):
+        response = self.client.get(reverse("user-list"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [user["email"] for user in response.json()["results"]]
+
+    def test_scoped_to_shared_organisations(self):
+        self.assertEqual(
+            self.emails(),
+            ["contact@example.com", "membre-1-0@example.com", "membre-1-1@example.com", "membre@example.com"],
+        )
+        self.assertEqual(self.emails(organisation=self.foreign[0].pk), [])
+        self.assertEqual(len(self.emails(organisation=self.organisations[0].pk)), 4)
+        self.assertEqual(self.client.get(reverse("user-list"), {"organisation": "x"}).status_code, 400)
+
+        self.member.is_staff = True
+        self.assertEqual(len(self.emails()), User.objects.count())
+
+    def test_prefix_search(self):
+        self.assertEqual(self.emails(q="membre-1"), ["membre-1-0@example.com", "membre-1-1@example.com"])
+        self.assertEqual(self.emails(q=" MEMBRE-1-1"), ["membre-1-1@example.com"])
+        # Username (insensible à la casse), pas de sous-chaîne
+        self.assertEqual(self.emails(q="dur"), ["contact@example.com"])
+        self.assertEqual(self.emails(q="urand"), [])
+        # Membres d'organisations non partagées : invisibles
+        self.assertEqual(self.emails(q="membre-2"), [])
+
+    def test_cursor_pagination(self):
+        first = self.client.get(reverse("user-list"), {"page_size": 3}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(
+            [u["email"] for u in first["results"] + second["results"]], self.emails()
+        )
+
+
+# -------------------------------------------------------
+# Tokens à claims : login réel, en-tête Authorization
+# -------------------------------------------------------
+class ClaimsTokenTests(MemberTestCase):
+
+    ORGANISATIONS = 1
+    ROLE = "member"
+    SEED = {"attachments": 0, "members": 0}
+    PASSWORD = "mot-de-passe-de-test"
+
+    def status(self):
+        return self.client.get(reverse("publication-list")).status_code
+
+    def test_member_flags_from_claims(self):
+        # Membre : pas de brouillons (is_staff / is_superuser lus dans les claims)
+        results = self.client.get(reverse("publication-list")).json()["results"]
+        self.assertEqual(len(results), Publication.objects.filter(status=Publication.STATUS_PUBLISHED).count())
+
+    def test_deactivation_rejects_token(self):
+        member = User.objects.get(pk=self.member.pk)
+        member.is_active = False
+        member.save()
+        self.assertEqual(self.status(), 401)
+
+    def test_staff_change_rejects_token(self):
+        member = User.objects.get(pk=self.member.pk)
+        member.is_staff = True
+        member.save()
+        self.assertEqual(self.status(), 401)
+        self.login()
+        self.assertEqual(
+            self.client.get(reverse("publication-list")).json()["count"], Publication.objects.count()
+        )
+
+        member.is_staff = False
+        member.save(update_fields=["is_staff"])
+        self.assertEqual(self.status(), 401)
+        # save() complet ensuite : la version incrémentée n'est pas écrasée
+        member.first_name = "Membre"
+        member.save()
+        self.assertEqual(self.status(), 401)
+
+    def test_password_change_rejects_token(self):
+        member = User.objects.get(pk=self.member.pk)
+        member.set_password("nouveau-mot-de-passe")
+        member.save()
+        self.assertEqual(self.status(), 401)
+        self.login("nouveau-mot-de-passe")
+        self.assertEqual(self.status(), 200)
+
+    def test_profile_change_keeps_token(self):
+        member = User.objects.get(pk=self.member.pk)
+        member.phone = "0102030405"
+        member.save()
+        self.assertEqual(self.status(), 200)
+
+    def test_organisation_creator_gets_fresh_token(self):
+        response = self.client.post(
+            reverse("organisation-list"), {"nom": "Nouvelle", "slug": "nouvelle"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        # Ancien token : version des memberships périmée
+        self.assertEqual(self.status(), 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        slugs = {o["slug"] for o in self.client.get(reverse("organisation-list")).json()["results"]}
+        self.assertEqual(slugs, {self.organisations[0].slug, "nouvelle"})
+
+
+# -------------------------------------------------------
+# Emails : unicité insensible à la casse, normalisation (0004)
+# -------------------------------------------------------
+class EmailUniquenessTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_signup_and_login_ignore_case(self):
+        response = self.client.post(
+            reverse("user-list"), {"email": " Alice@Example.COM ", "password": "mot-de-passe-alice"}
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(User.objects.get().email, "alice@example.com")
+
+        duplicate = self.client.post(reverse("user-list"), {"email": "ALICE@example.com", "password": "x" * 12})
+        self.assertEqual(duplicate.status_code, 400)
+        login = self.client.post(
+            reverse("jwt-login"), {"email": "ALICE@example.com", "password": "mot-de-passe-alice"}
+        )
+        self.assertEqual(login.status_code, 200)
+
+    def test_constraint_rejects_case_variants(self):
+        User.objects.create_user(username="alice", email="alice@example.com", password=None)
+        other = User.objects.create_user(username="bob", email="bob@example.com", password=None)
+        # update() contourne save() : la contrainte Lower(email) reste
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.filter(pk=other.pk).update(email="ALICE@example.com")
+
+    def test_backfill(self):
+        users = [
+            User.objects.create_user(username=name, email=f"{name}@example.com", password=None)
+            for name in ("mixte", "doublon-a", "doublon-b", "propre")
+        ]
+        # Emails antérieurs à la normalisation (update() : pas de save())
+        User.objects.filter(pk=users[0].pk).update(email="  Mixte@Example.COM")
+        User.objects.filter(pk=users[1].pk).update(email=" doublon@example.com")
+        User.objects.filter(pk=users[2].pk).update(email="DOUBLON@example.com ")
+
+        migration = import_module("users.migrations.0004_user_email_lower_unique")
+        # Migration atomique : rien n'est écrit tant qu'un conflit subsiste
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            migration.normalize_emails(apps, None)
+        self.assertEqual(User.objects.get(pk=users[0].pk).email, "  Mixte@Example.COM")
+
+        updated, conflicts = backfill_normalized_emails(User, chunk_size=1)
+        self.assertEqual(updated, 1)
+        self.assertEqual(set(conflicts), {"doublon@example.com"})
+        self.assertEqual(
+            list(User.objects.order_by("pk").values_list("email", flat=True)),
+            ["mixte@example.com", " doublon@example.com", "DOUBLON@example.com ", "propre@example.com"],
+        )
+
+        # Conflit résolu (comptes fusionnés) : la migration passe
+        User.objects.filter(pk=users[2].pk).delete()
+        migration.normalize_emails(apps, None)
+        self.assertEqual(User.objects.get(pk=users[1].pk).email, "doublon@example.com")
+
+
+# Hash rapide pour les tests (le throttle, pas le hasher, est mesuré ici)
+@override_settings(EO_PBKDF2_ITERATIONS=1000)
+class LoginThrottleTests(TestCase):
+
+    PASSWORD = "mot-de-passe-alice"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password=self.PASSWORD)
+
+    def login(self, email, password="mauvais", **extra):
+        return self.client.post(reverse("jwt-login"), {"email": email, "password": password}, **extra)
+
+    def test_email_limit_ignores_case_and_skips_hashing(self):
+        # EO_LOGIN_RATE_EMAIL (10/min), même email normalisé
+        for n in range(10):
+            email = "alice@EXAMPLE.com" if n % 2 else "ALICE@example.com"
+            self.assertEqual(self.login(email).status_code, 401)
+
+        with mock.patch.object(User, "check_password") as check_password:
+            response = self.login("Alice@Example.com", self.PASSWORD)
+        self.assertEqual(response.status_code, 429)
+        # Refusé avant le serializer : pas de hachage
+        check_password.assert_not_called()
+
+        # Un autre email reste accepté
+        self.assertEqual(self.login("bob@example.com").status_code, 401)
+
+    @mock.patch.object(
+        LoginIPRateThrottle, "THROTTLE_RATES", {**LoginIPRateThrottle.THROTTLE_RATES, "login_ip": "3/min"}
+    )
+    def test_ip_limit_across_emails(self):
+        for n in range(3):
+            self.assertEqual(self.login(f"inconnu-{n}@example.com").status_code, 401)
+        self.assertEqual(self.login("alice@example.com", self.PASSWORD).status_code, 429)
+        # Autre adresse IP : non concernée
+        other = self.login("alice@example.com", self.PASSWORD, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other.status_code, 200)
+
+    def test_login_rehashes_with_new_iterations(self):
+        self.assertEqual(PBKDF2PasswordHasher().decode(self.user.password)["iterations"], 1000)
+        with override_settings(EO_PBKDF2_ITERATIONS=1200):
+            self.assertEqual(self.login("alice@example.com", self.PASSWORD).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).algorithm, "pbkdf2_sha256")
+        self.assertEqual(PBKDF2PasswordHasher().decode(self.user.password)["iterations"], 1200)
+        self.assertTrue(self.user.check_password(self.PASSWORD))
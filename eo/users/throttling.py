@@ -0,0 +1,32 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import User
+
+
+# ---------------------------------------------------------------------------
+# Throttling du login
+#
+# Vérifié dans APIView.initial(), donc avant la validation du serializer et
+# le hachage du mot de passe : une rafale de credential stuffing est refusée
+# pour le coût d'un accès cache. Fenêtre glissante (historique des
+# timestamps, cf. SimpleRateThrottle) par IP et par email.
+# ---------------------------------------------------------------------------
+
+class LoginIPRateThrottle(SimpleRateThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    scope = "login_email"
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email:
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": User.objects.normalize_email(str(email)),
+        }
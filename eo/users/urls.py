@@ -1,9 +1,9 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserListCreateView,
     UserDetailView,
     EmailTokenObtainPairView,
+    MembershipClaimsTokenRefreshView,
 )
 
 urlpatterns = [
@@ -13,5 +13,5 @@ urlpatterns = [
 
     # JWT login + refresh
     path("login/", EmailTokenObtainPairView.as_view(), name="jwt-login"),
-    path("refresh/", TokenRefreshView.as_view(), name="jwt-refresh"),
+    path("refresh/", MembershipClaimsTokenRefreshView.as_view(), name="jwt-refresh"),
 ]
\ No newline at end of file
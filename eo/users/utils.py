@@ -0,0 +1,64 @@
+from django.db.models import Count, F
+from django.db.models.functions import Lower, Trim
+
+
+# ---------------------------------------------------------------------------
+# Normalisation des emails existants (minuscules, sans espaces)
+# Les fonctions reçoivent le modèle en paramètre : utilisables depuis une
+# migration (modèle historique) comme depuis la commande normalize_user_emails.
+# ---------------------------------------------------------------------------
+
+def find_email_conflicts(user_model):
+    """
+    Retourne {email_normalisé: [(id, email), ...]} pour les comptes qui
+    deviendraient des doublons après normalisation.
+    """
+    normalized = Lower(Trim("email"))
+    duplicated = (
+        user_model.objects.annotate(email_norm=normalized)
+        .values("email_norm")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values("email_norm")
+    )
+    conflicts = {}
+    rows = (
+        user_model.objects.annotate(email_norm=normalized)
+        .filter(email_norm__in=duplicated)
+        .order_by("email_norm", "id")
+        .values_list("email_norm", "id", "email")
+    )
+    for email_norm, pk, email in rows:
+        conflicts.setdefault(email_norm, []).append((pk, email))
+    return conflicts
+
+
+def backfill_normalized_emails(user_model, chunk_size=1000, dry_run=False):
+    """
+    Normalise les emails non conflictuels, par lots ordonnés par pk.
+    Retourne (nombre normalisé, conflits).
+    """
+    conflicts = find_email_conflicts(user_model)
+    conflicting_ids = {pk for rows in conflicts.values() for pk, _ in rows}
+
+    pending = (
+        user_model.objects.annotate(email_norm=Lower(Trim("email")))
+        .exclude(email=F("email_norm"))
+        .exclude(pk__in=conflicting_ids)
+        .order_by("pk")
+    )
+
+    updated = 0
+    last_pk = 0
+    while True:
+        chunk = list(pending.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for user in chunk:
+            user.email = user.email_norm
+        if not dry_run:
+            user_model.objects.bulk_update(chunk, ["email"])
+        updated += len(chunk)
+
+    return updated, conflicts
@@ -1,18 +1,72 @@
+from django.db.models import Q
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from core.models import Membership
 from .models import User
 from .serializers import UserSerializer, UserCreateSerializer
-from .serializers import EmailTokenObtainPairSerializer
+from .serializers import EmailTokenObtainPairSerializer, MembershipClaimsTokenRefreshSerializer
+from .throttling import LoginEmailRateThrottle, LoginIPRateThrottle
 
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
+    throttle_classes = [LoginIPRateThrottle, LoginEmailRateThrottle]
+
+
+class MembershipClaimsTokenRefreshView(TokenRefreshView):
+    serializer_class = MembershipClaimsTokenRefreshSerializer
+
+
+class UserDirectoryPagination(CursorPagination):
+    # email unique et normalisé : curseur stable, parcours en plage d'index
+    ordering = "email"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
 
 
 # --- CRUD Users ---
 class UserListCreateView(generics.ListCreateAPIView):
-    queryset = User.objects.all()
+    """
+    GET : annuaire des utilisateurs visibles (organisations partagées).
+      ?q=<préfixe>          recherche sur email / username
+      ?organisation=<id>    membres d'une organisation
+    POST : inscription publique.
+    """
+    pagination_class = UserDirectoryPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = User.objects.select_related("organisation")
+
+        if self.request.method.upper() == "POST":
+            return qs
+
+        # Annuaire : soi-même + membres des organisations partagées
+        if not user.is_staff and not user.is_superuser:
+            my_orgs = Membership.objects.filter(user=user).values("organisation_id")
+            qs = qs.filter(
+                Q(pk=user.pk)
+                | Q(pk__in=Membership.objects.filter(organisation_id__in=my_orgs).values("user_id"))
+            )
+
+        org_id = self.request.query_params.get("organisation")
+        if org_id:
+            if not org_id.isdigit():
+                raise ValidationError({"organisation": "Entier attendu."})
+            qs = qs.filter(
+                pk__in=Membership.objects.filter(organisation_id=org_id).values("user_id")
+            )
+
+        prefix = self.request.query_params.get("q")
+        if prefix:
+            qs = qs & User.objects.search_prefix(prefix)
+
+        return qs
 
     def get_permissions(self):
         # Signup public
@@ -27,5 +81,5 @@ class UserListCreateView(generics.ListCreateAPIView):
 
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
\ No newline at end of file
+    queryset = User.objects.select_related("organisation")
+    serializer_class = UserSerializer